@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover the rest of the middleware too
+    "employee.middleware.ServerTimingMiddleware",
+    "employee.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -53,6 +60,19 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# the Server-Timing header of every response, with its queries, database, view and render time, it shows how the
+# requests are served so it's only on while debugging, SERVER_TIMING_LOG also logs them to employee.middleware
+SERVER_TIMING = DEBUG
+SERVER_TIMING_LOG = False
+
+# the request metrics served at /metrics, every worker process writes its totals to its own file in METRICS_DIR
+# every METRICS_FLUSH_INTERVAL seconds, and they're summed up when read, without METRICS_DIR only the process
+# serving /metrics is counted. The files are kept when the workers exit, so the server's start script has to run
+# manage.py clear_metrics before starting the workers, see employee.metrics
+METRICS = True
+METRICS_DIR = os.environ.get("EDI_METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 5
+
 ROOT_URLCONF = "edi.urls"
 
 TEMPLATES = [
@@ -77,11 +97,113 @@ WSGI_APPLICATION = "edi.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# the production profile, turned off with EDI_SQLITE_TUNING=0: WAL, so the readers don't wait for a writer nor
+# the writer for the readers, and persistent connections, so a request doesn't open and set up its own
+sqlite_tuning = os.environ.get("EDI_SQLITE_TUNING", "1") == "1"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        # django.db.backends.sqlite3 with the transaction_mode option
+        "ENGINE": "employee.backends.sqlite3",
+        "NAME": os.environ.get("EDI_DB_PATH", BASE_DIR / "db.sqlite3"),
+        # the writers wait for each other at BEGIN, see employee/backends/sqlite3/base.py
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"} if sqlite_tuning else {},
+        # seconds a connection is kept open after a request, None for ever
+        "CONN_MAX_AGE": (
+            int(os.environ.get("EDI_DB_CONN_MAX_AGE", 600)) if sqlite_tuning else 0
+        ),
+        "CONN_HEALTH_CHECKS": sqlite_tuning,
+    }
+}
+
+# read-only replicas of the primary, which the list endpoints read from (not the cached financials), see
+# employee/routers.py. EDI_DB_REPLICAS is a comma separated list of sqlite files kept up to date from the primary
+# (e.g. by litestream), opened read-only; DATABASE_REPLICAS can also name any other alias in DATABASES
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get("EDI_DB_REPLICAS", "").split(",")), 1
+):
+    DATABASES[f"replica{number}"] = {
+        **DATABASES["default"],
+        "NAME": f"file:{path.strip()}?mode=ro",
+        "OPTIONS": {},
+        # the tests only have the primary
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["employee.routers.ReplicaRouter"]
+
+# set on every new sqlite connection, see employee.db
+SQLITE_PRAGMAS = (
+    {
+        "journal_mode": os.environ.get("EDI_SQLITE_JOURNAL_MODE", "wal"),
+        # with WAL only a power loss can lose the last commits, never corrupt the database
+        "synchronous": os.environ.get("EDI_SQLITE_SYNCHRONOUS", "normal"),
+        # negative is in KiB, so 64 MiB of page cache per connection
+        "cache_size": int(os.environ.get("EDI_SQLITE_CACHE_SIZE", -64000)),
+        "mmap_size": int(os.environ.get("EDI_SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        # milliseconds a writer waits for the lock before "database is locked"
+        "busy_timeout": int(os.environ.get("EDI_SQLITE_BUSY_TIMEOUT", 5000)),
+        "temp_store": "memory",
     }
+    if sqlite_tuning
+    else {}
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# the financials are invalidated through versions stored in the cache, which only works when every process that
+# serves or writes them (the worker processes and the management commands alike) uses the same one. EDI_CACHE_URL
+# is a redis://host:port/db (with redis installed) or memcached://host:port (with pymemcache installed) one,
+# without it the financials aren't cached and the read endpoints have no ETags, see SHARED_CACHE
+cache_url = os.environ.get("EDI_CACHE_URL", "")
+
+if cache_url.startswith(("redis://", "rediss://")):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": cache_url,
+        }
+    }
+elif cache_url.startswith("memcached://"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": cache_url.removeprefix("memcached://"),
+        }
+    }
+elif cache_url:
+    raise ImproperlyConfigured(
+        f"EDI_CACHE_URL has to be a redis:// or memcached:// url, not {cache_url!r}"
+    )
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# whether the cache is shared by all the processes, the tests run in a single one, so the local memory cache is
+SHARED_CACHE = bool(cache_url) or sys.argv[1:2] == ["test"]
+
+# seconds a cached financials result is kept, it's invalidated by the writes before that anyway
+FINANCIALS_CACHE_TIMEOUT = 60 * 60
+
+
+# Logging
+# https://docs.djangoproject.com/en/4.1/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "employee": {"handlers": ["console"], "level": "INFO"},
+    },
 }
 
 
@@ -19,6 +19,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view as swagger_get_schema_view
 from rest_framework import permissions
 
+from employee.views import metrics_api
+
 schema_view = swagger_get_schema_view(
     openapi.Info(
         title="Edi API",
@@ -32,6 +34,8 @@ schema_view = swagger_get_schema_view(
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("employee.urls")),
+    # where Prometheus scrapes by default
+    path("metrics", metrics_api, name="metrics"),
     path(
         "info/", schema_view.with_ui("swagger", cache_timeout=0), name="swagger-schema"
     ),
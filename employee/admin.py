@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Employee, Team, PartialTeamEmployeeRelation
+from .models import Employee, Team, PartialTeamEmployeeRelation, WorkingMonth
 
 # Register your models here.
 admin.site.register(Employee)
 admin.site.register(Team)
 admin.site.register(PartialTeamEmployeeRelation)
+admin.site.register(WorkingMonth)
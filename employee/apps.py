@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class EmployeeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "employee"
+
+    def ready(self):
+        from .db import apply_sqlite_pragmas
+
+        connection_created.connect(
+            apply_sqlite_pragmas, dispatch_uid="employee.apply_sqlite_pragmas"
+        )
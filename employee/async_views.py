@@ -0,0 +1,222 @@
+"""
+Native async versions of the read endpoints, for ASGI. They read with the async ORM and the async cache
+methods, so a request waiting on a slow client doesn't hold a thread. They return the same data, ETags and
+errors as the DRF views in views.py, which the writes still go through. The financials are looked up by the
+same function as there, through sync_to_async, so their rules are only written once.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import exceptions, serializers
+from rest_framework.request import Request
+
+from .cache import acached_financials, aversions_etag, table_scope
+from .models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation as TERelation,
+)
+from .pagination import KeysetPagination
+from .routers import read_from_replicas, replica_etag
+from .serializers import (
+    EmployeeValuesSerializer,
+    TeamValuesSerializer,
+    PartialTeamEmployeeValuesSerializer,
+)
+from .views import (
+    _filter_employees,
+    _filter_relations,
+    _financials,
+    _financials_scopes,
+)
+
+
+def _read_only(view):
+    """
+    Only allows GET and HEAD, hands the view a DRF Request for its query_params, and turns the DRF exceptions
+    into the same responses the DRF views give.
+    """
+
+    @functools.wraps(view)
+    async def inner(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return JsonResponse(
+                {"detail": f'Method "{request.method}" not allowed.'}, status=405
+            )
+        try:
+            return await view(Request(request), *args, **kwargs)
+        except exceptions.APIException as error:
+            # as rest_framework.views.exception_handler puts it
+            detail = error.detail
+            if not isinstance(detail, (list, dict)):
+                detail = {"detail": detail}
+            return JsonResponse(detail, status=error.status_code, safe=False)
+
+    return inner
+
+
+def _condition(etag_func):
+    """
+    django.views.decorators.http.condition with only the etag, for async views.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request)
+            if etag is None:
+                return await view(request, *args, **kwargs)
+            etag = quote_etag(etag)
+            if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+            if etag in if_none_match or "*" in if_none_match:
+                response = HttpResponseNotModified()
+            else:
+                response = await view(request, *args, **kwargs)
+            response.headers.setdefault("ETag", etag)
+            return response
+
+        return inner
+
+    return decorator
+
+
+def _list_etag(table, unversioned=()):
+    async def etag_func(request):
+        if any(param in request.query_params for param in unversioned):
+            return None
+        return replica_etag(
+            request,
+            await aversions_etag(
+                [table_scope(table)], sorted(request.query_params.lists())
+            ),
+        )
+
+    return etag_func
+
+
+def _page_response(paginator, data):
+    return JsonResponse({"next": paginator.get_next_link(), "results": data})
+
+
+# region lists
+
+
+@_read_only
+@read_from_replicas
+@_condition(_list_etag("employee", unversioned=["team"]))
+async def employee_api(request):
+    fields = EmployeeValuesSerializer.get_fields(request)
+    query_id = request.query_params.get("employee_id", None)
+    if query_id is not None:
+        employee = await EmployeeValuesSerializer.read(
+            Employee.objects.filter(employee_id=query_id), fields=fields
+        ).afirst()
+        if employee is None:
+            raise exceptions.NotFound()
+        serializer = EmployeeValuesSerializer(instance=[employee], fields=fields)
+        return JsonResponse(serializer.data[0])
+
+    paginator = KeysetPagination(ordering=["employee_id"])
+    page = await paginator.apaginate_queryset(
+        EmployeeValuesSerializer.read(
+            _filter_employees(Employee.objects.all(), request.query_params),
+            paginator.ordering,
+            fields,
+        ),
+        request,
+    )
+    return _page_response(
+        paginator, EmployeeValuesSerializer(instance=page, fields=fields).data
+    )
+
+
+@_read_only
+@read_from_replicas
+@_condition(_list_etag("team"))
+async def team_api(request):
+    fields = TeamValuesSerializer.get_fields(request)
+    query_name = request.query_params.get("name", None)
+    if query_name is not None:
+        team = await TeamValuesSerializer.read(
+            Team.objects.filter(name=query_name), fields=fields
+        ).afirst()
+        if team is None:
+            raise exceptions.NotFound()
+        return JsonResponse(
+            TeamValuesSerializer(instance=[team], fields=fields).data[0]
+        )
+
+    paginator = KeysetPagination(ordering=["name"])
+    page = await paginator.apaginate_queryset(
+        TeamValuesSerializer.read(Team.objects.all(), paginator.ordering, fields),
+        request,
+    )
+    return _page_response(
+        paginator, TeamValuesSerializer(instance=page, fields=fields).data
+    )
+
+
+@_read_only
+@read_from_replicas
+async def team_employee_api(request):
+    fields = PartialTeamEmployeeValuesSerializer.get_fields(request)
+    query_id = request.query_params.get("employee_id", None)
+    paginator = KeysetPagination(ordering=["employee_id", "team_id"])
+    qs = PartialTeamEmployeeValuesSerializer.read(
+        _filter_relations(TERelation.objects.all(), request.query_params),
+        paginator.ordering,
+        fields,
+    )
+
+    if query_id is not None:
+        page = await paginator.apaginate_queryset(
+            qs.filter(employee__employee_id=query_id), request
+        )
+        if not page and paginator.decode_cursor(request) is None:
+            if not await Employee.objects.filter(employee_id=query_id).aexists():
+                raise serializers.ValidationError("No employee with such id.")
+            raise serializers.ValidationError(
+                "This employee is not assigned to any team."
+            )
+    else:
+        page = await paginator.apaginate_queryset(qs, request)
+
+    return _page_response(
+        paginator,
+        PartialTeamEmployeeValuesSerializer(instance=page, fields=fields).data,
+    )
+
+
+# endregion
+
+
+# region financials
+
+
+async def _financials_etag(request):
+    query_employee = request.query_params.get("employee_id", None)
+    query_team = request.query_params.get("team", None)
+    return await aversions_etag(
+        _financials_scopes(query_employee, query_team), [query_employee, query_team]
+    )
+
+
+@_read_only
+@read_from_replicas
+@_condition(_financials_etag)
+async def financials_api(request):
+    query_employee = request.query_params.get("employee_id", None)
+    query_team = request.query_params.get("team", None)
+
+    data, hit = await acached_financials(
+        [query_employee, query_team],
+        _financials_scopes(query_employee, query_team),
+        # the same lookups and errors as the DRF view, which only makes a few small queries
+        lambda: sync_to_async(_financials)(query_employee, query_team),
+    )
+    return JsonResponse(data, headers={"X-Cache": "HIT" if hit else "MISS"})
+
+
+# endregion
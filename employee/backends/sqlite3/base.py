@@ -0,0 +1,34 @@
+"""
+Django's sqlite backend, with OPTIONS["transaction_mode"] choosing how the transactions are begun.
+
+Django begins them as BEGIN, i.e. deferred, so a transaction that reads before it writes takes the write lock
+only at its first write. Under WAL a writer that committed in between makes that fail at once with "database
+is locked", without waiting out the busy_timeout. BEGIN IMMEDIATE takes the write lock upfront, so concurrent
+writers queue for it instead. The transactions that only read are begun deferred anyway, see
+employee.db.read_transaction.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+transaction_modes = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # set for the next transaction to be begun deferred, whatever the transaction_mode
+    begin_deferred = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # it isn't an argument of sqlite3.connect
+        mode = kwargs.pop("transaction_mode", None)
+        if mode is not None and mode.upper() not in transaction_modes:
+            raise ImproperlyConfigured(
+                f"transaction_mode has to be one of {', '.join(transaction_modes)}."
+            )
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if self.begin_deferred:
+            mode = None
+        self.cursor().execute(f"BEGIN {mode.upper()}" if mode else "BEGIN")
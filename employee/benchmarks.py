@@ -0,0 +1,425 @@
+"""
+Benchmark scenarios, at least one for every route in employee/urls.py, each with the most queries its request
+is allowed to make. The budgets don't depend on the size of the organisation, so a query per row (N+1) shows up
+as a scenario over its budget. Used by the benchmark command and the query budget tests.
+"""
+import time
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from . import urls
+from .models import Employee, PartialTeamEmployeeRelation, PayrollRun
+from .pagination import KeysetPagination
+from .simulation import get_organisation
+
+
+class Scenario:
+    def __init__(
+        self,
+        name,
+        route,
+        method,
+        budget,
+        kwargs=None,
+        data=None,
+        setup=None,
+        expected_status=200,
+    ):
+        self.name = name
+        # the url name, from employee/urls.py
+        self.route = route
+        self.method = method
+        self.budget = budget
+        self.kwargs = kwargs or {}
+        # the query params of a GET, the json body o.w.
+        self.data = data
+        # called before every request, in the transaction that is rolled back after it, and not measured
+        self.setup = setup
+        self.expected_status = expected_status
+
+    def request(self, client):
+        path = reverse(self.route, kwargs=self.kwargs)
+        if self.method == "get":
+            return client.get(path, self.data)
+        return getattr(client, self.method)(
+            path, self.data, content_type="application/json"
+        )
+
+
+class QueryCounter:
+    """
+    execute_wrapper counting the queries, cheaper than capturing them, so it barely adds to the latency.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def sample_keys():
+    """
+    An employee assigned to a team, with that team, to build the requests from. None if there is none.
+    """
+    relation = (
+        PartialTeamEmployeeRelation.objects.select_related("employee", "team")
+        .order_by("employee__employee_id", "team__name")
+        .first()
+    )
+    if relation is None:
+        return None
+    return {"employee": relation.employee.employee_id, "team": relation.team.name}
+
+
+def _new_employees(count):
+    def setup():
+        Employee.objects.bulk_create(
+            Employee(name=f"Bench {i}", hourly_rate=20.0, employee_id=f"BENCH{i:05d}")
+            for i in range(count)
+        )
+
+    return setup
+
+
+def _payroll_run(year, month):
+    def setup():
+        PayrollRun.run(year, month)
+
+    return setup
+
+
+def simulation_operations(team):
+    return {
+        "operations": [
+            {"op": "adjust_rates", "percent": 5, "where": {"employee_type": "LEADER"}},
+            {"op": "cap_hours", "hours": 30, "where": {"part_time": True}},
+            {"op": "remove", "where": {"team": [team]}},
+        ]
+    }
+
+
+def scenarios(sample):
+    employee = sample["employee"]
+    team = sample["team"]
+    bulk_size = 50
+    return [
+        Scenario("employee list", "employee-api", "get", 1),
+        Scenario(
+            "employee list page 2",
+            "employee-api",
+            "get",
+            1,
+            data={"page_size": 10, "cursor": _cursor([employee])},
+        ),
+        Scenario(
+            "employee get", "employee-api", "get", 1, data={"employee_id": employee}
+        ),
+        Scenario(
+            "employee create",
+            "employee-api",
+            "post",
+            9,
+            data={"name": "Bench", "hourly_rate": 20.0, "employee_id": "BENCH"},
+            expected_status=201,
+        ),
+        Scenario(
+            "employee bulk upsert",
+            "employee-bulk-api",
+            "post",
+            10,
+            data=[
+                {"name": "Bench", "hourly_rate": 21.0, "employee_id": f"BENCH{i:05d}"}
+                for i in range(bulk_size)
+            ],
+            setup=_new_employees(bulk_size // 2),
+        ),
+        Scenario(
+            "employee bulk patch",
+            "employee-bulk-api",
+            "patch",
+            10,
+            data=[
+                {"hourly_rate": 21.0, "employee_id": f"BENCH{i:05d}"}
+                for i in range(bulk_size)
+            ],
+            setup=_new_employees(bulk_size),
+        ),
+        Scenario(
+            "employee rates",
+            "employee-rates-api",
+            "post",
+            11,
+            data={"percent": 2.5, "team": team},
+        ),
+        Scenario(
+            "employee update",
+            "employee-api-pk",
+            "put",
+            10,
+            kwargs={"pk": employee},
+            data={"name": "Bench", "hourly_rate": 21.0},
+            expected_status=204,
+        ),
+        Scenario(
+            "employee rename",
+            "employee-api-pk",
+            "patch",
+            3,
+            kwargs={"pk": employee},
+            data={"name": "Bench"},
+            expected_status=204,
+        ),
+        Scenario(
+            "employee delete",
+            "employee-api-pk",
+            "delete",
+            14,
+            kwargs={"pk": employee},
+            expected_status=204,
+        ),
+        Scenario("team list", "team-api", "get", 1),
+        Scenario("team get", "team-api", "get", 1, data={"name": team}),
+        Scenario(
+            "team create",
+            "team-api",
+            "post",
+            8,
+            data={"name": "Bench"},
+            expected_status=201,
+        ),
+        Scenario(
+            "team update",
+            "team-api-pk",
+            "put",
+            2,
+            kwargs={"pk": team},
+            data={"name": "Bench"},
+            expected_status=204,
+        ),
+        Scenario(
+            "team delete",
+            "team-api-pk",
+            "delete",
+            14,
+            kwargs={"pk": team},
+            expected_status=204,
+        ),
+        Scenario("relation list", "team-employee-api", "get", 1),
+        Scenario(
+            "relation list of employee",
+            "team-employee-api",
+            "get",
+            1,
+            data={"employee_id": employee},
+        ),
+        Scenario(
+            "relation create",
+            "team-employee-api",
+            "post",
+            15,
+            data={"employee": "BENCH00000", "team": team, "work_arr": 20},
+            setup=_new_employees(1),
+            expected_status=201,
+        ),
+        Scenario(
+            "relation update",
+            "team-employee-api",
+            "put",
+            14,
+            data={"employee_pk": employee, "team_pk": team, "work_arr": 1},
+            expected_status=204,
+        ),
+        Scenario(
+            "relation delete",
+            "team-employee-api",
+            "delete",
+            14,
+            data={"employee_pk": employee, "team_pk": team},
+            expected_status=204,
+        ),
+        Scenario(
+            "relation bulk create",
+            "team-employee-bulk-api",
+            "post",
+            14,
+            data=[
+                {"employee": f"BENCH{i:05d}", "team": team, "work_arr": 20}
+                for i in range(bulk_size)
+            ],
+            setup=_new_employees(bulk_size),
+        ),
+        # the financials are computed every time, but for the first one that is read from the cache
+        Scenario("financials company cached", "financials-api", "get", 1),
+        Scenario("financials company", "financials-api", "get", 1, setup=cache.clear),
+        Scenario(
+            "financials team",
+            "financials-api",
+            "get",
+            1,
+            data={"team": team},
+            setup=cache.clear,
+        ),
+        Scenario(
+            "financials employee",
+            "financials-api",
+            "get",
+            1,
+            data={"employee_id": employee},
+            setup=cache.clear,
+        ),
+        Scenario(
+            "financials employee in team",
+            "financials-api",
+            "get",
+            1,
+            data={"employee_id": employee, "team": team},
+            setup=cache.clear,
+        ),
+        Scenario("payroll", "payroll-api", "get", 2, kwargs={"year": 2024, "month": 5}),
+        Scenario(
+            "payroll run",
+            "payroll-runs-api",
+            "post",
+            8,
+            kwargs={"year": 2024, "month": 5},
+            expected_status=201,
+        ),
+        Scenario(
+            "payroll runs",
+            "payroll-runs-api",
+            "get",
+            1,
+            kwargs={"year": 2024, "month": 5},
+            setup=_payroll_run(2024, 5),
+        ),
+        Scenario(
+            "payroll run read",
+            "payroll-run-api",
+            "get",
+            3,
+            kwargs={"year": 2024, "month": 5, "number": 1},
+            setup=_payroll_run(2024, 5),
+        ),
+        # the organisation is loaded into the arrays again after the cache is cleared, and kept o.w. it's three
+        # reads in a transaction, for them to see the same snapshot
+        Scenario(
+            "simulation",
+            "simulation-api",
+            "post",
+            5,
+            data=simulation_operations(team),
+            setup=cache.clear,
+        ),
+        Scenario(
+            "simulation cached",
+            "simulation-api",
+            "post",
+            0,
+            data=simulation_operations(team),
+            setup=get_organisation,
+        ),
+        Scenario("async employee list", "employee-async-api", "get", 1),
+        Scenario("async team list", "team-async-api", "get", 1),
+        Scenario(
+            "async relation list of employee",
+            "team-employee-async-api",
+            "get",
+            1,
+            data={"employee_id": employee},
+        ),
+        Scenario(
+            "async financials team",
+            "financials-async-api",
+            "get",
+            1,
+            data={"team": team},
+            setup=cache.clear,
+        ),
+    ]
+
+
+def _cursor(position):
+    return KeysetPagination(ordering=["employee_id"]).encode_cursor(position)
+
+
+def missing_routes(scenarios):
+    covered = {scenario.route for scenario in scenarios}
+    return [pattern.name for pattern in urls.urlpatterns if pattern.name not in covered]
+
+
+def percentile(values, percent):
+    # nearest rank
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run(scenario, iterations, warmup=0):
+    """
+    Requests the scenario warmup + iterations times, every one of them in a transaction that is rolled back,
+    so the writes don't change the organisation. Returns the latencies of the last iterations in ms, with the
+    most queries and the statuses of any request.
+    """
+    client = Client(raise_request_exception=False)
+    timings = []
+    queries = 0
+    statuses = set()
+    for i in range(warmup + iterations):
+        with transaction.atomic():
+            if scenario.setup is not None:
+                scenario.setup()
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                # the replicas' too, see routers.py
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                start = time.perf_counter()
+                response = scenario.request(client)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        statuses.add(response.status_code)
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries = max(queries, counter.count)
+
+    return {
+        "name": scenario.name,
+        "route": scenario.route,
+        "method": scenario.method.upper(),
+        "statuses": sorted(statuses),
+        "queries": queries,
+        "budget": scenario.budget,
+        "p50_ms": percentile(timings, 50),
+        "p90_ms": percentile(timings, 90),
+        "p99_ms": percentile(timings, 99),
+        "mean_ms": sum(timings) / len(timings),
+        "max_ms": max(timings),
+    }
+
+
+def failures(result, scenario):
+    errors = []
+    if result["queries"] > scenario.budget:
+        errors.append(
+            f"{result['queries']} queries over the budget of {scenario.budget}"
+        )
+    if result["statuses"] != [scenario.expected_status]:
+        errors.append(
+            f"status {result['statuses']} instead of {scenario.expected_status}"
+        )
+    return errors
+
+
+def run_all(selected, iterations, warmup=0):
+    # the test client's host, which isn't in ALLOWED_HOSTS outside of the tests
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        return [run(scenario, iterations, warmup) for scenario in selected]
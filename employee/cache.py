@@ -0,0 +1,172 @@
+"""
+Versioned caching of the financials. Every cached result is keyed by the versions of what it was computed
+from, i.e. the company, a team (by name) or an employee (by employee_id), so a write only has to bump the
+versions it affects to invalidate exactly the results that depend on them, and nothing else.
+The same versions, plus one per table, are used for the ETags of the read endpoints.
+The cache has to be shared between the worker processes and the management commands (e.g. memcached or redis)
+for the versions to be, so without settings.SHARED_CACHE nothing is cached and there are no ETags.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metrics
+from .routers import pin_primary
+
+key_prefix = "edi"
+
+
+def _key(*parts):
+    # hashing, since team names and employee_ids can contain characters not allowed in cache keys
+    digest = hashlib.md5(json.dumps(parts).encode()).hexdigest()
+    return f"{key_prefix}:{parts[0]}:{digest}"
+
+
+def company_scope():
+    return ("company",)
+
+
+def team_scope(name):
+    return ("team", name)
+
+
+def employee_scope(employee_id):
+    return ("employee", employee_id)
+
+
+def rates_scope():
+    # the pay rates of everyone, bumped by the adjustments of many employees at once instead of their own scopes
+    return ("rates",)
+
+
+def table_scope(table):
+    # a whole table, changing with every write to it
+    return ("table", table)
+
+
+def get_versions(scopes):
+    keys = [_key("version", *scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # starting from the clock, so a version evicted from the cache doesn't start over at a value
+            # a stale result could still be stored under
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes):
+    # get_versions for the async views
+    keys = [_key("version", *scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = _key("version", *scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_versions(scopes):
+    """
+    Bumps the versions once the current transaction is committed, so a result computed from the data before
+    the write can't end up stored under the new versions.
+    """
+    scopes = list(scopes)
+    if scopes:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_financials(employees=(), teams=(), company=False):
+    """
+    Invalidates the cached financials of the given employees (employee_id) and teams (name), and of the whole
+    company if company is set.
+    """
+    scopes = [employee_scope(employee_id) for employee_id in set(employees)]
+    scopes += [team_scope(name) for name in set(teams)]
+    if company:
+        scopes.append(company_scope())
+    bump_versions(scopes)
+
+
+def invalidate_rates():
+    """
+    Invalidates all the cached financials, after the pay rates of many employees changed at once.
+    """
+    bump_versions([rates_scope()])
+
+
+def invalidate_tables(*tables):
+    bump_versions(table_scope(table) for table in tables)
+
+
+def versions_etag(scopes, params):
+    """
+    Strong ETag of a response computed from the given scopes with the given params. It only reads the versions
+    from the cache, so a request can be answered with 304 without touching the database. None when the cache
+    isn't shared, the versions in it wouldn't change with the writes of the other processes.
+    """
+    if not settings.SHARED_CACHE:
+        return None
+    return hashlib.md5(json.dumps([params, get_versions(scopes)]).encode()).hexdigest()
+
+
+async def aversions_etag(scopes, params):
+    if not settings.SHARED_CACHE:
+        return None
+    return hashlib.md5(
+        json.dumps([params, await aget_versions(scopes)]).encode()
+    ).hexdigest()
+
+
+def cached_financials(params, scopes, compute):
+    """
+    Returns (result, hit) for the financials with the given query params, computed from the given scopes.
+    compute is only called on a miss. Errors it raises aren't cached. Nothing is when the cache isn't shared.
+    """
+    if not settings.SHARED_CACHE:
+        return compute(), False
+    key = _key("financials", params, get_versions(scopes))
+    result = cache.get(key)
+    if result is not None:
+        metrics.registry.record_cache("financials", hit=True)
+        return result, True
+
+    metrics.registry.record_cache("financials", hit=False)
+    # cached for every request until the next write, so it's read from the primary, never from a lagging replica
+    pin_primary()
+    result = compute()
+    cache.set(key, result, timeout=settings.FINANCIALS_CACHE_TIMEOUT)
+    return result, False
+
+
+async def acached_financials(params, scopes, compute):
+    """
+    cached_financials for the async views, compute is a coroutine function.
+    """
+    if not settings.SHARED_CACHE:
+        return await compute(), False
+    key = _key("financials", params, await aget_versions(scopes))
+    result = await cache.aget(key)
+    if result is not None:
+        metrics.registry.record_cache("financials", hit=True)
+        return result, True
+
+    metrics.registry.record_cache("financials", hit=False)
+    pin_primary()
+    result = await compute()
+    await cache.aset(key, result, timeout=settings.FINANCIALS_CACHE_TIMEOUT)
+    return result, False
@@ -0,0 +1,254 @@
+"""
+A compact columnar dump of the organisation, i.e. of the employees, teams and relations, for seeding other
+databases much faster than dumpdata and loaddata. The relations refer to their employee and team by the
+natural keys, employee_id and name, so the dump loads into a database with other primary keys.
+
+The file is the magic bytes followed by blocks of up to block_size rows of one table, every block a header
+(table tag, row count, payload length) and its zlib compressed payload, and an end block. The payload has the
+columns one after the other, each as its length and bytes: the floats and the integers as little-endian
+arrays, the strings as the array of their lengths in characters and their utf-8 encoded concatenation. Both
+directions read and write a block at a time, so the memory doesn't grow with the organisation.
+"""
+import itertools
+import struct
+import sys
+import zlib
+from array import array
+
+from django.db import connections, router
+
+from .db import read_transaction
+from .models import Employee, Team, PartialTeamEmployeeRelation
+
+magic = b"EDIORG\x00\x01"
+# table tag, rows, payload bytes
+block_header = struct.Struct("<cII")
+end_tag = b"."
+block_size = 50_000
+compression_level = 6
+
+
+class Table:
+    """
+    A table of the dump, with its columns as (lookup, type) pairs, the type being str, float or int.
+    """
+
+    def __init__(self, tag, model, columns):
+        self.tag = tag
+        self.model = model
+        self.columns = columns
+
+    def rows(self):
+        # in the order of the primary keys, which doesn't need a sort
+        return (
+            self.model.objects.order_by("pk")
+            .values_list(*(lookup for lookup, _ in self.columns))
+            .iterator(chunk_size=block_size)
+        )
+
+
+tables = [
+    Table(
+        b"E",
+        Employee,
+        [("employee_id", str), ("name", str), ("hourly_rate", float)],
+    ),
+    Table(b"T", Team, [("name", str)]),
+    Table(
+        b"R",
+        PartialTeamEmployeeRelation,
+        [
+            ("employee__employee_id", str),
+            ("team__name", str),
+            ("employee_type", str),
+            ("work_arr", int),
+        ],
+    ),
+]
+tables_by_tag = {table.tag: table for table in tables}
+
+
+class FormatError(ValueError):
+    pass
+
+
+def _array(typecode, values):
+    values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_array(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_column(kind, values):
+    if kind is str:
+        return [_array("I", map(len, values)), "".join(values).encode()]
+    if kind is float:
+        return [_array("d", values)]
+    return [_array("q", values)]
+
+
+def _decode_column(kind, parts):
+    if kind is str:
+        lengths = _from_array("I", next(parts))
+        text = next(parts).decode()
+        starts = itertools.accumulate(lengths, initial=0)
+        ends = itertools.accumulate(lengths)
+        return [text[start:end] for start, end in zip(starts, ends)]
+    if kind is float:
+        return _from_array("d", next(parts)).tolist()
+    return _from_array("q", next(parts)).tolist()
+
+
+def encode_block(table, rows):
+    parts = []
+    for (_, kind), values in zip(table.columns, zip(*rows)):
+        parts += _encode_column(kind, values)
+    payload = zlib.compress(
+        b"".join(struct.pack("<I", len(part)) + part for part in parts),
+        compression_level,
+    )
+    return block_header.pack(table.tag, len(rows), len(payload)) + payload
+
+
+def decode_block(table, count, payload):
+    """
+    The columns of the block, as lists.
+    """
+
+    def parts():
+        offset = 0
+        while offset < len(payload):
+            (length,) = struct.unpack_from("<I", payload, offset)
+            start = offset + 4
+            offset = start + length
+            yield payload[start:offset]
+
+    corrupted = FormatError(f"A block of {table.model.__name__} is corrupted.")
+    try:
+        payload = zlib.decompress(payload)
+        parts = parts()
+        columns = [_decode_column(kind, parts) for _, kind in table.columns]
+    # a bad payload, a missing column or a broken utf-8 string
+    except (zlib.error, StopIteration, ValueError):
+        raise corrupted
+    if any(len(column) != count for column in columns):
+        raise corrupted
+    return columns
+
+
+def dump(file):
+    """
+    Writes the organisation to the binary file, returning the rows written per model.
+    """
+    counts = {}
+    file.write(magic)
+    # in one snapshot, o.w. a relation could refer to an employee or team created after they were read
+    with read_transaction(router.db_for_read(Employee)):
+        for table in tables:
+            rows = table.rows()
+            counts[table.model] = 0
+            while True:
+                block = list(itertools.islice(rows, block_size))
+                if not block:
+                    break
+                file.write(encode_block(table, block))
+                counts[table.model] += len(block)
+    file.write(block_header.pack(end_tag, 0, 0))
+    return counts
+
+
+def read(file):
+    """
+    Yields the blocks of the binary file as (table, columns).
+    """
+    if file.read(len(magic)) != magic:
+        raise FormatError("Not an organisation dump.")
+    while True:
+        header = file.read(block_header.size)
+        if len(header) != block_header.size:
+            raise FormatError("The dump is truncated.")
+        tag, count, length = block_header.unpack(header)
+        if tag == end_tag:
+            return
+        table = tables_by_tag.get(tag)
+        if table is None:
+            raise FormatError(f"Unknown table {tag!r}.")
+        payload = file.read(length)
+        if len(payload) != length:
+            raise FormatError("The dump is truncated.")
+        yield table, decode_block(table, count, payload)
+
+
+def load(file):
+    """
+    Inserts the organisation in the binary file, returning the rows inserted per model. The rows are inserted
+    with executemany, a block at a time, the relations into a temporary table first, from which they're copied
+    with their natural keys resolved by a join, so the keys are never held in memory. The join only finds the
+    employees and teams inserted before, so the blocks have to come in the order of tables, as dump writes
+    them. It has to run in a transaction, which the temporary table is rolled back with too, and the payroll
+    summaries have to be rebuilt after it.
+    """
+    connection = connections[router.db_for_write(Employee)]
+    quote = connection.ops.quote_name
+    counts = {table.model: 0 for table in tables}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {quote(staging_table)} (employee varchar(10), team varchar(20), "
+            "employee_type varchar(20), work_arr integer)"
+        )
+        loaded = 0
+        for table, columns in read(file):
+            if tables.index(table) < loaded:
+                raise FormatError(
+                    f"A block of {table.model.__name__} comes after the ones of {tables[loaded].model.__name__}."
+                )
+            loaded = tables.index(table)
+            rows = zip(*columns)
+            if table.model is PartialTeamEmployeeRelation:
+                cursor.executemany(
+                    f"INSERT INTO {quote(staging_table)} VALUES (%s, %s, %s, %s)", rows
+                )
+                cursor.execute(_copy_relations_sql(quote))
+                cursor.execute(f"DELETE FROM {quote(staging_table)}")
+            else:
+                meta = table.model._meta
+                fields = [meta.get_field(lookup).column for lookup, _ in table.columns]
+                cursor.executemany(
+                    f"INSERT INTO {quote(meta.db_table)} ({', '.join(map(quote, fields))}) "
+                    f"VALUES ({', '.join(['%s'] * len(fields))})",
+                    rows,
+                )
+            counts[table.model] += len(columns[0])
+        cursor.execute(f"DROP TABLE {quote(staging_table)}")
+    return counts
+
+
+staging_table = "dataset_relation"
+
+
+def _copy_relations_sql(quote):
+    relation = PartialTeamEmployeeRelation._meta
+    employee = Employee._meta
+    team = Team._meta
+    columns = [
+        relation.get_field(field).column
+        for field in ("employee", "team", "employee_type", "work_arr")
+    ]
+    # left joins, so an unknown employee or team is a NULL failing the insert, instead of a relation left out
+    return (
+        f"INSERT INTO {quote(relation.db_table)} ({', '.join(map(quote, columns))}) "
+        f"SELECT e.{quote(employee.pk.column)}, t.{quote(team.pk.column)}, s.employee_type, s.work_arr "
+        f"FROM {quote(staging_table)} s "
+        f"LEFT JOIN {quote(employee.db_table)} e "
+        f"ON e.{quote(employee.get_field('employee_id').column)} = s.employee "
+        f"LEFT JOIN {quote(team.db_table)} t ON t.{quote(team.get_field('name').column)} = s.team"
+    )
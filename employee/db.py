@@ -0,0 +1,47 @@
+"""
+Applies settings.SQLITE_PRAGMAS to every new sqlite connection, through the connection_created signal.
+"""
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+
+# the pragmas are interpolated, as they can't be parameters, so only names and numbers get through
+pragma_value = re.compile(r"-?\d+|[A-Za-z_]+")
+
+
+def pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        if not re.fullmatch(r"[a-z_]+", name) or not pragma_value.fullmatch(str(value)):
+            raise ImproperlyConfigured(f"Invalid sqlite pragma {name} = {value!r}.")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # on the dbapi connection, so they aren't counted as the request's queries by an execute_wrapper
+    for statement in pragma_statements(getattr(settings, "SQLITE_PRAGMAS", {})):
+        connection.connection.execute(statement)
+
+
+@contextmanager
+def read_transaction(using):
+    """
+    transaction.atomic for reads that have to see a single snapshot of the database, e.g. tables read with
+    separate queries. On sqlite it's begun deferred whatever the transaction_mode, so it doesn't hold the write
+    lock while it reads, see employee.backends.sqlite3.
+    """
+    connection = connections[using]
+    connection.begin_deferred = True
+    try:
+        with transaction.atomic(using=using):
+            # only this BEGIN
+            connection.begin_deferred = False
+            yield
+    finally:
+        connection.begin_deferred = False
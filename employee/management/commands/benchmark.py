@@ -0,0 +1,109 @@
+import json
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.benchmarks import (
+    failures,
+    missing_routes,
+    run_all,
+    sample_keys,
+    scenarios,
+)
+from employee.models import Employee, Team, PartialTeamEmployeeRelation
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every route against the organisation in the database (see generate_org), reporting the "
+        "latency percentiles and the queries of every request, and fails when one goes over its query budget. "
+        "The writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Requests made before the measured ones, not counted.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            default=[],
+            help="Only run the scenarios with this in their name, can be repeated.",
+        )
+        parser.add_argument("--output", help="Writes the results as json to this file.")
+        parser.add_argument(
+            "--compare", help="Compares the results with the ones in this json file."
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] <= 0 or options["warmup"] < 0:
+            raise CommandError(
+                "--iterations has to be positive and --warmup not negative."
+            )
+        sample = sample_keys()
+        if sample is None:
+            raise CommandError(
+                "There is no employee assigned to a team, run generate_org first."
+            )
+
+        all_scenarios = scenarios(sample)
+        missing = missing_routes(all_scenarios)
+        if missing:
+            raise CommandError(f"No benchmark scenario for {', '.join(missing)}.")
+        selected = [
+            scenario
+            for scenario in all_scenarios
+            if not options["scenario"]
+            or any(name in scenario.name for name in options["scenario"])
+        ]
+
+        results = run_all(selected, options["iterations"], options["warmup"])
+        report = {
+            "django": django.get_version(),
+            "organisation": {
+                "employees": Employee.objects.count(),
+                "teams": Team.objects.count(),
+                "relations": PartialTeamEmployeeRelation.objects.count(),
+            },
+            "iterations": options["iterations"],
+            "results": results,
+        }
+
+        previous = {}
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                previous = {
+                    result["name"]: result for result in json.load(file)["results"]
+                }
+
+        failed = 0
+        self.stdout.write(
+            f"{'scenario':32} {'p50':>8} {'p90':>8} {'p99':>8} {'queries':>8}"
+        )
+        for scenario, result in zip(selected, results):
+            line = (
+                f"{result['name']:32} {result['p50_ms']:8.2f} {result['p90_ms']:8.2f} "
+                f"{result['p99_ms']:8.2f} {result['queries']:8}"
+            )
+            if result["name"] in previous:
+                before = previous[result["name"]]
+                line += (
+                    f"   p50 {result['p50_ms'] / before['p50_ms']:.2f}x, "
+                    f"{result['queries'] - before['queries']:+} queries"
+                )
+            errors = failures(result, scenario)
+            if errors:
+                failed += 1
+                line = self.style.ERROR(f"{line}   {'; '.join(errors)}")
+            self.stdout.write(line)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+
+        if failed:
+            raise CommandError(f"{failed} scenarios failed.")
@@ -0,0 +1,229 @@
+import asyncio
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from employee.benchmarks import percentile
+from employee.models import Employee
+
+# the read endpoints, by their sync and async url names
+routes = [
+    ("employee-api", "employee-async-api"),
+    ("team-api", "team-async-api"),
+    ("team-employee-api", "team-employee-async-api"),
+    ("financials-api", "financials-async-api"),
+]
+modes = ("wsgi", "asgi-sync", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the throughput of the read endpoints served by WSGI with a thread pool, by ASGI with the sync "
+        "views and by ASGI with the async views, under many concurrent slow clients. The servers are driven in "
+        "process, without sockets, so it's the handlers and views that are measured. With --write-ratio some "
+        "of the requests update the pay rate of an employee instead, which aren't rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=1000,
+            help="Concurrent clients, each making its requests one after the other.",
+        )
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=32,
+            help="Worker threads of the WSGI server.",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.02,
+            help="Seconds a slow client takes to read a response.",
+        )
+        parser.add_argument("--mode", action="append", choices=modes)
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.0,
+            help="Share of the requests that are writes, between 0 and 1.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Writes the results as json to this file.")
+
+    def handle(self, *args, **options):
+        if options["connections"] <= 0 or options["requests"] <= 0:
+            raise CommandError("--connections and --requests have to be positive.")
+        if not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--write-ratio has to be between 0 and 1.")
+        if not Employee.objects.exists():
+            raise CommandError("There are no employees, run generate_org first.")
+
+        writes = self.plan_writes(options)
+        results = []
+        # the test client's host, which isn't in ALLOWED_HOSTS outside of the tests
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for mode in options["mode"] or modes:
+                result = asyncio.run(self.run(mode, options, writes))
+                results.append(result)
+                self.stdout.write(
+                    f"{mode:10} {result['requests_per_second']:8.1f} req/s   "
+                    f"p50 {result['p50_ms']:8.1f} ms   p99 {result['p99_ms']:8.1f} ms   "
+                    f"writes {result['writes']}   errors {result['errors']}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(
+                    {
+                        "connections": options["connections"],
+                        "requests": options["requests"],
+                        "threads": options["threads"],
+                        "delay": options["delay"],
+                        "write_ratio": options["write_ratio"],
+                        "results": results,
+                    },
+                    file,
+                    indent=2,
+                )
+
+    def plan_writes(self, options):
+        """
+        Which of the requests are writes, with their path and body, or None for a read. Decided up front, so
+        every mode makes the same requests.
+        """
+        rng = random.Random(options["seed"])
+        employee_ids = list(
+            Employee.objects.order_by("employee_id").values_list(
+                "employee_id", flat=True
+            )
+        )
+        return [
+            (
+                reverse("employee-api-pk", args=[rng.choice(employee_ids)]),
+                json.dumps({"hourly_rate": round(rng.uniform(10, 100), 2)}).encode(),
+            )
+            if rng.random() < options["write_ratio"]
+            else None
+            for _ in range(options["requests"])
+        ]
+
+    async def run(self, mode, options, writes):
+        paths = [reverse(route[mode == "asgi"]) for route in routes]
+        delay = options["delay"]
+        if mode == "wsgi":
+            handler = WSGIHandler()
+            pool = ThreadPoolExecutor(max_workers=options["threads"])
+            loop = asyncio.get_running_loop()
+
+            async def request(path, body=None):
+                return await loop.run_in_executor(
+                    pool, wsgi_request, handler, path, delay, body
+                )
+
+        else:
+            handler = ASGIHandler()
+
+            async def request(path, body=None):
+                return await asgi_request(handler, path, delay, body)
+
+        timings = []
+        errors = 0
+        remaining = iter(range(options["requests"]))
+
+        async def client():
+            nonlocal errors
+            for i in remaining:
+                start = time.perf_counter()
+                if writes[i]:
+                    status = await request(*writes[i])
+                else:
+                    status = await request(paths[i % len(paths)])
+                timings.append((time.perf_counter() - start) * 1000)
+                errors += status >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options["connections"])))
+        elapsed = time.perf_counter() - start
+        if mode == "wsgi":
+            pool.shutdown()
+
+        return {
+            "mode": mode,
+            "requests_per_second": len(timings) / elapsed,
+            "p50_ms": percentile(timings, 50),
+            "p90_ms": percentile(timings, 90),
+            "p99_ms": percentile(timings, 99),
+            "writes": sum(write is not None for write in writes),
+            "errors": errors,
+        }
+
+
+def wsgi_request(handler, path, delay, body=None):
+    environ = {"PATH_INFO": path, "HTTP_HOST": "testserver"}
+    if body is not None:
+        environ.update(
+            REQUEST_METHOD="PUT",
+            CONTENT_TYPE="application/json",
+            CONTENT_LENGTH=str(len(body)),
+        )
+        environ["wsgi.input"] = io.BytesIO(body)
+    setup_testing_defaults(environ)
+    status = []
+    response = handler(environ, lambda line, headers: status.append(line))
+    try:
+        for _ in response:
+            # the worker thread is held for as long as the client takes to read
+            time.sleep(delay)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(handler, path, delay, body=None):
+    headers = [(b"host", b"testserver")]
+    if body is not None:
+        headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET" if body is None else "PUT",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": body or b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            # only this request waits for the client
+            await asyncio.sleep(delay)
+
+    await handler(scope, receive, send)
+    return status[0]
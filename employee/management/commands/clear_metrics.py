@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from employee import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the metrics files of the worker processes in METRICS_DIR, so the totals start over. "
+        "It's run when the server starts, before its workers."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.METRICS_DIR:
+            self.stdout.write("METRICS_DIR isn't set, there are no files to delete.")
+            return
+        removed = metrics.clear_files()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {removed} metrics files from {settings.METRICS_DIR}."
+            )
+        )
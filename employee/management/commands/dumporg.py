@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from employee import dataset
+from employee.routers import use_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Dumps the employees, teams and relations to a compact columnar binary file, streamed a block at a "
+        "time, for loadorg to load. See employee/dataset.py for the format."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The file to write the dump to.")
+
+    def handle(self, *args, **options):
+        # only reads, so a replica will do
+        with use_replicas(), open(options["path"], "wb") as file:
+            counts = dataset.dump(file)
+
+        employees, teams, relations = counts.values()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dumped {employees} employees, {teams} teams and {relations} relations "
+                f"to {options['path']}."
+            )
+        )
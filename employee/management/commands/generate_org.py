@@ -0,0 +1,136 @@
+import itertools
+import random
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from employee.models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation,
+    refresh_payroll_summaries,
+    total_work_arr,
+)
+
+# rows per insert
+batch_size = 1000
+# the smallest work arrangement handed out, so an employee can be in at most total_work_arr / min_hours teams
+min_hours = 4
+work_arrs = (4, 8, 10, 12, 16, 20, 24, 30, 32, 40)
+first_names = (
+    "Ana Marko Jovana Nikola Milica Stefan Jelena Luka Ivana Petar Sara Filip Teodora Aleksa Mina Vuk"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic organisation of employees, teams and relations for benchmarking. "
+        "The same seed and scale always generate the same organisation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=100_000)
+        parser.add_argument("--teams", type=int, default=5_000)
+        parser.add_argument("--relations", type=int, default=250_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the existing employees and teams first.",
+        )
+
+    def handle(self, *args, **options):
+        employees = options["employees"]
+        teams = options["teams"]
+        relations = options["relations"]
+        if employees <= 0 or teams <= 0 or relations < 0:
+            raise CommandError("The scale has to be positive.")
+        # every employee's relations are spread evenly, each in a different team and within the hours cap
+        per_employee = -(-relations // employees)
+        if per_employee > min(teams, total_work_arr // min_hours):
+            raise CommandError(
+                f"{relations} relations don't fit {employees} employees in {teams} teams."
+            )
+        if Employee.objects.exists() or Team.objects.exists():
+            if not options["clear"]:
+                raise CommandError(
+                    "The database already has employees or teams, use --clear to replace them."
+                )
+
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            if options["clear"]:
+                # relations and summaries are deleted in cascade
+                Employee.objects.all().delete()
+                Team.objects.all().delete()
+
+            self.insert(Employee, self.employees(rng, employees))
+            self.insert(Team, self.teams(teams))
+            employee_pks = list(
+                Employee.objects.order_by("employee_id").values_list("pk", flat=True)
+            )
+            team_pks = list(Team.objects.order_by("name").values_list("pk", flat=True))
+            self.insert(
+                PartialTeamEmployeeRelation,
+                self.relations(rng, employee_pks, team_pks, relations),
+            )
+            # bulk_create skips save(), so the summaries are built once for everything
+            refresh_payroll_summaries(
+                employees=Employee.objects.all(), teams=Team.objects.all()
+            )
+        # the whole organisation was replaced, nothing cached about it holds anymore
+        cache.clear()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {employees} employees, {teams} teams and {relations} relations."
+            )
+        )
+
+    @staticmethod
+    def insert(model, objs):
+        objs = iter(objs)
+        while True:
+            batch = list(itertools.islice(objs, batch_size))
+            if not batch:
+                return
+            model.objects.bulk_create(batch)
+
+    @staticmethod
+    def employees(rng, count):
+        for i in range(count):
+            yield Employee(
+                name=f"{rng.choice(first_names)} {i}",
+                # skewed like real pay, most rates are low and a few are high
+                hourly_rate=round(min(15 + rng.lognormvariate(2.5, 0.6), 250), 2),
+                employee_id=f"E{i:07d}",
+            )
+
+    @staticmethod
+    def teams(count):
+        for i in range(count):
+            yield Team(name=f"Team {i:05d}")
+
+    @staticmethod
+    def relations(rng, employee_pks, team_pks, count):
+        leaders = set()
+        for i, employee in enumerate(employee_pks):
+            # spreading the remainder over the first employees
+            assigned = count // len(employee_pks) + (i < count % len(employee_pks))
+            hours = total_work_arr
+            for j, team in enumerate(rng.sample(team_pks, assigned)):
+                # leaving at least min_hours for each of the employee's remaining teams
+                left = hours - min_hours * (assigned - j - 1)
+                work_arr = rng.choice([h for h in work_arrs if h <= left])
+                hours -= work_arr
+                # a team's leader is one of its first members, a few teams have none
+                leader = team not in leaders and rng.random() < 0.8
+                if leader:
+                    leaders.add(team)
+                yield PartialTeamEmployeeRelation(
+                    employee_id=employee,
+                    team_id=team,
+                    employee_type="LEADER" if leader else "EMPLOYEE",
+                    work_arr=work_arr,
+                )
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from employee import dataset
+from employee.models import (
+    Employee,
+    Team,
+    EmployeePayrollSummary,
+    TeamPayrollSummary,
+    CompanyPayrollSummary,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the employees, teams and relations dumped by dumporg, streamed a block at a time with bulk "
+        "inserts, and rebuilds the payroll summaries. All in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The dump to load.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the existing employees and teams first.",
+        )
+
+    def handle(self, *args, **options):
+        if Employee.objects.exists() or Team.objects.exists():
+            if not options["clear"]:
+                raise CommandError(
+                    "The database already has employees or teams, use --clear to replace them."
+                )
+
+        try:
+            with open(options["path"], "rb") as file, transaction.atomic():
+                if options["clear"]:
+                    # relations and summaries are deleted in cascade
+                    Employee.objects.all().delete()
+                    Team.objects.all().delete()
+
+                # the employees and teams before the relations referring to them, see dataset.load
+                counts = dataset.load(file)
+                # the rows were inserted without save(), so the summaries are built once for everything
+                EmployeePayrollSummary.rebuild()
+                TeamPayrollSummary.rebuild()
+                CompanyPayrollSummary.refresh()
+        except dataset.FormatError as error:
+            raise CommandError(f"{options['path']}: {error}")
+        except IntegrityError as error:
+            raise CommandError(
+                f"{options['path']} doesn't fit the database, nothing was loaded: {error}"
+            )
+        # the whole organisation was replaced, nothing cached about it holds anymore
+        cache.clear()
+
+        employees, teams, relations = counts.values()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {employees} employees, {teams} teams and {relations} relations."
+            )
+        )
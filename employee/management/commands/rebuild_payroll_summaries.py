@@ -0,0 +1,107 @@
+import math
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from employee.cache import invalidate_rates
+from employee.models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation,
+    EmployeePayrollSummary,
+    TeamPayrollSummary,
+    CompanyPayrollSummary,
+    relation_pay,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the employee, team and company payroll summaries from scratch, "
+        "reporting every summary that had drifted from the relations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, without rebuilding the summaries.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        self.verbosity = options["verbosity"]
+
+        with transaction.atomic():
+            drifted = self.rebuild(
+                EmployeePayrollSummary, Employee.objects.all(), dry_run
+            )
+            drifted += self.rebuild(TeamPayrollSummary, Team.objects.all(), dry_run)
+
+            # the company totals are summed up from the team summaries, which a dry run leaves as they are, so
+            # the fresh ones are summed up from the relations instead
+            company = CompanyPayrollSummary.objects.filter(id=1).first()
+            stored = None
+            if company is not None:
+                stored = [getattr(company, field) for field in company.summary_fields]
+            fresh = PartialTeamEmployeeRelation.objects.aggregate(
+                total_hours=Coalesce(Sum("work_arr"), 0),
+                leader_hours=Coalesce(
+                    Sum("work_arr", filter=Q(employee_type="LEADER")), 0
+                ),
+                weekly_cost=Coalesce(Sum(relation_pay()), 0.0),
+            )
+            fresh = [fresh[field] for field in CompanyPayrollSummary.summary_fields]
+            if self.drifted(stored, fresh):
+                drifted += 1
+                self.report(CompanyPayrollSummary, 1, stored, fresh)
+            if not dry_run:
+                CompanyPayrollSummary.refresh()
+                # the financials cached from the drifted summaries, every one of them depends on the rates
+                if drifted:
+                    invalidate_rates()
+
+        if dry_run:
+            self.stdout.write(f"{drifted} payroll summaries have drifted.")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rebuilt the payroll summaries, {drifted} of them had drifted."
+                )
+            )
+
+    def rebuild(self, model, queryset, dry_run):
+        stored = {
+            pk: values
+            for pk, *values in model.objects.values_list(
+                "pk", *model.summary_fields
+            ).iterator()
+        }
+
+        drifted = 0
+        for pk, *fresh in model.compute(queryset).iterator():
+            values = stored.pop(pk, None)
+            if self.drifted(values, fresh):
+                drifted += 1
+                self.report(model, pk, values, fresh)
+
+        if not dry_run:
+            model.refresh(queryset)
+        return drifted
+
+    @staticmethod
+    def drifted(stored, fresh):
+        if stored is None:
+            return True
+        # the costs are floats summed up in a different order, so they're compared with a tolerance
+        return any(
+            not math.isclose(old, new, rel_tol=1e-9, abs_tol=1e-6)
+            for old, new in zip(stored, fresh)
+        )
+
+    def report(self, model, pk, stored, fresh):
+        if self.verbosity > 0:
+            stored = "missing" if stored is None else stored
+            self.stdout.write(f"{model.__name__} {pk}: {stored} instead of {fresh}")
@@ -0,0 +1,236 @@
+"""
+Request and cache metrics in the Prometheus text format. Every process counts its own requests and cache reads
+in memory, under a lock held only for the update, and every few seconds writes its totals to its own file in
+settings.METRICS_DIR. Reading the metrics sums up the files of all the processes, so they add up across the
+worker processes of a server. Without METRICS_DIR only the process serving the read is counted.
+
+The file of a process is kept after it exits, so the totals don't go down when a worker is replaced. They
+only start over when the server does: its start has to run the clear_metrics command, before the workers, to
+delete the files of the processes of its previous run, o.w. METRICS_DIR keeps growing and counting them.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# upper bounds of the histogram buckets
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+query_buckets = (0, 1, 2, 5, 10, 20, 50, 100)
+
+descriptions = {
+    "edi_requests_total": ("counter", "Requests served, by route, method and status."),
+    "edi_request_errors_total": (
+        "counter",
+        "Requests answered with an error status, by route and status class.",
+    ),
+    "edi_request_duration_seconds": (
+        "histogram",
+        "Time to serve a request, by route.",
+    ),
+    "edi_request_queries": (
+        "histogram",
+        "Database queries made by a request, by route.",
+    ),
+    "edi_cache_hits_total": ("counter", "Results read from the cache."),
+    "edi_cache_misses_total": ("counter", "Results not in the cache."),
+    "edi_cache_hit_ratio": ("gauge", "Share of the cache reads that were hits."),
+}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # not only the pid, since it can be reused by a later process, which would overwrite the earlier's totals
+        self.process = f"{self.pid}-{time.time_ns()}"
+        self.counters = {}
+        # (name, labels) to [count per bucket..., count above the last bucket, sum]
+        self.histograms = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, route, method, status, duration, queries):
+        with self.lock:
+            self._check_process()
+            self._inc("edi_requests_total", (route, method, str(status)))
+            if status >= 400:
+                self._inc("edi_request_errors_total", (route, f"{status // 100}xx"))
+            self._observe(
+                "edi_request_duration_seconds", (route,), duration, latency_buckets
+            )
+            self._observe("edi_request_queries", (route,), queries, query_buckets)
+            flush = self._flush_due()
+        if flush:
+            self.flush()
+
+    def record_cache(self, cache, hit):
+        with self.lock:
+            self._check_process()
+            self._inc(
+                "edi_cache_hits_total" if hit else "edi_cache_misses_total", (cache,)
+            )
+            flush = self._flush_due()
+        if flush:
+            self.flush()
+
+    def _check_process(self):
+        if os.getpid() != self.pid:
+            # a worker forked from a process that had already counted
+            self.reset()
+
+    def _flush_due(self):
+        due = time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL
+        if due:
+            self.last_flush = time.monotonic()
+        return due
+
+    def _inc(self, name, labels):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + 1
+
+    def _observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+        index = next(
+            (i for i, bound in enumerate(buckets) if value <= bound), len(buckets)
+        )
+        histogram[index] += 1
+        histogram[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [[*key, value] for key, value in self.counters.items()],
+                "histograms": [
+                    [*key, list(values)] for key, values in self.histograms.items()
+                ],
+            }
+
+    def path(self):
+        return Path(settings.METRICS_DIR) / f"{self.process}.json"
+
+    def flush(self):
+        if not settings.METRICS_DIR:
+            return
+        path = self.path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # replaced at once, so a read never sees half a file
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self):
+        """
+        The totals of all the processes, this one's from memory and the others' from their files.
+        """
+        snapshots = [self.snapshot()]
+        if settings.METRICS_DIR:
+            own = self.path()
+            for path in Path(settings.METRICS_DIR).glob("*.json"):
+                if path != own:
+                    try:
+                        snapshots.append(json.loads(path.read_text()))
+                    except (OSError, ValueError):
+                        # removed or replaced while it was read
+                        continue
+
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(labels))
+                total = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+        return counters, histograms
+
+
+def clear_files():
+    """
+    Deletes the files of all the processes in METRICS_DIR, returning how many there were.
+    """
+    if not settings.METRICS_DIR:
+        return 0
+    directory = Path(settings.METRICS_DIR)
+    paths = [*directory.glob("*.json"), *directory.glob("*.tmp")]
+    for path in paths:
+        path.unlink(missing_ok=True)
+    return len(paths)
+
+
+registry = Registry()
+# the requests since the last flush would be lost o.w.
+atexit.register(registry.flush)
+
+label_names = {
+    "edi_requests_total": ("route", "method", "status"),
+    "edi_request_errors_total": ("route", "status"),
+    "edi_request_duration_seconds": ("route",),
+    "edi_request_queries": ("route",),
+    "edi_cache_hits_total": ("cache",),
+    "edi_cache_misses_total": ("cache",),
+}
+# the caches counted, reported even before their first read
+caches = ("financials",)
+bucket_bounds = {
+    "edi_request_duration_seconds": latency_buckets,
+    "edi_request_queries": query_buckets,
+}
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_metrics():
+    counters, histograms = registry.collect()
+    samples = {name: [] for name in descriptions}
+    for cache in caches:
+        for name in ("edi_cache_hits_total", "edi_cache_misses_total"):
+            counters.setdefault((name, (cache,)), 0)
+
+    for (name, labels), value in sorted(counters.items()):
+        samples[name].append(f"{name}{_labels(label_names[name], labels)} {value}")
+
+    for (name, labels), values in sorted(histograms.items()):
+        names = label_names[name]
+        cumulative = 0
+        for bound, count in zip(bucket_bounds[name], values):
+            cumulative += count
+            labels_le = _labels(names, labels, [("le", bound)])
+            samples[name].append(f"{name}_bucket{labels_le} {cumulative}")
+        count = cumulative + values[-2]
+        labels_inf = _labels(names, labels, [("le", "+Inf")])
+        samples[name].append(f"{name}_bucket{labels_inf} {count}")
+        samples[name].append(f"{name}_sum{_labels(names, labels)} {values[-1]}")
+        samples[name].append(f"{name}_count{_labels(names, labels)} {count}")
+
+    for (name, labels), hits in sorted(counters.items()):
+        if name == "edi_cache_hits_total":
+            reads = hits + counters.get(("edi_cache_misses_total", labels), 0)
+            samples["edi_cache_hit_ratio"].append(
+                f"edi_cache_hit_ratio{_labels(('cache',), labels)} {hits / reads if reads else 0.0}"
+            )
+
+    lines = []
+    for name, (kind, description) in descriptions.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """
+    The timings of one request. It's also the execute_wrapper summing up the queries made during it.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.view_start = None
+        self.view_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - start
+
+
+class TimedMiddleware:
+    """
+    Base of the middleware timing whole requests, with the queries made during them. It's sync and async
+    capable, so under ASGI an async view isn't pushed to a thread because of it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # as django.utils.deprecation.MiddlewareMixin, for the handler to await it
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timing = self.start(request)
+        with self.count_queries(timing):
+            response = self.get_response(request)
+        return self.finish(request, timing, response)
+
+    async def __acall__(self, request):
+        timing = self.start(request)
+        # the ORM runs in the thread of sync_to_async, for sync views and the async ORM alike, and the
+        # connections are per thread, so the wrapper is installed on that thread's rather than the event loop's
+        queries = await sync_to_async(self.count_queries)(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.close)()
+        return self.finish(request, timing, response)
+
+    @staticmethod
+    def count_queries(timing):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timing))
+        return stack
+
+    def start(self, request):
+        return RequestTiming()
+
+    def finish(self, request, timing, response):
+        raise NotImplementedError
+
+
+class ServerTimingMiddleware(TimedMiddleware):
+    """
+    Adds a Server-Timing header with the queries, the time spent in the database, in the view, rendering the
+    response (i.e. serializing a DRF Response to json) and in total, and the size of the response. Only used
+    when settings.SERVER_TIMING is set, and the timings are also logged when settings.SERVER_TIMING_LOG is.
+    The queries of a streamed response are made after it's returned, so they aren't counted.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SERVER_TIMING", False):
+            # removed from the chain, so it costs nothing when it's turned off
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.log = getattr(settings, "SERVER_TIMING_LOG", False)
+
+    def start(self, request):
+        request.server_timing = RequestTiming()
+        return request.server_timing
+
+    def finish(self, request, timing, response):
+        end = time.perf_counter()
+
+        # without a view (e.g. no url matched) it's all counted as the view's
+        view_start = timing.view_start or timing.start
+        view_end = timing.view_end or end
+        size = None if response.streaming else len(response.content)
+        timings = [
+            f'db;dur={timing.db * 1000:.2f};desc="{timing.queries} queries"',
+            f"view;dur={(view_end - view_start) * 1000:.2f}",
+            f"render;dur={(end - view_end) * 1000:.2f}",
+            f"total;dur={(end - timing.start) * 1000:.2f}",
+        ]
+        if size is not None:
+            timings.append(f'size;desc="{size} bytes"')
+        response["Server-Timing"] = ", ".join(timings)
+
+        if self.log:
+            logger.info(
+                "%s %s %s queries=%d db=%.2fms view=%.2fms render=%.2fms total=%.2fms size=%s",
+                request.method,
+                request.get_full_path(),
+                response.status_code,
+                timing.queries,
+                timing.db * 1000,
+                (view_end - view_start) * 1000,
+                (end - view_end) * 1000,
+                (end - timing.start) * 1000,
+                "streamed" if size is None else size,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.server_timing.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # called once the view returned, before the response is rendered
+        request.server_timing.view_end = time.perf_counter()
+        return response
+
+
+class MetricsMiddleware(TimedMiddleware):
+    """
+    Counts the requests, their latency and queries by route for the metrics endpoint, see employee.metrics.
+    Only used when settings.METRICS is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS", False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def finish(self, request, timing, response):
+        match = request.resolver_match
+        # the url name, so the label values are bounded, unlike the paths
+        route = (match.url_name or match.view_name) if match else "unmatched"
+        metrics.registry.record(
+            route,
+            request.method,
+            response.status_code,
+            time.perf_counter() - timing.start,
+            timing.queries,
+        )
+        return response
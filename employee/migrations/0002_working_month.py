@@ -0,0 +1,54 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:50
+
+import calendar
+
+from django.db import migrations, models
+
+
+def populate_calendar(apps, schema_editor):
+    WorkingMonth = apps.get_model("employee", "WorkingMonth")
+    WorkingMonth.objects.bulk_create(
+        WorkingMonth(
+            year=year,
+            month=month,
+            working_days=sum(
+                1
+                for week in calendar.monthcalendar(year, month)
+                for day in week[:5]
+                if day != 0
+            ),
+        )
+        for year in range(2000, 2100)
+        for month in range(1, 13)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkingMonth",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("month", models.PositiveSmallIntegerField()),
+                ("working_days", models.PositiveSmallIntegerField()),
+            ],
+            options={
+                "unique_together": {("year", "month")},
+            },
+        ),
+        migrations.RunPython(populate_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:54
+
+from django.db import IntegrityError, migrations, models
+from django.db.models import Count
+
+
+def check_leaders(apps, schema_editor):
+    # the leaders aren't demoted here, as that would change their pay, they have to be sorted out by hand first
+    PartialTeamEmployeeRelation = apps.get_model(
+        "employee", "PartialTeamEmployeeRelation"
+    )
+    teams = (
+        PartialTeamEmployeeRelation.objects.filter(employee_type="LEADER")
+        .values("team__name")
+        .annotate(leaders=Count("id"))
+        .filter(leaders__gt=1)
+        .order_by("team__name")
+    )
+    if teams:
+        raise IntegrityError(
+            "These teams have more than one leader, only one of each can stay LEADER: "
+            + ", ".join(f"{team['team__name']} ({team['leaders']})" for team in teams)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0002_working_month"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_leaders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="partialteamemployeerelation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("employee_type", "LEADER")),
+                fields=("team",),
+                name="one_leader_per_team",
+            ),
+        ),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 4.1.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def relation_pay(relation, hourly_rate):
+    # the pay of a relation as it was when the summaries were added, not whatever employee.models has by now
+    pay = F(f"{relation}work_arr") * F(hourly_rate)
+    return Case(
+        When(**{f"{relation}employee_type": "LEADER"}, then=pay * Value(1.1)),
+        default=pay,
+        output_field=FloatField(),
+    )
+
+
+def populate_summaries(apps, schema_editor):
+    Employee = apps.get_model("employee", "Employee")
+    Team = apps.get_model("employee", "Team")
+    EmployeePayrollSummary = apps.get_model("employee", "EmployeePayrollSummary")
+    TeamPayrollSummary = apps.get_model("employee", "TeamPayrollSummary")
+    CompanyPayrollSummary = apps.get_model("employee", "CompanyPayrollSummary")
+    relation = "partialteamemployeerelation__"
+
+    def totals(queryset, hourly_rate):
+        return queryset.order_by().annotate(
+            total_hours=Coalesce(Sum(f"{relation}work_arr"), 0),
+            leader_hours=Coalesce(
+                Sum(
+                    f"{relation}work_arr",
+                    filter=Q(**{f"{relation}employee_type": "LEADER"}),
+                ),
+                0,
+            ),
+            count=Count(f"{relation}id"),
+            weekly_cost=Coalesce(Sum(relation_pay(relation, hourly_rate)), 0.0),
+        )
+
+    EmployeePayrollSummary.objects.bulk_create(
+        (
+            EmployeePayrollSummary(
+                employee_id=employee.pk,
+                total_hours=employee.total_hours,
+                leader_hours=employee.leader_hours,
+                team_count=employee.count,
+                weekly_cost=employee.weekly_cost,
+            )
+            for employee in totals(Employee.objects.all(), "hourly_rate").iterator()
+        ),
+        batch_size=500,
+    )
+    TeamPayrollSummary.objects.bulk_create(
+        (
+            TeamPayrollSummary(
+                team_id=team.pk,
+                total_hours=team.total_hours,
+                leader_hours=team.leader_hours,
+                headcount=team.count,
+                weekly_cost=team.weekly_cost,
+            )
+            for team in totals(
+                Team.objects.all(), f"{relation}employee__hourly_rate"
+            ).iterator()
+        ),
+        batch_size=500,
+    )
+    CompanyPayrollSummary.objects.create(
+        id=1,
+        **TeamPayrollSummary.objects.aggregate(
+            total_hours=Coalesce(Sum("total_hours"), 0),
+            leader_hours=Coalesce(Sum("leader_hours"), 0),
+            weekly_cost=Coalesce(Sum("weekly_cost"), 0.0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0003_one_leader_per_team"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompanyPayrollSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_hours", models.PositiveIntegerField(default=0)),
+                ("leader_hours", models.PositiveIntegerField(default=0)),
+                ("weekly_cost", models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="EmployeePayrollSummary",
+            fields=[
+                (
+                    "employee",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="payroll_summary",
+                        serialize=False,
+                        to="employee.employee",
+                    ),
+                ),
+                ("total_hours", models.PositiveIntegerField(default=0)),
+                ("leader_hours", models.PositiveIntegerField(default=0)),
+                ("team_count", models.PositiveIntegerField(default=0)),
+                ("weekly_cost", models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TeamPayrollSummary",
+            fields=[
+                (
+                    "team",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="payroll_summary",
+                        serialize=False,
+                        to="employee.team",
+                    ),
+                ),
+                ("total_hours", models.PositiveIntegerField(default=0)),
+                ("leader_hours", models.PositiveIntegerField(default=0)),
+                ("headcount", models.PositiveIntegerField(default=0)),
+                ("weekly_cost", models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.2 on 2026-10-18 03:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0004_payroll_summaries"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="partialteamemployeerelation",
+            name="employee",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="employee.employee",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="partialteamemployeerelation",
+            name="team",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="employee.team",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="partialteamemployeerelation",
+            index=models.Index(
+                fields=["employee", "work_arr", "employee_type"],
+                name="relation_employee_hours_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="partialteamemployeerelation",
+            index=models.Index(
+                fields=["team", "employee_type", "work_arr", "employee"],
+                name="relation_team_type_idx",
+            ),
+        ),
+    ]
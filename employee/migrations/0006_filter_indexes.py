@@ -0,0 +1,37 @@
+# Generated by Django 4.1.2 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0005_relation_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="partialteamemployeerelation",
+            name="relation_employee_hours_idx",
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["employee_id", "hourly_rate"], name="employee_rate_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="partialteamemployeerelation",
+            index=models.Index(
+                fields=["employee", "team", "work_arr", "employee_type"],
+                name="relation_employee_team_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="partialteamemployeerelation",
+            index=models.Index(
+                fields=["employee_type", "employee", "team", "work_arr"],
+                name="relation_type_employee_idx",
+            ),
+        ),
+    ]
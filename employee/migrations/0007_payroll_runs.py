@@ -0,0 +1,82 @@
+# Generated by Django 4.1.2 on 2026-10-18 03:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0006_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("month", models.PositiveSmallIntegerField()),
+                ("number", models.PositiveIntegerField()),
+                ("working_days", models.PositiveSmallIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("line_count", models.PositiveIntegerField(default=0)),
+                ("total_pay", models.FloatField(default=0)),
+                ("content_hash", models.CharField(blank=True, max_length=64)),
+            ],
+            options={
+                "ordering": ["year", "month", "number"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PayrollRunLine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("employee_id", models.CharField(max_length=10)),
+                ("name", models.CharField(max_length=20)),
+                ("team", models.CharField(max_length=20)),
+                ("employee_type", models.CharField(max_length=20)),
+                ("work_arr", models.PositiveIntegerField()),
+                ("hourly_rate", models.FloatField()),
+                ("weekly_pay", models.FloatField()),
+                ("monthly_pay", models.FloatField()),
+                (
+                    "run",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="lines",
+                        to="employee.payrollrun",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="payrollrun",
+            constraint=models.UniqueConstraint(
+                fields=("year", "month", "number"), name="payroll_run_number"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="payrollrunline",
+            constraint=models.UniqueConstraint(
+                fields=("run", "employee_id", "team"), name="payroll_run_line_key"
+            ),
+        ),
+    ]
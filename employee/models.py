@@ -1,9 +1,50 @@
-from django.db import models
+import calendar
+import hashlib
+import itertools
+import json
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 
+from .cache import invalidate_financials, invalidate_tables
+
 # Create your models here.
 
 total_work_arr = 48.0
+# team leaders get paid an additional 10% for their work
+leader_bonus = 1.1
+
+
+def relation_pay(relation="", hourly_rate="employee__hourly_rate"):
+    """
+    Weekly pay of a PartialTeamEmployeeRelation as a database expression, i.e. work_arr * hourly_rate with the
+    leader bonus applied for leaders. relation is the lookup prefix to the relation and hourly_rate the lookup
+    to the employee's rate, so it can be used from PartialTeamEmployeeRelation as well as from Employee.
+    """
+    pay = F(f"{relation}work_arr") * F(hourly_rate)
+    return Case(
+        When(
+            **{f"{relation}employee_type": "LEADER"},
+            then=pay * Value(leader_bonus),
+        ),
+        default=pay,
+        output_field=FloatField(),
+    )
 
 
 class Employee(models.Model):
@@ -16,11 +57,60 @@ class Employee(models.Model):
     # won't be made primary key, because HR can change it
     employee_id = models.CharField(max_length=10, unique=True)
 
+    def save(self, *args, **kwargs):
+        # the payroll summaries of the employee and their teams are updated in the same transaction, and the
+        # cached financials invalidated once it's committed
+        with transaction.atomic():
+            adding = self._state.adding
+            # the financials cached under the employee_id it had, if it's being changed
+            previous = (
+                None
+                if adding
+                else Employee.objects.filter(pk=self.pk)
+                .values_list("employee_id", flat=True)
+                .first()
+            )
+            super(Employee, self).save(*args, **kwargs)
+            employees = Employee.objects.filter(pk=self.pk)
+            teams = Team.objects.filter(
+                partialteamemployeerelation__employee__in=employees
+            )
+            refresh_payroll_summaries(employees=employees, teams=teams)
+            invalidate_tables("employee")
+            # a new employee isn't in any team yet
+            invalidate_financials(
+                employees=[self.employee_id, previous or self.employee_id],
+                teams=() if adding else teams.values_list("name", flat=True),
+                company=not adding,
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            teams = dict(
+                Team.objects.filter(
+                    partialteamemployeerelation__employee=self.pk
+                ).values_list("pk", "name")
+            )
+            deleted = super(Employee, self).delete(*args, **kwargs)
+            refresh_payroll_summaries(teams=Team.objects.filter(pk__in=teams))
+            invalidate_tables("employee")
+            invalidate_financials(
+                employees=[self.employee_id], teams=teams.values(), company=True
+            )
+            return deleted
+
     def __str__(self):
         return f"{self.name} {self.employee_id}"
 
     class Meta:
         ordering = ["employee_id"]
+        # the list in its employee_id order with the pay rate, so its filter is checked in the index while paging.
+        # not (hourly_rate, employee_id), with which sqlite reads a whole range of rates to sort it
+        indexes = [
+            models.Index(
+                fields=["employee_id", "hourly_rate"], name="employee_rate_idx"
+            ),
+        ]
 
 
 class Team(models.Model):
@@ -31,6 +121,43 @@ class Team(models.Model):
 
     name = models.CharField(max_length=20, unique=True)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            # the financials cached under the name it had, if it's being renamed
+            previous = (
+                None
+                if adding
+                else Team.objects.filter(pk=self.pk)
+                .values_list("name", flat=True)
+                .first()
+            )
+            super(Team, self).save(*args, **kwargs)
+            # a new team starts with an empty payroll summary, renaming doesn't change it
+            if adding:
+                refresh_payroll_summaries(teams=Team.objects.filter(pk=self.pk))
+            invalidate_tables("team")
+            invalidate_financials(teams=[self.name, previous or self.name])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            employees = dict(
+                Employee.objects.filter(partialteamemployeerelation__team=self.pk)
+                .order_by()
+                .values_list("pk", "employee_id")
+            )
+            deleted = super(Team, self).delete(*args, **kwargs)
+            # the team's own summary is deleted with it, but the company totals still have to be refreshed
+            refresh_payroll_summaries(
+                employees=Employee.objects.filter(pk__in=employees),
+                teams=Team.objects.none(),
+            )
+            invalidate_tables("team")
+            invalidate_financials(
+                employees=employees.values(), teams=[self.name], company=True
+            )
+            return deleted
+
     def __str__(self):
         return self.name
 
@@ -42,8 +169,9 @@ class PartialTeamEmployeeRelation(models.Model):
     unique per team)
     """
 
-    employee = models.ForeignKey("Employee", on_delete=models.CASCADE)
-    team = models.ForeignKey("Team", on_delete=models.CASCADE)
+    # no single column indexes, the lookups on either are served by the composite ones below
+    employee = models.ForeignKey("Employee", on_delete=models.CASCADE, db_index=False)
+    team = models.ForeignKey("Team", on_delete=models.CASCADE, db_index=False)
 
     class Type(models.TextChoices):
         EMPLOYEE = "EMPLOYEE"
@@ -56,35 +184,74 @@ class PartialTeamEmployeeRelation(models.Model):
     work_arr = models.PositiveIntegerField("Work Arrangements [hours/week]", default=40)
 
     def save(self, *args, **kwargs):
-        # ensuring the user can't enter two leaders per team
-        if (
-            PartialTeamEmployeeRelation.objects.filter(  # that a leader already exists
-                team=Team.objects.filter(name=self.team.name).first(),
-                employee_type=self.Type.LEADER,
-            ).exists()
-            and self.employee_type == self.Type.LEADER
-        ):  # and that the current input tries to make a second leader
-
-            team_leader = PartialTeamEmployeeRelation.objects.filter(
-                team=Team.objects.filter(name=self.team.name).first(),
-                employee_type=self.Type.LEADER,
-            ).first()
-            raise ValidationError(f"Team already has a leader {team_leader.employee}")
-
-        # ensuring that employees don't work more than total_work_arr in total
-        qs = PartialTeamEmployeeRelation.objects.filter(employee=self.employee)
-        if qs.exists():
-            total_hours = 0  # hours saved so far
-            for relation in qs:
-                total_hours += relation.work_arr
-
-            if total_hours + self.work_arr > total_work_arr:
+        # ensuring that employees don't work more than total_work_arr in total, not counting this relation's
+        # own saved hours when it's being updated
+        total_hours = (
+            PartialTeamEmployeeRelation.objects.filter(employee=self.employee_id)
+            .exclude(pk=self.pk)
+            .aggregate(total=Coalesce(Sum("work_arr"), 0))["total"]
+        )
+        if total_hours + self.work_arr > total_work_arr:
+            raise ValidationError(
+                f"Employee {self.employee} cannot work more than 48 hours/week,"
+                f" exceeding by {total_hours + self.work_arr - total_work_arr}"
+            )
+
+        # ensuring the user can't enter two leaders per team, that's enforced by the database through the
+        # one_leader_per_team constraint, so concurrent saves can't both get past it
+        try:
+            with transaction.atomic():
+                # an update can move the relation to another employee or team, those have to be refreshed too
+                previous = (
+                    PartialTeamEmployeeRelation.objects.filter(pk=self.pk)
+                    .values_list(
+                        "employee", "team", "employee__employee_id", "team__name"
+                    )
+                    .first()
+                    if not self._state.adding
+                    else None
+                )
+                super(PartialTeamEmployeeRelation, self).save(*args, **kwargs)
+                employees = {self.employee_id: self.employee.employee_id}
+                teams = {self.team_id: self.team.name}
+                if previous is not None:
+                    employees[previous[0]] = previous[2]
+                    teams[previous[1]] = previous[3]
+                refresh_payroll_summaries(
+                    employees=Employee.objects.filter(pk__in=employees),
+                    teams=Team.objects.filter(pk__in=teams),
+                )
+                invalidate_financials(
+                    employees=employees.values(), teams=teams.values(), company=True
+                )
+        except IntegrityError:
+            team_leader = (
+                PartialTeamEmployeeRelation.objects.filter(
+                    team=self.team_id, employee_type=self.Type.LEADER
+                )
+                .exclude(pk=self.pk)
+                .select_related("employee")
+                .first()
+            )
+            if self.employee_type == self.Type.LEADER and team_leader is not None:
                 raise ValidationError(
-                    f"Employee {self.employee} cannot work more than 48 hours/week,"
-                    f" exceeding by {total_hours + self.work_arr - total_work_arr}"
+                    f"Team already has a leader {team_leader.employee}"
                 )
+            raise
 
-        return super(PartialTeamEmployeeRelation, self).save(*args, **kwargs)
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deleted = super(PartialTeamEmployeeRelation, self).delete(*args, **kwargs)
+            refresh_payroll_summaries(
+                employees=Employee.objects.filter(pk=self.employee_id),
+                teams=Team.objects.filter(pk=self.team_id),
+            )
+            invalidate_financials(
+                employees=[self.employee.employee_id],
+                teams=[self.team.name],
+                company=True,
+            )
+            return deleted
 
     def __str__(self):
         return f"{self.employee} {self.team} {self.work_arr}"
@@ -92,3 +259,467 @@ class PartialTeamEmployeeRelation(models.Model):
     class Meta:
         # only one employee can be in a team at once, and will also be used to identify the relation
         unique_together = ("employee", "team")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["team"],
+                condition=models.Q(employee_type="LEADER"),
+                name="one_leader_per_team",
+            ),
+        ]
+        # covering the hours cap and the payroll summaries of employees and teams, so they're summed up from the
+        # index alone without reading the rows. the first one is also in the list's (employee, team) order, so the
+        # filters on the hours and the type are checked in it while paging, and the last one serves the list
+        # filtered by type
+        indexes = [
+            models.Index(
+                fields=["employee", "team", "work_arr", "employee_type"],
+                name="relation_employee_team_idx",
+            ),
+            models.Index(
+                fields=["team", "employee_type", "work_arr", "employee"],
+                name="relation_team_type_idx",
+            ),
+            models.Index(
+                fields=["employee_type", "employee", "team", "work_arr"],
+                name="relation_type_employee_idx",
+            ),
+        ]
+
+
+class WorkingMonth(models.Model):
+    """
+    WorkingMonth is the precomputed working-day calendar, one row per month with the number of working days
+    (Monday to Friday) in it, so the payroll doesn't have to work it out on every call
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    working_days = models.PositiveSmallIntegerField()
+
+    @property
+    def working_weeks(self):
+        # work arrangements are in hours/week, spread over a 5 day working week
+        return self.working_days / 5
+
+    @staticmethod
+    def count_working_days(year, month):
+        weeks = calendar.monthcalendar(year, month)
+        # monthcalendar pads the weeks with 0s for the days outside the month
+        return sum(1 for week in weeks for day in week[:5] if day != 0)
+
+    @classmethod
+    def for_month(cls, year, month):
+        # the calendar is populated by the migrations, months outside of it are added the first time they're used
+        working_month, _ = cls.objects.get_or_create(
+            year=year,
+            month=month,
+            defaults={"working_days": cls.count_working_days(year, month)},
+        )
+        return working_month
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} {self.working_days}"
+
+    class Meta:
+        unique_together = ("year", "month")
+
+
+def refresh_payroll_summaries(employees=None, teams=None):
+    """
+    Recomputes the payroll summaries of the employees and teams in the given querysets, and the company totals
+    when teams are given. It has to run in the same transaction as the write that changed them, every write to
+    an Employee's hourly_rate or to a PartialTeamEmployeeRelation has to refresh the employees and teams affected.
+    The cached financials are invalidated by the caller, which knows their employee_ids and names, the models'
+    save() and delete() do both.
+    """
+    if employees is not None:
+        EmployeePayrollSummary.refresh(employees)
+    if teams is not None:
+        TeamPayrollSummary.refresh(teams)
+        CompanyPayrollSummary.refresh()
+
+
+def _upsert(model, key, objs):
+    # saving in batches, so a refresh of the whole table is never held in memory
+    objs = iter(objs)
+    while True:
+        batch = list(itertools.islice(objs, summary_batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=[key],
+            update_fields=list(model.summary_fields),
+        )
+
+
+def insert_select(model, fields, queryset):
+    """
+    Inserts the rows of the queryset into the model's table with a single INSERT ... SELECT, the values of
+    every row into the given fields in order, without the rows ever leaving the database.
+    """
+    connection = connections[router.db_for_write(model)]
+    select, params = queryset.query.get_compiler(connection=connection).as_sql()
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(field).column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) {select}", params
+        )
+
+
+summary_batch_size = 500
+
+
+class EmployeePayrollSummary(models.Model):
+    """
+    EmployeePayrollSummary holds the weekly totals of an employee through all of their teams, so they can be read
+    with a primary key lookup instead of being summed up from the relations on every read
+    """
+
+    employee = models.OneToOneField(
+        "Employee",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="payroll_summary",
+    )
+    total_hours = models.PositiveIntegerField(default=0)
+    leader_hours = models.PositiveIntegerField(default=0)
+    team_count = models.PositiveIntegerField(default=0)
+    weekly_cost = models.FloatField(default=0)
+
+    summary_fields = ("total_hours", "leader_hours", "team_count", "weekly_cost")
+
+    @classmethod
+    def compute(cls, employees):
+        relation = "partialteamemployeerelation__"
+        return (
+            Employee.objects.filter(pk__in=employees.values("pk"))
+            .order_by()
+            .annotate(
+                total_hours=Coalesce(Sum(f"{relation}work_arr"), 0),
+                leader_hours=Coalesce(
+                    Sum(
+                        f"{relation}work_arr",
+                        filter=Q(**{f"{relation}employee_type": "LEADER"}),
+                    ),
+                    0,
+                ),
+                team_count=Count(f"{relation}id"),
+                weekly_cost=Coalesce(Sum(relation_pay(relation, "hourly_rate")), 0.0),
+            )
+            .values_list("pk", *cls.summary_fields)
+        )
+
+    @classmethod
+    def refresh(cls, employees):
+        rows = cls.compute(employees).iterator(chunk_size=summary_batch_size)
+        _upsert(
+            cls,
+            "employee_id",
+            (
+                cls(employee_id=pk, **dict(zip(cls.summary_fields, values)))
+                for pk, *values in rows
+            ),
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Replaces all the summaries with an INSERT ... SELECT, much faster than refresh when everything changed,
+        e.g. after a bulk load.
+        """
+        cls.objects.all().delete()
+        insert_select(
+            cls, ["employee", *cls.summary_fields], cls.compute(Employee.objects.all())
+        )
+
+    @classmethod
+    def reprice(cls, employees):
+        """
+        Recomputes only the weekly_cost of the employees, from their hourly_rate and the hours already in their
+        summaries, with a single UPDATE instead of summing up their relations again. So it's only right when
+        nothing but the rates changed since the summaries were last refreshed.
+        """
+        hourly_rate = Employee.objects.filter(pk=OuterRef("employee_id")).values(
+            "hourly_rate"
+        )
+        # the leader hours are paid with the bonus, see relation_pay
+        cls.objects.filter(employee__in=employees.values("pk")).update(
+            weekly_cost=ExpressionWrapper(
+                Subquery(hourly_rate)
+                * (F("total_hours") + F("leader_hours") * Value(leader_bonus - 1)),
+                output_field=FloatField(),
+            )
+        )
+
+    def __str__(self):
+        return f"{self.employee_id} {self.total_hours} {self.weekly_cost}"
+
+
+class TeamPayrollSummary(models.Model):
+    """
+    TeamPayrollSummary holds the weekly totals of a team, see EmployeePayrollSummary
+    """
+
+    team = models.OneToOneField(
+        "Team",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="payroll_summary",
+    )
+    total_hours = models.PositiveIntegerField(default=0)
+    leader_hours = models.PositiveIntegerField(default=0)
+    headcount = models.PositiveIntegerField(default=0)
+    weekly_cost = models.FloatField(default=0)
+
+    summary_fields = ("total_hours", "leader_hours", "headcount", "weekly_cost")
+
+    @classmethod
+    def compute(cls, teams):
+        relation = "partialteamemployeerelation__"
+        return (
+            Team.objects.filter(pk__in=teams.values("pk"))
+            .annotate(
+                total_hours=Coalesce(Sum(f"{relation}work_arr"), 0),
+                leader_hours=Coalesce(
+                    Sum(
+                        f"{relation}work_arr",
+                        filter=Q(**{f"{relation}employee_type": "LEADER"}),
+                    ),
+                    0,
+                ),
+                headcount=Count(f"{relation}id"),
+                weekly_cost=Coalesce(
+                    Sum(relation_pay(relation, f"{relation}employee__hourly_rate")),
+                    0.0,
+                ),
+            )
+            .values_list("pk", *cls.summary_fields)
+        )
+
+    @classmethod
+    def refresh(cls, teams):
+        rows = cls.compute(teams).iterator(chunk_size=summary_batch_size)
+        _upsert(
+            cls,
+            "team_id",
+            (
+                cls(team_id=pk, **dict(zip(cls.summary_fields, values)))
+                for pk, *values in rows
+            ),
+        )
+
+    @classmethod
+    def rebuild(cls):
+        # see EmployeePayrollSummary.rebuild
+        cls.objects.all().delete()
+        insert_select(
+            cls, ["team", *cls.summary_fields], cls.compute(Team.objects.all())
+        )
+
+    def __str__(self):
+        return f"{self.team_id} {self.headcount} {self.weekly_cost}"
+
+
+class CompanyPayrollSummary(models.Model):
+    """
+    CompanyPayrollSummary is a single row with the weekly totals of the whole company, summed up from the team
+    summaries whenever one of them changes
+    """
+
+    total_hours = models.PositiveIntegerField(default=0)
+    leader_hours = models.PositiveIntegerField(default=0)
+    weekly_cost = models.FloatField(default=0)
+
+    summary_fields = ("total_hours", "leader_hours", "weekly_cost")
+
+    @classmethod
+    def compute(cls):
+        return TeamPayrollSummary.objects.aggregate(
+            total_hours=Coalesce(Sum("total_hours"), 0),
+            leader_hours=Coalesce(Sum("leader_hours"), 0),
+            weekly_cost=Coalesce(Sum("weekly_cost"), 0.0),
+        )
+
+    @classmethod
+    def refresh(cls):
+        _upsert(cls, "id", [cls(id=1, **cls.compute())])
+
+    @classmethod
+    def get(cls):
+        return cls.objects.filter(id=1).first() or cls(id=1)
+
+    def __str__(self):
+        return f"{self.total_hours} {self.weekly_cost}"
+
+
+class PayrollRun(models.Model):
+    """
+    PayrollRun is the payroll of a month frozen at the time it was run, with a PayrollRunLine per employee and
+    team copied from the relations and the employees' rates, so it reads the same after they change. Runs are
+    append-only, running a month again adds a run with the next number, and two runs have the same lines iff
+    they have the same content_hash
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    # 1 for the first run of the month, 2 for the next and so on
+    number = models.PositiveIntegerField()
+    working_days = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    line_count = models.PositiveIntegerField(default=0)
+    total_pay = models.FloatField(default=0)
+    # sha256 of the lines in their (employee_id, team) order
+    content_hash = models.CharField(max_length=64, blank=True)
+
+    @classmethod
+    def run(cls, year, month):
+        """
+        Freezes the payroll of the month as its next run, all in one transaction.
+        """
+        with transaction.atomic():
+            working_month = WorkingMonth.for_month(year, month)
+            last = cls.objects.filter(year=year, month=month).aggregate(
+                number=Max("number")
+            )["number"]
+            run = cls(
+                year=year,
+                month=month,
+                number=(last or 0) + 1,
+                working_days=working_month.working_days,
+            )
+            run.save()
+            PayrollRunLine.snapshot(run, working_month.working_weeks)
+
+            # sealing it, the only update a run ever gets, in the transaction it's created in
+            run.line_count, run.total_pay, run.content_hash = PayrollRunLine.digest(run)
+            cls.objects.filter(pk=run.pk).update(
+                line_count=run.line_count,
+                total_pay=run.total_pay,
+                content_hash=run.content_hash,
+            )
+            return run
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Payroll runs can't be changed.")
+        super(PayrollRun, self).save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Payroll runs can't be deleted.")
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} #{self.number} {self.content_hash[:12]}"
+
+    class Meta:
+        ordering = ["year", "month", "number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month", "number"], name="payroll_run_number"
+            ),
+        ]
+
+
+class PayrollRunLine(models.Model):
+    """
+    PayrollRunLine is the pay of an employee in a team in a PayrollRun. The employee and the team are copied by
+    their natural keys rather than referenced, so renaming or deleting them doesn't change past runs
+    """
+
+    # no index of its own, the lines of a run are read in the order of the unique constraint's
+    run = models.ForeignKey(
+        "PayrollRun", on_delete=models.PROTECT, related_name="lines", db_index=False
+    )
+    employee_id = models.CharField(max_length=10)
+    name = models.CharField(max_length=20)
+    team = models.CharField(max_length=20)
+    employee_type = models.CharField(max_length=20)
+    work_arr = models.PositiveIntegerField()
+    hourly_rate = models.FloatField()
+    weekly_pay = models.FloatField()
+    monthly_pay = models.FloatField()
+
+    line_fields = (
+        "employee_id",
+        "name",
+        "team",
+        "employee_type",
+        "work_arr",
+        "hourly_rate",
+        "weekly_pay",
+        "monthly_pay",
+    )
+
+    @classmethod
+    def snapshot(cls, run, working_weeks):
+        """
+        Copies the lines of the run with a single INSERT ... SELECT from the relations, without them ever
+        leaving the database.
+        """
+        weekly_pay = relation_pay()
+        # annotations only, so the columns are selected in the order they're annotated in
+        rows = (
+            PartialTeamEmployeeRelation.objects.order_by(
+                "employee__employee_id", "team__name"
+            )
+            .annotate(
+                line_run=Value(run.pk),
+                line_employee_id=F("employee__employee_id"),
+                line_name=F("employee__name"),
+                line_team=F("team__name"),
+                line_employee_type=F("employee_type"),
+                line_work_arr=F("work_arr"),
+                line_hourly_rate=F("employee__hourly_rate"),
+                line_weekly_pay=weekly_pay,
+                line_monthly_pay=ExpressionWrapper(
+                    weekly_pay * Value(working_weeks), output_field=FloatField()
+                ),
+            )
+            .values_list(
+                "line_run",
+                *(f"line_{field}" for field in cls.line_fields),
+            )
+        )
+
+        insert_select(cls, ["run", *cls.line_fields], rows)
+
+    @classmethod
+    def digest(cls, run):
+        """
+        The number of lines of the run, their total monthly pay and the content hash.
+        """
+        content = hashlib.sha256()
+        count = 0
+        total = 0.0
+        for line in cls.read(run).iterator(chunk_size=2000):
+            content.update(json.dumps(line).encode() + b"\n")
+            count += 1
+            total += line[-1]
+        return count, total, content.hexdigest()
+
+    @classmethod
+    def read(cls, run):
+        return (
+            cls.objects.filter(run=run)
+            .order_by("employee_id", "team")
+            .values_list(*cls.line_fields)
+        )
+
+    def save(self, *args, **kwargs):
+        # the lines are only ever inserted by PayrollRun.run
+        raise ValidationError("Payroll run lines can't be changed.")
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Payroll run lines can't be deleted.")
+
+    def __str__(self):
+        return f"{self.run_id} {self.employee_id} {self.team} {self.monthly_pay}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "employee_id", "team"], name="payroll_run_line_key"
+            ),
+        ]
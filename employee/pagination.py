@@ -0,0 +1,112 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a unique ordering. The cursor is an opaque token holding the ordering values
+    of the last row of the page, and the next page is read with a WHERE on them instead of an OFFSET, so every
+    page costs the same no matter how deep it is.
+    """
+
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering):
+        # the fields have to be unique together, o.w. rows with the same values would be skipped
+        self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, page_size = self.page_queryset(queryset, request)
+        return self.set_page(list(queryset), page_size)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        paginate_queryset for the async views, reading the page with the async ORM.
+        """
+        queryset, page_size = self.page_queryset(queryset, request)
+        return self.set_page([row async for row in queryset], page_size)
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position))
+            except (TypeError, ValueError):
+                # values of the wrong type for the ordering fields, e.g. a string for a foreign key
+                raise NotFound(self.invalid_cursor_message)
+
+        # reading one row more to know whether there is a next page
+        return queryset[: page_size + 1], page_size
+
+    def set_page(self, page, page_size):
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.next_position = self.get_position(page[-1]) if self.has_next else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, row):
+        return [getattr(row, field) for field in self.ordering]
+
+    def after(self, position):
+        """
+        Row value comparison (a, b) > (x, y) written as (a > x) OR (a = x AND b > y), so the database can
+        use the index on the ordering.
+        """
+        condition = Q()
+        for i in reversed(range(len(self.ordering))):
+            equal = {field: value for field, value in zip(self.ordering[:i], position)}
+            condition |= Q(**equal, **{f"{self.ordering[i]}__gt": position[i]})
+        return condition
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
@@ -0,0 +1,121 @@
+"""
+Read/write splitting. The reads of the views marked with read_from_replicas go to one of the read-only
+replicas in settings.DATABASE_REPLICAS, everything else goes to the primary, i.e. the default database.
+
+Once a request wrote, or called pin_primary, the rest of its reads go to the primary too, so it reads its own
+writes. A replica is picked once per request, so all of its reads see the same state.
+
+The replicas lag behind the primary, so a read from one can be older than the versions in the cache. So
+nothing read from a replica is cached or sent with an ETag: the financials are computed from the primary on a
+cache miss, and the lists read from a replica only get the ETag the client already has, see replica_etag.
+"""
+import asyncio
+import contextvars
+import functools
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.http import parse_etags, quote_etag
+
+primary = "default"
+
+
+class Routing:
+    """
+    The routing of one request.
+    """
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.pinned = False
+
+
+# None outside of the views reading from the replicas
+_routing = contextvars.ContextVar("db_routing", default=None)
+
+
+@contextmanager
+def use_replicas():
+    replicas = getattr(settings, "DATABASE_REPLICAS", [])
+    token = _routing.set(Routing(random.choice(replicas) if replicas else None))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def pin_primary():
+    """
+    Sends the rest of the request's reads to the primary.
+    """
+    routing = _routing.get()
+    if routing is not None:
+        routing.pinned = True
+
+
+def reading_from_replica():
+    """
+    Whether the reads of the current request go to a replica.
+    """
+    routing = _routing.get()
+    return routing is not None and not routing.pinned and routing.replica is not None
+
+
+def replica_etag(request, etag):
+    """
+    The etag to answer the request with, given the one computed from the versions in the cache. When the reads
+    go to a replica, which can be behind those versions, it's only the one the client already has, so it still
+    gets a 304, and never one sent along with the replica's rows.
+    """
+    if etag is None or not reading_from_replica():
+        return etag
+    if quote_etag(etag) in parse_etags(request.headers.get("If-None-Match", "")):
+        return etag
+    return None
+
+
+def read_from_replicas(view):
+    """
+    Lets the reads of the view's GET and HEAD requests go to a replica, for sync and async views alike.
+    """
+    if asyncio.iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def inner(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await view(request, *args, **kwargs)
+            with use_replicas():
+                return await view(request, *args, **kwargs)
+
+    else:
+
+        @functools.wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            with use_replicas():
+                return view(request, *args, **kwargs)
+
+    return inner
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reading_from_replica():
+            return primary
+        return _routing.get().replica
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, "DATABASE_REPLICAS", []):
+            # they're copies of the primary, migrated along with it
+            return False
+        return None
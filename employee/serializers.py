@@ -1,8 +1,14 @@
 from rest_framework import serializers
-from .models import Employee, Team, PartialTeamEmployeeRelation
+from .models import Employee, Team, PartialTeamEmployeeRelation, PayrollRun
 
 
 class PartialTeamEmployeeSerializer(serializers.ModelSerializer):
+    # the relation is read and written with the user defined keys, not the internal ids
+    employee = serializers.SlugRelatedField(
+        slug_field="employee_id", queryset=Employee.objects.all()
+    )
+    team = serializers.SlugRelatedField(slug_field="name", queryset=Team.objects.all())
+
     class Meta:
         model = PartialTeamEmployeeRelation
         fields = [
@@ -37,3 +43,197 @@ class TeamSerializer(serializers.ModelSerializer):
             "name",
             "partial_team_employee",
         ]
+
+
+class EmployeeUpsertSerializer(serializers.ModelSerializer):
+    # employees are upserted on employee_id, so an existing one isn't a validation error. also validates the
+    # updates, where a taken employee_id is caught by the database instead
+    class Meta:
+        model = Employee
+        fields = [
+            "name",
+            "hourly_rate",
+            "employee_id",
+        ]
+        extra_kwargs = {"employee_id": {"validators": []}}
+
+
+class EmployeeRateAdjustmentSerializer(serializers.Serializer):
+    # an adjustment of the hourly_rate of many employees, either by a percentage or by an amount
+    percent = serializers.FloatField(required=False, min_value=-100)
+    amount = serializers.FloatField(required=False)
+    team = serializers.CharField(required=False, max_length=20)
+    leaders = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ("percent" in attrs) == ("amount" in attrs):
+            raise serializers.ValidationError(
+                "Either percent or amount has to be given."
+            )
+        return attrs
+
+
+class PartialTeamEmployeeBulkSerializer(serializers.ModelSerializer):
+    # the natural keys are resolved for the whole batch at once, instead of a lookup per row
+    employee = serializers.CharField(max_length=10)
+    team = serializers.CharField(max_length=20)
+
+    class Meta:
+        model = PartialTeamEmployeeRelation
+        fields = [
+            "employee_type",
+            "work_arr",
+            "employee",
+            "team",
+        ]
+        extra_kwargs = {
+            "employee_type": {"default": PartialTeamEmployeeRelation.Type.EMPLOYEE},
+            "work_arr": {"default": 40, "min_value": 0},
+        }
+        # uniqueness of the (employee, team) pair is checked for the whole batch as well
+        validators = []
+
+
+class PayrollRunSerializer(serializers.ModelSerializer):
+    # the run without its lines, which are streamed by the view
+    class Meta:
+        model = PayrollRun
+        fields = [
+            "year",
+            "month",
+            "number",
+            "working_days",
+            "created_at",
+            "line_count",
+            "total_pay",
+            "content_hash",
+        ]
+
+
+class SimulationWhereSerializer(serializers.Serializer):
+    # the relations an operation applies to, all of them when it's empty
+    team = serializers.ListField(child=serializers.CharField(), required=False)
+    employee_id = serializers.ListField(child=serializers.CharField(), required=False)
+    employee_type = serializers.ChoiceField(
+        choices=PartialTeamEmployeeRelation.Type.choices, required=False
+    )
+    part_time = serializers.BooleanField(required=False)
+
+
+class SimulationOperationSerializer(serializers.Serializer):
+    # the params every operation needs, see simulation.Simulation
+    required_params = {
+        "adjust_rates": (),
+        "cap_hours": ("hours",),
+        "scale_hours": ("percent",),
+        "remove": (),
+        "set_leader_bonus": ("value",),
+    }
+
+    op = serializers.ChoiceField(choices=list(required_params))
+    where = SimulationWhereSerializer(required=False)
+    percent = serializers.FloatField(required=False, min_value=-100)
+    amount = serializers.FloatField(required=False)
+    hours = serializers.FloatField(required=False, min_value=0)
+    value = serializers.FloatField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        op = attrs["op"]
+        if op == "adjust_rates" and ("percent" in attrs) == ("amount" in attrs):
+            raise serializers.ValidationError(
+                "Either percent or amount has to be given."
+            )
+        missing = [param for param in self.required_params[op] if param not in attrs]
+        if missing:
+            raise serializers.ValidationError(
+                {param: ["This field is required."] for param in missing}
+            )
+        extra = set(attrs) - {"op", "where", *self.required_params[op]}
+        if op == "adjust_rates":
+            extra -= {"percent", "amount"}
+        if extra:
+            raise serializers.ValidationError(
+                {param: [f"Not a parameter of {op}."] for param in sorted(extra)}
+            )
+        return attrs
+
+
+class SimulationSerializer(serializers.Serializer):
+    operations = SimulationOperationSerializer(many=True, allow_empty=False)
+
+
+class ValuesListSerializer:
+    """
+    Read-only fast path for a ModelSerializer(many=True) on the list GETs. The rows are read with values_list()
+    and turned into plain dicts, without building model instances nor running the DRF fields of every row.
+    The data has to stay the same as the ModelSerializer's for the same rows, which the tests check.
+
+    The output can be narrowed to some of the fields, e.g. with ?fields=employee_id,hourly_rate, in which case
+    only their columns are read.
+    """
+
+    # the output fields, in order, to the lookups they're read from
+    fields = {}
+    fields_query_param = "fields"
+
+    def __init__(self, instance, fields=None):
+        self.instance = instance
+        self.names = tuple(fields or self.fields)
+
+    @classmethod
+    def get_fields(cls, request):
+        """
+        The output fields asked for in the query params, in the serializer's order, all of them by default.
+        """
+        value = request.query_params.get(cls.fields_query_param)
+        if value is None:
+            return tuple(cls.fields)
+
+        asked = {name.strip() for name in value.split(",")} - {""}
+        unknown = sorted(asked - cls.fields.keys())
+        if unknown:
+            raise serializers.ValidationError(
+                {cls.fields_query_param: [f"Unknown fields: {', '.join(unknown)}."]}
+            )
+        if not asked:
+            raise serializers.ValidationError(
+                {cls.fields_query_param: ["At least one field is needed."]}
+            )
+        return tuple(name for name in cls.fields if name in asked)
+
+    @classmethod
+    def read(cls, queryset, ordering=(), fields=None):
+        """
+        The queryset of the rows, with the ordering fields of the pagination as attributes of them too.
+        """
+        lookups = [cls.fields[name] for name in fields or cls.fields]
+        lookups += [field for field in ordering if field not in lookups]
+        return queryset.values_list(*lookups, named=True)
+
+    @property
+    def data(self):
+        names = self.names
+        # zip stops at the output fields, leaving out the ordering ones
+        return [dict(zip(names, row)) for row in self.instance]
+
+
+class EmployeeValuesSerializer(ValuesListSerializer):
+    # partial_team_employee isn't an attribute of Employee, so EmployeeSerializer leaves it out too
+    fields = {
+        "name": "name",
+        "hourly_rate": "hourly_rate",
+        "employee_id": "employee_id",
+    }
+
+
+class TeamValuesSerializer(ValuesListSerializer):
+    fields = {"name": "name"}
+
+
+class PartialTeamEmployeeValuesSerializer(ValuesListSerializer):
+    fields = {
+        "employee_type": "employee_type",
+        "work_arr": "work_arr",
+        "employee": "employee__employee_id",
+        "team": "team__name",
+    }
@@ -0,0 +1,279 @@
+"""
+What-if payroll simulations, e.g. what raising the leaders by 5% and capping the part-timers at 30 hours would
+cost. The organisation is loaded into NumPy arrays with an entry per relation, once per version of the data,
+and the operations of a simulation are applied to copies of them, each in a few vectorized passes. Nothing is
+ever written to the database.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.db.models import Case, IntegerField, Value, When
+
+from .cache import company_scope, get_versions, rates_scope, table_scope
+from .db import read_transaction
+from .models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation as TERelation,
+    leader_bonus,
+)
+from .routers import pin_primary
+
+# weekly hours of a full time employee, the ones working less are part-timers
+full_time_hours = 40
+
+
+class Organisation:
+    """
+    The employees' rates and the relations as arrays, the relations by the indexes of their employee and team.
+    The teams are in the order of their names.
+    """
+
+    def __init__(self, employee_ids, rates, team_names, employee, team, hours, leader):
+        self.employee_ids = employee_ids
+        self.rates = rates
+        self.team_names = team_names
+        self.employee = employee
+        self.team = team
+        self.hours = hours
+        self.leader = leader
+        self.employee_index = {
+            employee_id: i for i, employee_id in enumerate(employee_ids)
+        }
+        self.team_index = {name: i for i, name in enumerate(team_names)}
+        # the weekly cost of every team as it is, the same for all the simulations
+        self.team_costs_before = self.team_costs(self.pay(rates, hours, leader_bonus))
+
+    @classmethod
+    def load(cls):
+        # in one snapshot, o.w. a relation could refer to an employee or team created after they were read
+        with read_transaction(router.db_for_read(Employee)):
+            employee_pks, employee_ids, rates = _columns(
+                Employee.objects.order_by("pk").values_list(
+                    "pk", "employee_id", "hourly_rate"
+                ),
+                3,
+            )
+            team_pks, team_names = _columns(
+                Team.objects.order_by("name").values_list("pk", "name"), 2
+            )
+            relation_employees, relation_teams, hours, leader = _columns(
+                TERelation.objects.order_by().values_list(
+                    "employee_id",
+                    "team_id",
+                    "work_arr",
+                    Case(
+                        When(employee_type=TERelation.Type.LEADER, then=Value(1)),
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    ),
+                ),
+                4,
+            )
+
+        employee_pks = np.array(employee_pks, dtype=np.int64)
+        # the teams aren't in the order of their pks, so they're looked up through a sorted copy
+        team_pks = np.array(team_pks, dtype=np.int64)
+        team_order = np.argsort(team_pks)
+        return cls(
+            employee_ids=employee_ids,
+            rates=np.array(rates, dtype=np.float64),
+            team_names=team_names,
+            employee=np.searchsorted(
+                employee_pks, np.array(relation_employees, dtype=np.int64)
+            ),
+            team=team_order[
+                np.searchsorted(
+                    team_pks[team_order], np.array(relation_teams, dtype=np.int64)
+                )
+            ],
+            hours=np.array(hours, dtype=np.float64),
+            leader=np.array(leader, dtype=bool),
+        )
+
+    def pay(self, rates, hours, bonus):
+        # the weekly pay of every relation, see models.relation_pay
+        return hours * rates[self.employee] * np.where(self.leader, bonus, 1.0)
+
+    def team_costs(self, pay):
+        return np.bincount(self.team, weights=pay, minlength=len(self.team_names))
+
+
+def _columns(queryset, count):
+    rows = list(queryset)
+    if not rows:
+        return [[] for _ in range(count)]
+    return [list(column) for column in zip(*rows)]
+
+
+class Simulation:
+    """
+    The organisation with the operations applied so far, see operations for what they do. The rates, the hours
+    and the leader bonus are replaced by every operation rather than changed in place, so they start out as the
+    organisation's own, and np.where is a lot faster than an assignment through a mask.
+    """
+
+    def __init__(self, organisation):
+        self.organisation = organisation
+        self.rates = organisation.rates
+        self.hours = organisation.hours
+        self.bonus = leader_bonus
+
+    def select(self, where):
+        """
+        The mask of the relations matching all the conditions in where.
+        """
+        org = self.organisation
+        mask = np.ones(len(org.employee), dtype=bool)
+        if "team" in where:
+            mask &= np.isin(
+                org.team, self._indexes(org.team_index, where["team"], "team")
+            )
+        if "employee_id" in where:
+            mask &= np.isin(
+                org.employee,
+                self._indexes(org.employee_index, where["employee_id"], "employee"),
+            )
+        if "employee_type" in where:
+            mask &= org.leader == (where["employee_type"] == TERelation.Type.LEADER)
+        if "part_time" in where:
+            part_time = self.employee_hours() < full_time_hours
+            mask &= part_time[org.employee] == where["part_time"]
+        return mask
+
+    @staticmethod
+    def _indexes(index, keys, kind):
+        unknown = sorted(set(keys) - index.keys())
+        if unknown:
+            raise ValidationError(f"No {kind} {', '.join(unknown)}.")
+        return [index[key] for key in keys]
+
+    def employee_hours(self, mask=None):
+        hours = self.hours if mask is None else np.where(mask, self.hours, 0.0)
+        return np.bincount(
+            self.organisation.employee,
+            weights=hours,
+            minlength=len(self.organisation.employee_ids),
+        )
+
+    def adjust_rates(self, where, percent=None, amount=None):
+        # the rates are the employees', so they change in all of their teams
+        employees = np.zeros(len(self.rates), dtype=bool)
+        employees[self.organisation.employee[self.select(where)]] = True
+        if percent is not None:
+            self.rates = np.where(
+                employees, self.rates * (1 + percent / 100), self.rates
+            )
+        else:
+            self.rates = np.where(
+                employees, np.maximum(self.rates + amount, 0.0), self.rates
+            )
+
+    def cap_hours(self, where, hours):
+        # the selected relations of an employee over the cap are scaled down together
+        mask = self.select(where)
+        totals = self.employee_hours(mask)
+        scale = np.minimum(1.0, hours / np.maximum(totals, 1e-9))
+        self.hours = np.where(
+            mask, self.hours * scale[self.organisation.employee], self.hours
+        )
+
+    def scale_hours(self, where, percent):
+        mask = self.select(where)
+        self.hours = np.where(mask, self.hours * (1 + percent / 100), self.hours)
+
+    def remove(self, where):
+        self.hours = np.where(self.select(where), 0.0, self.hours)
+
+    def set_leader_bonus(self, where, value):
+        # per relation, so it can be changed for the leaders of some teams only
+        self.bonus = np.where(self.select(where), value, self.bonus)
+
+    operations = {
+        "adjust_rates": adjust_rates,
+        "cap_hours": cap_hours,
+        "scale_hours": scale_hours,
+        "remove": remove,
+        "set_leader_bonus": set_leader_bonus,
+    }
+
+    def apply(self, operation):
+        params = dict(operation)
+        function = self.operations[params.pop("op")]
+        function(self, params.pop("where", {}), **params)
+
+    def result(self):
+        """
+        The weekly costs of the company and of the teams whose cost changed, before and after.
+        """
+        org = self.organisation
+        before = org.team_costs_before
+        after = org.team_costs(org.pay(self.rates, self.hours, self.bonus))
+        changed = np.flatnonzero(before != after)
+        return {
+            "total": _costs(before.sum(), after.sum()),
+            "teams": [
+                {
+                    "team": org.team_names[i],
+                    "before": old,
+                    "after": new,
+                    "delta": new - old,
+                }
+                for i, old, new in zip(
+                    changed.tolist(), before[changed].tolist(), after[changed].tolist()
+                )
+            ],
+        }
+
+
+def _costs(before, after):
+    return {
+        "before": float(before),
+        "after": float(after),
+        "delta": float(after - before),
+    }
+
+
+# the organisation of the latest versions loaded by this process
+_lock = threading.Lock()
+_loaded = (None, None)
+
+
+def organisation_scopes():
+    # what changes any of the arrays: the rates, the relations (which all bump the company), and the tables
+    return [
+        rates_scope(),
+        company_scope(),
+        table_scope("employee"),
+        table_scope("team"),
+    ]
+
+
+def get_organisation():
+    """
+    The organisation as of the current versions, loaded again only once one of them changed. The versions are
+    read before the data, so data loaded after a write is never kept under the versions from before it.
+    Without a shared cache the versions don't change with the writes of the other processes, so it's loaded
+    for every simulation.
+    """
+    global _loaded
+    if not settings.SHARED_CACHE:
+        return Organisation.load()
+    versions = get_versions(organisation_scopes())
+    # one load at a time, the requests waiting for it use it instead of loading it again
+    with _lock:
+        if _loaded[0] != versions:
+            # kept for the requests after it, so it's read from the primary, never from a lagging replica
+            pin_primary()
+            _loaded = (versions, Organisation.load())
+        return _loaded[1]
+
+
+def simulate(operations):
+    simulation = Simulation(get_organisation())
+    for operation in operations:
+        simulation.apply(operation)
+    return simulation.result()
@@ -1,2 +1,14 @@
 from .model import *
 from .view import *
+from .pagination import *
+from .summary import *
+from .benchmark import *
+from .middleware import *
+from .metrics import *
+from .async_view import *
+from .db import *
+from .router import *
+from .serializer import *
+from .filter import *
+from .simulation import *
+from .dataset import *
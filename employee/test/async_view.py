@@ -0,0 +1,94 @@
+import json
+
+from ..models import Employee, Team, PartialTeamEmployeeRelation
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class AsyncViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=15, employee_id="B123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=20
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team2, work_arr=10
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSameResponse(self, sync_route, async_route, params):
+        expected = self.client.get(reverse(sync_route), params)
+        response = self.client.get(reverse(async_route), params)
+        self.assertEqual(response.status_code, expected.status_code)
+        # the next page of the async view is on the async view
+        content = response.content.replace(b"/api/async/", b"/api/")
+        self.assertEqual(json.loads(content), json.loads(expected.content), params)
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_lists(self):
+        for sync_route, async_route, params in [
+            ("employee-api", "employee-async-api", {}),
+            ("employee-api", "employee-async-api", {"page_size": 1}),
+            ("employee-api", "employee-async-api", {"employee_id": "B123"}),
+            ("employee-api", "employee-async-api", {"employee_id": "C123"}),
+            ("team-api", "team-async-api", {}),
+            ("team-api", "team-async-api", {"name": "Team2"}),
+            ("team-employee-api", "team-employee-async-api", {}),
+            ("team-employee-api", "team-employee-async-api", {"employee_id": "A123"}),
+            ("team-employee-api", "team-employee-async-api", {"employee_id": "B123"}),
+            ("team-employee-api", "team-employee-async-api", {"cursor": "x"}),
+        ]:
+            self.assertSameResponse(sync_route, async_route, params)
+
+        # the next page link points to the async view
+        response = self.client.get(reverse("employee-async-api"), {"page_size": 1})
+        next_page = json.loads(response.content)["next"]
+        self.assertIn(reverse("employee-async-api"), next_page)
+        response = self.client.get(next_page)
+        self.assertEqual(
+            json.loads(response.content)["results"][0]["employee_id"], "B123"
+        )
+
+    def test_financials(self):
+        for params in [
+            {},
+            {"team": "Team1"},
+            {"employee_id": "A123"},
+            {"employee_id": "A123", "team": "Team2"},
+            {"employee_id": "B123", "team": "Team2"},
+            {"team": "Team3"},
+        ]:
+            cache.clear()
+            self.assertSameResponse("financials-api", "financials-async-api", params)
+        # the second read is from the cache filled by the first
+        self.client.get(reverse("financials-async-api"), {"team": "Team1"})
+        response = self.client.get(reverse("financials-async-api"), {"team": "Team1"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_not_modified(self):
+        response = self.client.get(reverse("employee-async-api"))
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("employee-async-api"), HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_read_only(self):
+        response = self.client.post(
+            reverse("team-async-api"), {"name": "Team3"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertFalse(Team.objects.filter(name="Team3").exists())
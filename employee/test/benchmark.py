@@ -0,0 +1,89 @@
+from io import StringIO
+
+from ..benchmarks import failures, missing_routes, run_all, sample_keys, scenarios
+from ..models import Employee, EmployeePayrollSummary, PartialTeamEmployeeRelation
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+class GenerateOrgTest(TestCase):
+    def generate(self, *args):
+        call_command("generate_org", *args, stdout=StringIO())
+
+    def test_generate(self):
+        self.generate("--employees=50", "--teams=10", "--relations=120", "--seed=3")
+        self.assertEqual(Employee.objects.count(), 50)
+        self.assertEqual(PartialTeamEmployeeRelation.objects.count(), 120)
+        # within the hours cap, and the summaries are built
+        self.assertLessEqual(
+            max(EmployeePayrollSummary.objects.values_list("total_hours", flat=True)),
+            48,
+        )
+        self.assertEqual(EmployeePayrollSummary.objects.count(), 50)
+
+        # the same seed generates the same organisation
+        relations = list(
+            PartialTeamEmployeeRelation.objects.order_by(
+                "employee__employee_id", "team__name"
+            ).values_list(
+                "employee__employee_id", "team__name", "employee_type", "work_arr"
+            )
+        )
+        self.generate(
+            "--employees=50", "--teams=10", "--relations=120", "--seed=3", "--clear"
+        )
+        self.assertEqual(
+            list(
+                PartialTeamEmployeeRelation.objects.order_by(
+                    "employee__employee_id", "team__name"
+                ).values_list(
+                    "employee__employee_id", "team__name", "employee_type", "work_arr"
+                )
+            ),
+            relations,
+        )
+
+    def test_existing(self):
+        self.generate("--employees=5", "--teams=2", "--relations=5")
+        with self.assertRaises(CommandError):
+            self.generate("--employees=5", "--teams=2", "--relations=5")
+        # more relations than the teams and the hours cap allow
+        with self.assertRaises(CommandError):
+            self.generate("--employees=5", "--teams=2", "--relations=15", "--clear")
+
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_routes(self):
+        call_command(
+            "generate_org",
+            "--employees=5",
+            "--teams=2",
+            "--relations=5",
+            stdout=StringIO(),
+        )
+        self.assertEqual(missing_routes(scenarios(sample_keys())), [])
+
+    def test_budgets(self):
+        # the query counts can't grow with the organisation
+        counts = []
+        for employees, teams, relations in [(20, 4, 40), (200, 20, 500)]:
+            call_command(
+                "generate_org",
+                f"--employees={employees}",
+                f"--teams={teams}",
+                f"--relations={relations}",
+                "--clear",
+                stdout=StringIO(),
+            )
+            selected = scenarios(sample_keys())
+            results = run_all(selected, iterations=1)
+            for scenario, result in zip(selected, results):
+                with self.subTest(scenario=scenario.name, employees=employees):
+                    self.assertEqual(failures(result, scenario), [])
+            counts.append([result["queries"] for result in results])
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,154 @@
+import os
+import tempfile
+from io import StringIO
+
+from .. import dataset
+from ..models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation,
+    EmployeePayrollSummary,
+    TeamPayrollSummary,
+    CompanyPayrollSummary,
+)
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+def organisation():
+    return (
+        list(
+            Employee.objects.order_by("employee_id").values_list(
+                "employee_id", "name", "hourly_rate"
+            )
+        ),
+        list(Team.objects.order_by("name").values_list("name", flat=True)),
+        list(
+            PartialTeamEmployeeRelation.objects.order_by(
+                "employee__employee_id", "team__name"
+            ).values_list(
+                "employee__employee_id", "team__name", "employee_type", "work_arr"
+            )
+        ),
+    )
+
+
+def summaries():
+    return (
+        list(
+            EmployeePayrollSummary.objects.order_by(
+                "employee__employee_id"
+            ).values_list(
+                "employee__employee_id", *EmployeePayrollSummary.summary_fields
+            )
+        ),
+        list(
+            TeamPayrollSummary.objects.order_by("team__name").values_list(
+                "team__name", *TeamPayrollSummary.summary_fields
+            )
+        ),
+        CompanyPayrollSummary.get().weekly_cost,
+    )
+
+
+class DumpLoadOrgTest(TestCase):
+    def setUp(self):
+        call_command(
+            "generate_org",
+            "--employees=60",
+            "--teams=8",
+            "--relations=150",
+            "--seed=5",
+            stdout=StringIO(),
+        )
+        # an employee without teams and a name out of ascii
+        Employee.objects.create(
+            name="Zoë Ångström", hourly_rate=17.25, employee_id="Z999"
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "org.bin")
+
+    def dump(self):
+        out = StringIO()
+        call_command("dumporg", self.path, stdout=out)
+        return out.getvalue()
+
+    def load(self, *args):
+        out = StringIO()
+        call_command("loadorg", self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        expected, expected_summaries = organisation(), summaries()
+        # several blocks per table
+        block_size = dataset.block_size
+        dataset.block_size = 16
+        self.addCleanup(setattr, dataset, "block_size", block_size)
+
+        self.assertIn("61 employees, 8 teams and 150 relations", self.dump())
+        self.assertIn("61 employees, 8 teams and 150 relations", self.load("--clear"))
+
+        self.assertEqual(organisation(), expected)
+        # the relations are in again under new primary keys, with the summaries rebuilt
+        self.assertEqual(summaries()[:2], expected_summaries[:2])
+        self.assertAlmostEqual(summaries()[2], expected_summaries[2])
+
+    def test_existing(self):
+        self.dump()
+        with self.assertRaises(CommandError):
+            self.load()
+        self.assertEqual(Employee.objects.count(), 61)
+
+    def test_invalid(self):
+        expected = organisation()
+        self.dump()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        for corrupted in [
+            b"",
+            b"NOTADUMP" + data[8:],
+            data[:-20],
+            data[:40] + b"\x00" * 10 + data[50:],
+        ]:
+            with open(self.path, "wb") as file:
+                file.write(corrupted)
+            with self.subTest(length=len(corrupted)), self.assertRaises(CommandError):
+                self.load("--clear")
+            # nothing was loaded, nor deleted
+            self.assertEqual(organisation(), expected)
+
+    def test_unknown_key(self):
+        self.dump()
+        # the relations refer to employees missing from the database they're loaded in
+        with open(self.path, "rb") as file:
+            tables = list(dataset.read(file))
+        with open(self.path, "wb") as file:
+            file.write(dataset.magic)
+            for table, columns in tables:
+                if table.model is Employee:
+                    columns = [column[1:] for column in columns]
+                file.write(dataset.encode_block(table, list(zip(*columns))))
+            file.write(dataset.block_header.pack(dataset.end_tag, 0, 0))
+
+        expected = organisation()
+        with self.assertRaises(CommandError):
+            self.load("--clear")
+        self.assertEqual(organisation(), expected)
+
+    def test_out_of_order(self):
+        self.dump()
+        # the relations before the employees and teams they refer to
+        with open(self.path, "rb") as file:
+            tables = list(dataset.read(file))
+        with open(self.path, "wb") as file:
+            file.write(dataset.magic)
+            for table, columns in reversed(tables):
+                file.write(dataset.encode_block(table, list(zip(*columns))))
+            file.write(dataset.block_header.pack(dataset.end_tag, 0, 0))
+
+        expected = organisation()
+        with self.assertRaises(CommandError):
+            self.load("--clear")
+        self.assertEqual(organisation(), expected)
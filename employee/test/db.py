@@ -0,0 +1,91 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from ..backends.sqlite3.base import DatabaseWrapper
+from ..db import pragma_statements
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+
+
+class SqlitePragmasTest(SimpleTestCase):
+    def connect(self, path, **options):
+        # a connection of its own to a database file, as the test database is in memory
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, "NAME": str(path), "OPTIONS": options}
+        )
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        return wrapper.connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    @override_settings(
+        SQLITE_PRAGMAS={
+            "journal_mode": "wal",
+            "synchronous": "normal",
+            "cache_size": -2000,
+            "busy_timeout": 1234,
+        }
+    )
+    def test_applied(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = self.connect(Path(directory) / "db.sqlite3")
+            self.assertEqual(self.pragma(wrapper, "journal_mode"), "wal")
+            self.assertEqual(self.pragma(wrapper, "synchronous"), 1)
+            self.assertEqual(self.pragma(wrapper, "cache_size"), -2000)
+            self.assertEqual(self.pragma(wrapper, "busy_timeout"), 1234)
+            wrapper.close()
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_untuned(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = self.connect(Path(directory) / "db.sqlite3")
+            self.assertEqual(self.pragma(wrapper, "journal_mode"), "delete")
+            self.assertEqual(self.pragma(wrapper, "synchronous"), 2)
+            wrapper.close()
+
+    def test_invalid(self):
+        self.assertEqual(
+            pragma_statements({"cache_size": -2000, "journal_mode": "wal"}),
+            ["PRAGMA cache_size = -2000", "PRAGMA journal_mode = wal"],
+        )
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statements({"journal_mode": "wal; DROP TABLE employee_employee"})
+        with self.assertRaises(ImproperlyConfigured):
+            pragma_statements({"cache size": 10})
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "wal", "busy_timeout": 0})
+    def test_immediate_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "db.sqlite3"
+            first = self.connect(path, transaction_mode="IMMEDIATE")
+            second = self.connect(path)
+            # the write lock is taken at BEGIN, before anything is written
+            first._start_transaction_under_autocommit()
+            with self.assertRaisesMessage(sqlite3.OperationalError, "locked"):
+                second.connection.execute("CREATE TABLE locked (id integer)")
+            first.connection.execute("ROLLBACK")
+            second.connection.execute("CREATE TABLE locked (id integer)")
+            first.close()
+            second.close()
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "wal", "busy_timeout": 0})
+    def test_deferred_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "db.sqlite3"
+            first = self.connect(path, transaction_mode="IMMEDIATE")
+            second = self.connect(path)
+            # a transaction that only reads doesn't keep the writers out
+            first.begin_deferred = True
+            first._start_transaction_under_autocommit()
+            second.connection.execute("CREATE TABLE unlocked (id integer)")
+            first.connection.execute("ROLLBACK")
+            first.close()
+            second.close()
+
+    def test_invalid_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.connect(":memory:", transaction_mode="LATER")
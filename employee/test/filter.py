@@ -0,0 +1,131 @@
+from ..models import Employee, Team, PartialTeamEmployeeRelation
+from ..views import _prefix_range
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class ListFilterTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employees = [
+            Employee.objects.create(
+                name=f"Employee{i}", hourly_rate=10 + i, employee_id=f"{prefix}{i:03d}"
+            )
+            for i, prefix in enumerate(["A", "A", "B", "AB", "B"])
+        ]
+        teams = [Team.objects.create(name=f"Team{i}") for i in range(2)]
+        for i, employee in enumerate(employees):
+            PartialTeamEmployeeRelation.objects.create(
+                employee=employee,
+                team=teams[i % 2],
+                work_arr=4 * (i + 1),
+                employee_type="LEADER" if i < 2 else "EMPLOYEE",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, params):
+        # both the sync and async views, which have to agree
+        results = []
+        for url_name in (f"{name}-api", f"{name}-async-api"):
+            response = self.client.get(reverse(url_name), params, format="json")
+            results.append((response.status_code, response.json()))
+        self.assertEqual(results[0], results[1])
+        return results[0]
+
+    def employee_ids(self, params):
+        code, data = self.get("employee", params)
+        self.assertEqual(code, status.HTTP_200_OK)
+        return [row["employee_id"] for row in data["results"]]
+
+    def relations(self, params):
+        code, data = self.get("team-employee", params)
+        self.assertEqual(code, status.HTTP_200_OK)
+        return [(row["employee"], row["team"]) for row in data["results"]]
+
+    def test_employees_by_team(self):
+        self.assertEqual(self.employee_ids({"team": "Team1"}), ["A001", "AB003"])
+        self.assertEqual(self.employee_ids({"team": "Team9"}), [])
+
+    def test_employees_by_rate(self):
+        self.assertEqual(
+            self.employee_ids({"hourly_rate_min": 11, "hourly_rate_max": 13.5}),
+            ["A001", "AB003", "B002"],
+        )
+        self.assertEqual(self.employee_ids({"hourly_rate_max": "10"}), ["A000"])
+
+    def test_employees_by_prefix(self):
+        self.assertEqual(
+            self.employee_ids({"employee_id_prefix": "A"}), ["A000", "A001", "AB003"]
+        )
+        self.assertEqual(self.employee_ids({"employee_id_prefix": "AB"}), ["AB003"])
+        self.assertEqual(self.employee_ids({"employee_id_prefix": "C"}), [])
+
+    def test_employees_paged(self):
+        response = self.client.get(
+            reverse("employee-api"), {"employee_id_prefix": "A", "page_size": 2}
+        )
+        self.assertEqual(
+            [row["employee_id"] for row in response.json()["results"]], ["A000", "A001"]
+        )
+        # the filter is kept on the next page
+        response = self.client.get(response.json()["next"], format="json")
+        self.assertEqual(
+            [row["employee_id"] for row in response.json()["results"]], ["AB003"]
+        )
+
+    def test_invalid_number(self):
+        code, data = self.get("employee", {"hourly_rate_min": "cheap"})
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(data, {"hourly_rate_min": ["A valid number is required."]})
+
+        code, data = self.get("team-employee", {"work_arr_max": "4.5"})
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(data, {"work_arr_max": ["A valid integer is required."]})
+
+    def test_team_filter_etag(self):
+        # the members of a team change with the relations, which have no version to make an ETag from
+        response = self.client.get(reverse("employee-api"), {"team": "Team0"})
+        self.assertNotIn("ETag", response)
+        response = self.client.get(reverse("employee-async-api"), {"team": "Team0"})
+        self.assertNotIn("ETag", response)
+        response = self.client.get(reverse("employee-api"), {"hourly_rate_min": 11})
+        self.assertIn("ETag", response)
+
+    def test_relations_by_team(self):
+        self.assertEqual(
+            self.relations({"team": "Team0"}),
+            [("A000", "Team0"), ("B002", "Team0"), ("B004", "Team0")],
+        )
+
+    def test_relations_by_type(self):
+        self.assertEqual(
+            self.relations({"employee_type": "LEADER"}),
+            [("A000", "Team0"), ("A001", "Team1")],
+        )
+        code, data = self.get("team-employee", {"employee_type": "BOSS"})
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(data, {"employee_type": ['"BOSS" is not a valid choice.']})
+
+    def test_relations_by_hours(self):
+        self.assertEqual(
+            self.relations({"work_arr_min": 8, "work_arr_max": 12}),
+            [("A001", "Team1"), ("B002", "Team0")],
+        )
+        self.assertEqual(
+            self.relations(
+                {"work_arr_min": 8, "employee_type": "EMPLOYEE", "team": "Team0"}
+            ),
+            [("B002", "Team0"), ("B004", "Team0")],
+        )
+
+
+class PrefixRangeTest(SimpleTestCase):
+    def test_range(self):
+        self.assertEqual(_prefix_range("E00"), ("E00", "E01"))
+        self.assertEqual(_prefix_range("Az"), ("Az", "A{"))
+        self.assertEqual(_prefix_range("A\U0010ffff"), ("A\U0010ffff", None))
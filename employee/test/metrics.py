@@ -0,0 +1,141 @@
+import tempfile
+from io import StringIO
+
+from ..metrics import Registry, registry
+from ..models import Employee
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+class MetricsApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(name="Employee1", hourly_rate=12, employee_id="A123")
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(METRICS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def metrics(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests(self):
+        self.client.get(reverse("employee-api"), format="json")
+        self.client.get(reverse("employee-api"), format="json")
+        self.client.delete(reverse("team-api-pk", args=["Team1"]))
+
+        samples = self.metrics()
+        self.assertEqual(
+            samples[
+                'edi_requests_total{route="employee-api",method="GET",status="200"}'
+            ],
+            2,
+        )
+        self.assertEqual(
+            samples['edi_request_errors_total{route="team-api-pk",status="4xx"}'], 1
+        )
+        self.assertEqual(
+            samples['edi_request_duration_seconds_count{route="employee-api"}'], 2
+        )
+        # a page is a single query
+        self.assertEqual(
+            samples['edi_request_queries_bucket{route="employee-api",le="0"}'], 0
+        )
+        self.assertEqual(
+            samples['edi_request_queries_bucket{route="employee-api",le="1"}'], 2
+        )
+        self.assertEqual(
+            samples['edi_request_queries_bucket{route="employee-api",le="+Inf"}'], 2
+        )
+        self.assertEqual(samples['edi_request_queries_sum{route="employee-api"}'], 2)
+
+    async def test_requests_async(self):
+        # the queries are counted under ASGI too
+        await self.async_client.get(reverse("employee-async-api"))
+        _, histograms = registry.collect()
+        self.assertEqual(
+            histograms[("edi_request_queries", ("employee-async-api",))][-1], 1
+        )
+
+    def test_processes(self):
+        self.client.get(reverse("employee-api"), format="json")
+        # another worker, that has written its totals to its file
+        other = Registry()
+        other.record("employee-api", "GET", 200, 0.01, 1)
+        other.record("financials-api", "GET", 500, 0.2, 3)
+        other.flush()
+
+        samples = self.metrics()
+        self.assertEqual(
+            samples[
+                'edi_requests_total{route="employee-api",method="GET",status="200"}'
+            ],
+            2,
+        )
+        self.assertEqual(
+            samples['edi_request_errors_total{route="financials-api",status="5xx"}'], 1
+        )
+        self.assertEqual(
+            samples[
+                'edi_request_duration_seconds_bucket{route="financials-api",le="0.25"}'
+            ],
+            1,
+        )
+        self.assertEqual(
+            samples[
+                'edi_request_duration_seconds_bucket{route="financials-api",le="0.1"}'
+            ],
+            0,
+        )
+
+    def test_clear(self):
+        # the files of the processes of the previous run of the server
+        for status in (200, 500):
+            other = Registry()
+            other.record("employee-api", "GET", status, 0.01, 1)
+            other.flush()
+        registry.flush()
+
+        out = StringIO()
+        call_command("clear_metrics", stdout=out)
+        self.assertIn("Deleted 3 metrics files", out.getvalue())
+        samples = self.metrics()
+        self.assertNotIn(
+            'edi_requests_total{route="employee-api",method="GET",status="500"}',
+            samples,
+        )
+
+    def test_cache(self):
+        self.assertEqual(self.metrics()['edi_cache_hit_ratio{cache="financials"}'], 0)
+        self.client.get(reverse("financials-api"), format="json")
+        self.client.get(reverse("financials-api"), format="json")
+
+        samples = self.metrics()
+        self.assertEqual(samples['edi_cache_hits_total{cache="financials"}'], 1)
+        self.assertEqual(samples['edi_cache_misses_total{cache="financials"}'], 1)
+        self.assertEqual(samples['edi_cache_hit_ratio{cache="financials"}'], 0.5)
+
+        # counted per process like the requests, as the cache itself can be per process
+        other = Registry()
+        other.record_cache("financials", hit=True)
+        other.record_cache("financials", hit=True)
+        other.flush()
+        samples = self.metrics()
+        self.assertEqual(samples['edi_cache_hits_total{cache="financials"}'], 3)
+        self.assertEqual(samples['edi_cache_hit_ratio{cache="financials"}'], 0.75)
@@ -0,0 +1,70 @@
+import re
+
+from ..middleware import ServerTimingMiddleware
+from ..models import Employee
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+def metrics(response):
+    return {
+        name: dict(re.findall(r'(\w+)=("[^"]*"|[\d.]+)', values))
+        for name, values in re.findall(r"(\w+);([^,]*)", response["Server-Timing"])
+    }
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(name="Employee1", hourly_rate=12, employee_id="A123")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_header(self):
+        response = self.client.get(reverse("employee-api"), format="json")
+        timing = metrics(response)
+        self.assertEqual(set(timing), {"db", "view", "render", "total", "size"})
+        self.assertEqual(timing["db"]["desc"], '"1 queries"')
+        self.assertEqual(timing["size"]["desc"], f'"{len(response.content)} bytes"')
+        self.assertLessEqual(
+            float(timing["view"]["dur"]) + float(timing["render"]["dur"]),
+            float(timing["total"]["dur"]),
+        )
+
+    def test_streamed(self):
+        response = self.client.get(reverse("payroll-api", args=[2022, 10]))
+        # the payroll is read while it's streamed, after the middleware
+        self.assertNotIn("size", metrics(response))
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_log(self):
+        with self.assertLogs("employee.middleware", "INFO") as logs:
+            self.client.get(reverse("financials-api"), format="json")
+        self.assertIn("GET /api/financials/ 200 queries=", logs.output[0])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(lambda request: None)
+        response = self.client.get(reverse("employee-api"), format="json")
+        self.assertNotIn("Server-Timing", response)
+
+    async def test_header_async(self):
+        # under ASGI the queries are made on the connections of the thread the ORM runs in, not the event loop's,
+        # for the sync views and the async ORM alike
+        for route, queries in [
+            ("employee-api", 1),
+            ("employee-async-api", 1),
+            ("team-employee-api", 1),
+            ("financials-async-api", 1),
+        ]:
+            await cache.aclear()
+            response = await self.async_client.get(reverse(route))
+            self.assertEqual(
+                metrics(response)["db"]["desc"], f'"{queries} queries"', route
+            )
@@ -1,6 +1,7 @@
 from django.test import TestCase
 from ..models import Employee, Team, PartialTeamEmployeeRelation
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 
 
 class TeamModelTest(TestCase):
@@ -70,3 +71,58 @@ class PartialModelTest(TestCase):
                 employee_type="LEADER",
                 work_arr=40,
             )
+
+    def test_update_hours(self):
+        # the relation's own saved hours don't count against it when it's updated
+        self.team_employee_relation.work_arr = 48
+        self.team_employee_relation.save()
+        self.assertEqual(
+            PartialTeamEmployeeRelation.objects.get(
+                id=self.team_employee_relation.id
+            ).work_arr,
+            48,
+        )
+
+    def test_save_queries(self):
+        employee = Employee.objects.create(
+            name="Aleksandar", hourly_rate=15, employee_id="C123"
+        )
+        # the hours aggregate and the insert inside its savepoint, followed by the refresh of the employee,
+        # team and company payroll summaries, a select and an upsert each
+        with self.assertNumQueries(10):
+            PartialTeamEmployeeRelation.objects.create(
+                employee=employee, team=self.team, work_arr=40
+            )
+
+    def test_two_leaders_constraint(self):
+        # bulk_create skips save(), the database still doesn't allow a second leader
+        employee = Employee.objects.create(
+            name="Aleksandar", hourly_rate=15, employee_id="C123"
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PartialTeamEmployeeRelation.objects.bulk_create(
+                [
+                    PartialTeamEmployeeRelation(
+                        employee=employee,
+                        team=self.team,
+                        employee_type="LEADER",
+                        work_arr=40,
+                    )
+                ]
+            )
+
+    def test_covering_indexes(self):
+        # the hours cap and the team's payroll are read from the indexes alone
+        relations = PartialTeamEmployeeRelation.objects.order_by()
+        plan = (
+            relations.filter(employee=self.team_employee_relation.employee_id)
+            .values("work_arr")
+            .explain()
+        )
+        self.assertIn("COVERING INDEX relation_employee_team_idx", plan)
+        plan = (
+            relations.filter(team=self.team)
+            .values("employee_type", "work_arr", "employee")
+            .explain()
+        )
+        self.assertIn("COVERING INDEX relation_team_type_idx", plan)
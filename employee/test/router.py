@@ -0,0 +1,91 @@
+import asyncio
+
+from ..cache import cached_financials
+from ..models import Employee
+from ..routers import (
+    ReplicaRouter,
+    pin_primary,
+    read_from_replicas,
+    replica_etag,
+    use_replicas,
+)
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.test.client import RequestFactory
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Employee), "default")
+        self.assertEqual(self.router.db_for_write(Employee), "default")
+
+    def test_replica(self):
+        with use_replicas():
+            replica = self.router.db_for_read(Employee)
+            self.assertIn(replica, ["replica1", "replica2"])
+            # the same one for the whole request
+            for _ in range(10):
+                self.assertEqual(self.router.db_for_read(Employee), replica)
+        self.assertEqual(self.router.db_for_read(Employee), "default")
+
+    def test_read_after_write(self):
+        with use_replicas():
+            self.assertEqual(self.router.db_for_write(Employee), "default")
+            self.assertEqual(self.router.db_for_read(Employee), "default")
+        with use_replicas():
+            # the next request reads from a replica again
+            self.assertNotEqual(self.router.db_for_read(Employee), "default")
+
+    def test_pin_primary(self):
+        with use_replicas():
+            pin_primary()
+            self.assertEqual(self.router.db_for_read(Employee), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with use_replicas():
+            self.assertEqual(self.router.db_for_read(Employee), "default")
+
+    def test_allow_migrate(self):
+        self.assertFalse(self.router.allow_migrate("replica1", "employee"))
+        self.assertIsNone(self.router.allow_migrate("default", "employee"))
+
+    def test_view(self):
+        @read_from_replicas
+        def view(request):
+            return self.router.db_for_read(Employee)
+
+        @read_from_replicas
+        async def async_view(request):
+            return self.router.db_for_read(Employee)
+
+        factory = RequestFactory()
+        self.assertIn(view(factory.get("/")), ["replica1", "replica2"])
+        self.assertEqual(view(factory.post("/")), "default")
+        self.assertIn(
+            asyncio.run(async_view(factory.get("/"))), ["replica1", "replica2"]
+        )
+        self.assertEqual(asyncio.run(async_view(factory.post("/"))), "default")
+
+    def test_replica_etag(self):
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH='"abc"')
+        self.assertEqual(replica_etag(request, "xyz"), "xyz")
+        with use_replicas():
+            # only the one the client already has, for a 304
+            self.assertEqual(replica_etag(request, "abc"), "abc")
+            self.assertIsNone(replica_etag(request, "xyz"))
+            pin_primary()
+            self.assertEqual(replica_etag(request, "xyz"), "xyz")
+
+    def test_cached_financials(self):
+        # a miss is computed from the primary, as it's cached for the requests after it
+        cache.clear()
+        with use_replicas():
+            result, hit = cached_financials(
+                ["router"], [], lambda: self.router.db_for_read(Employee)
+            )
+        self.assertEqual((result, hit), ("default", False))
@@ -0,0 +1,157 @@
+from ..models import Employee, Team, PartialTeamEmployeeRelation
+from ..serializers import (
+    EmployeeSerializer,
+    EmployeeValuesSerializer,
+    TeamSerializer,
+    TeamValuesSerializer,
+    PartialTeamEmployeeSerializer,
+    PartialTeamEmployeeValuesSerializer,
+)
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+
+class ValuesListSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rates = [12, 12.5, 0.1, 1e6, 33.333333333333336]
+        employees = [
+            Employee.objects.create(
+                name=f"Employée {i}", hourly_rate=rate, employee_id=f"A{i:03d}"
+            )
+            for i, rate in enumerate(rates)
+        ]
+        teams = [Team.objects.create(name=f'Team "{i}"') for i in range(2)]
+        for i, employee in enumerate(employees):
+            PartialTeamEmployeeRelation.objects.create(
+                employee=employee, team=teams[0], work_arr=i
+            )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=employees[0],
+            team=teams[1],
+            employee_type=PartialTeamEmployeeRelation.Type.LEADER,
+        )
+
+    def assertSameOutput(self, serializer, values_serializer, queryset, ordering):
+        expected = serializer(instance=queryset.order_by(*ordering), many=True).data
+        rows = values_serializer.read(queryset, ordering).order_by(*ordering)
+        data = values_serializer(instance=rows).data
+        self.assertEqual(data, expected)
+        # the same json, byte for byte
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_employee(self):
+        self.assertSameOutput(
+            EmployeeSerializer,
+            EmployeeValuesSerializer,
+            Employee.objects.all(),
+            ["employee_id"],
+        )
+
+    def test_team(self):
+        self.assertSameOutput(
+            TeamSerializer, TeamValuesSerializer, Team.objects.all(), ["name"]
+        )
+
+    def test_relation(self):
+        self.assertSameOutput(
+            PartialTeamEmployeeSerializer,
+            PartialTeamEmployeeValuesSerializer,
+            PartialTeamEmployeeRelation.objects.all(),
+            ["employee_id", "team_id"],
+        )
+
+    def test_ordering_fields(self):
+        rows = PartialTeamEmployeeValuesSerializer.read(
+            PartialTeamEmployeeRelation.objects.all(), ["employee_id", "team_id"]
+        ).order_by("employee_id", "team_id")
+        # read for the pagination's cursor, but not output
+        self.assertIsInstance(rows[0].employee_id, int)
+        self.assertEqual(
+            list(PartialTeamEmployeeValuesSerializer(instance=rows).data[0]),
+            ["employee_type", "work_arr", "employee", "team"],
+        )
+
+
+class FieldsQueryParamTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        teams = [Team.objects.create(name=f"Team{i}") for i in range(2)]
+        for i in range(3):
+            employee = Employee.objects.create(
+                name=f"Employee{i}", hourly_rate=12 + i, employee_id=f"A{i:03d}"
+            )
+            for team in teams:
+                PartialTeamEmployeeRelation.objects.create(
+                    employee=employee, team=team, work_arr=10
+                )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params, format="json")
+        return response, " ".join(query["sql"] for query in queries)
+
+    def test_employees(self):
+        for name in ("employee-api", "employee-async-api"):
+            response, sql = self.get(
+                name, {"fields": "hourly_rate,employee_id", "page_size": 2}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response.json()["results"],
+                [
+                    {"hourly_rate": 12.0, "employee_id": "A000"},
+                    {"hourly_rate": 13.0, "employee_id": "A001"},
+                ],
+            )
+            # only the columns asked for are read
+            self.assertNotIn('"name"', sql)
+            # and the next page is narrowed down too
+            self.assertIn("fields=hourly_rate%2Cemployee_id", response.json()["next"])
+
+    def test_employee(self):
+        for name in ("employee-api", "employee-async-api"):
+            response, sql = self.get(name, {"employee_id": "A001", "fields": "name"})
+            self.assertEqual(response.json(), {"name": "Employee1"})
+            self.assertNotIn('"hourly_rate"', sql)
+
+    def test_teams(self):
+        for name in ("team-api", "team-async-api"):
+            response, _ = self.get(name, {"name": "Team1", "fields": "name"})
+            self.assertEqual(response.json(), {"name": "Team1"})
+
+    def test_relations(self):
+        for name in ("team-employee-api", "team-employee-async-api"):
+            response, sql = self.get(name, {"fields": "work_arr,team"})
+            self.assertEqual(
+                response.json()["results"][0], {"work_arr": 10, "team": "Team0"}
+            )
+            # no join to the employees when their employee_id isn't asked for
+            self.assertNotIn('"employee_employee"', sql)
+
+            response, _ = self.get(name, {"fields": "team", "employee_id": "A002"})
+            self.assertEqual(
+                response.json()["results"], [{"team": "Team0"}, {"team": "Team1"}]
+            )
+
+    def test_unknown(self):
+        for name in ("employee-api", "employee-async-api"):
+            response, sql = self.get(name, {"fields": "name,salary,pk"})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                response.json(), {"fields": ["Unknown fields: pk, salary."]}
+            )
+            # before anything is read
+            self.assertEqual(sql, "")
+
+            response, _ = self.get(name, {"fields": ","})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,137 @@
+from ..models import Employee, Team, PartialTeamEmployeeRelation, CompanyPayrollSummary
+from ..routers import use_replicas
+from ..simulation import get_organisation
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class SimulationApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=13, employee_id="B123"
+        )
+        employee3 = Employee.objects.create(
+            name="Employee3", hourly_rate=14, employee_id="C123"
+        )
+        team1 = Team.objects.create(name="Team1")
+        team2 = Team.objects.create(name="Team2")
+        # Employee1 is full time, the others are part-timers
+        PartialTeamEmployeeRelation.objects.create(
+            employee=employee1, team=team1, employee_type="LEADER", work_arr=24
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=employee1, team=team2, work_arr=16
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=employee2, team=team1, work_arr=20
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=employee3, team=team2, employee_type="LEADER", work_arr=30
+        )
+        cls.url = reverse("simulation-api")
+
+    def setUp(self):
+        # the organisation is loaded again for new versions, which start over with the cache
+        cache.clear()
+
+    def simulate(self, *operations):
+        return self.client.post(self.url, {"operations": operations}, format="json")
+
+    def test_post_api(self):
+        response = self.simulate(
+            {"op": "adjust_rates", "percent": 5, "where": {"employee_type": "LEADER"}},
+            {"op": "cap_hours", "hours": 18, "where": {"part_time": True}},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        total = response.data["total"]
+        self.assertAlmostEqual(total["before"], CompanyPayrollSummary.get().weekly_cost)
+        team1, team2 = response.data["teams"]
+        self.assertEqual(team1["team"], "Team1")
+        self.assertAlmostEqual(team1["before"], 24 * 12 * 1.1 + 20 * 13)
+        self.assertAlmostEqual(team1["after"], 24 * 12.6 * 1.1 + 18 * 13)
+        self.assertAlmostEqual(team2["after"], 16 * 12.6 + 18 * 14.7 * 1.1)
+        self.assertAlmostEqual(total["delta"], team1["delta"] + team2["delta"])
+        # nothing is written
+        self.assertEqual(
+            list(Employee.objects.values_list("hourly_rate", flat=True)), [12, 13, 14]
+        )
+
+    def test_post_api_operations(self):
+        # only the teams whose cost changed are returned
+        response = self.simulate({"op": "remove", "where": {"team": ["Team2"]}})
+        self.assertEqual([team["team"] for team in response.data["teams"]], ["Team2"])
+        self.assertEqual(response.data["teams"][0]["after"], 0)
+
+        # the hours of an employee over the cap are scaled down in all of their teams
+        response = self.simulate(
+            {"op": "cap_hours", "hours": 20, "where": {"employee_id": ["A123"]}}
+        )
+        team1, team2 = response.data["teams"]
+        self.assertAlmostEqual(team1["after"], 12 * 12 * 1.1 + 20 * 13)
+        self.assertAlmostEqual(team2["after"], 8 * 12 + 30 * 14 * 1.1)
+
+        response = self.simulate(
+            {"op": "set_leader_bonus", "value": 1.2},
+            {"op": "scale_hours", "percent": 50, "where": {"team": ["Team1"]}},
+            {"op": "adjust_rates", "amount": -20},
+        )
+        self.assertEqual(response.data["total"]["after"], 0)
+
+        # only the bonus of the leaders matched, Team2 is left as it is
+        response = self.simulate(
+            {"op": "set_leader_bonus", "value": 1.5, "where": {"team": ["Team1"]}}
+        )
+        (team1,) = response.data["teams"]
+        self.assertEqual(team1["team"], "Team1")
+        self.assertAlmostEqual(team1["after"], 24 * 12 * 1.5 + 20 * 13)
+
+    def test_post_api_reload(self):
+        self.simulate({"op": "remove"})
+        # the arrays are kept until the data changes
+        with self.assertNumQueries(0):
+            self.simulate({"op": "remove"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put("/api/employee/B123", {"hourly_rate": 20}, format="json")
+        response = self.simulate({"op": "remove", "where": {"team": ["Team1"]}})
+        self.assertAlmostEqual(
+            response.data["teams"][0]["before"], 24 * 12 * 1.1 + 20 * 20
+        )
+
+    @override_settings(SHARED_CACHE=False)
+    def test_unshared_cache(self):
+        self.assertEqual(get_organisation().rates.tolist(), [12, 13, 14])
+        # the writes of the other processes don't bump the versions, so it's loaded again
+        Employee.objects.filter(employee_id="B123").update(hourly_rate=20)
+        self.assertEqual(get_organisation().rates.tolist(), [12, 20, 14])
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_primary(self):
+        # kept for the simulations after it, so it's never read from a replica, which could be behind
+        with use_replicas():
+            organisation = get_organisation()
+        self.assertEqual(organisation.employee_ids, ["A123", "B123", "C123"])
+
+    def test_post_api_invalid(self):
+        for operations in [
+            [],
+            [{"op": "fire_everyone"}],
+            [{"op": "cap_hours"}],
+            [{"op": "adjust_rates", "percent": 5, "amount": 1}],
+            [{"op": "remove", "hours": 5}],
+            [{"op": "remove", "where": {"employee_type": "INTERN"}}],
+            [{"op": "remove", "where": {"team": ["Team3"]}}],
+            [{"op": "set_leader_bonus", "value": 1.5, "where": {"team": ["Team3"]}}],
+        ]:
+            response = self.client.post(
+                self.url, {"operations": operations}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from ..models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation,
+    EmployeePayrollSummary,
+    TeamPayrollSummary,
+    CompanyPayrollSummary,
+)
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+class PayrollSummaryTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=10, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=20, employee_id="B123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=20
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee2, team=cls.team1, work_arr=10
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee2, team=cls.team2, work_arr=30
+        )
+
+    def assertSummaries(self, employee1, team1, company):
+        # (total_hours, leader_hours, count, weekly_cost)
+        for summary, expected in [
+            (EmployeePayrollSummary.objects.get(employee=self.employee1), employee1),
+            (TeamPayrollSummary.objects.get(team=self.team1), team1),
+        ]:
+            values = [getattr(summary, field) for field in summary.summary_fields]
+            self.assertEqual(values[:3], list(expected[:3]))
+            self.assertAlmostEqual(values[3], expected[3])
+        self.assertAlmostEqual(CompanyPayrollSummary.get().weekly_cost, company)
+
+    def test_create(self):
+        self.assertSummaries(
+            (20, 20, 1, 220.0), (30, 20, 2, 420.0), 220.0 + 200.0 + 600.0
+        )
+
+    def test_rate_update(self):
+        self.client.put("/api/employee/A123", {"hourly_rate": 20.0}, format="json")
+        self.assertSummaries(
+            (20, 20, 1, 440.0), (30, 20, 2, 640.0), 440.0 + 200.0 + 600.0
+        )
+
+    def test_relation_update_and_delete(self):
+        self.client.put(
+            reverse("team-employee-api"),
+            {"employee_pk": "A123", "team_pk": "Team1", "employee_type": "EMPLOYEE"},
+            format="json",
+        )
+        self.assertSummaries((20, 0, 1, 200.0), (30, 0, 2, 400.0), 1000.0)
+
+        self.client.delete(
+            reverse("team-employee-api"),
+            {"employee_pk": "A123", "team_pk": "Team1"},
+            format="json",
+        )
+        self.assertSummaries((0, 0, 0, 0.0), (10, 0, 1, 200.0), 800.0)
+
+    def test_team_delete(self):
+        self.client.delete("/api/team/Team2", format="json")
+        self.assertEqual(
+            EmployeePayrollSummary.objects.get(employee=self.employee2).total_hours, 10
+        )
+        self.assertAlmostEqual(CompanyPayrollSummary.get().weekly_cost, 420.0)
+
+    def test_rebuild(self):
+        # writes that skip the models' save() leave the summaries behind, the rebuild catches them up
+        Employee.objects.filter(id=self.employee1.id).update(hourly_rate=20)
+        # the company's drift too, although a dry run leaves the team summaries it's summed up from behind
+        out = StringIO()
+        call_command("rebuild_payroll_summaries", "--dry-run", stdout=out)
+        self.assertIn("3 payroll summaries have drifted", out.getvalue())
+        self.assertIn("CompanyPayrollSummary 1", out.getvalue())
+
+        out = StringIO()
+        call_command("rebuild_payroll_summaries", stdout=out)
+
+        self.assertIn("3 of them had drifted", out.getvalue())
+        self.assertSummaries(
+            (20, 20, 1, 440.0), (30, 20, 2, 640.0), 440.0 + 200.0 + 600.0
+        )
+
+        out = StringIO()
+        call_command("rebuild_payroll_summaries", "--dry-run", stdout=out)
+        self.assertIn("0 payroll summaries have drifted", out.getvalue())
+
+    def test_rebuild_cache(self):
+        # the financials cached from the drifted summaries aren't served after the rebuild
+        cache.clear()
+        url = reverse("financials-api")
+        self.client.get(url, {"team": "Team1"}, format="json")
+        Employee.objects.filter(id=self.employee1.id).update(hourly_rate=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_payroll_summaries", stdout=StringIO())
+
+        response = self.client.get(url, {"team": "Team1"}, format="json")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertAlmostEqual(response.data["compensation"], 640.0)
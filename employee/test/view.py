@@ -1,4 +1,16 @@
-from ..models import Employee, Team, PartialTeamEmployeeRelation
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from ..metrics import registry
+from ..models import (
+    Employee,
+    Team,
+    PartialTeamEmployeeRelation,
+    PayrollRun,
+    WorkingMonth,
+)
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -23,9 +35,9 @@ class EmployeeApiTest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
         self.assertEqual(
-            response.data,
+            response.data["results"],
             [
                 {"name": "Employee1", "hourly_rate": 12, "employee_id": "A123"},
                 {"name": "Employee2", "hourly_rate": 13, "employee_id": "B123"},
@@ -107,6 +119,201 @@ class EmployeeApiTest(APITestCase):
             Employee.objects.filter(id=self.employee1.id).first().employee_id, "A123"
         )
 
+    def test_put_api_invalid(self):
+        response = self.client.put(
+            "/api/employee/A123",
+            {"name": "Employee4", "hourly_rate": "a lot"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("hourly_rate", response.data)
+        # nothing is saved when any of the fields is invalid
+        self.assertEqual(Employee.objects.get(id=self.employee1.id).name, "Employee1")
+
+        response = self.client.put(
+            "/api/employee/A123", {"employee_id": "B123"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"employee_id": ["Employee B123 already exists."]}
+        )
+
+    def test_put_api_missing(self):
+        response = self.client.put(
+            "/api/employee/Z999", {"name": "Employee4"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.patch("/api/employee/Z999", {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_patch_api(self):
+        response = self.client.patch(
+            "/api/employee/B123", {"hourly_rate": 14.5}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        employee = Employee.objects.get(id=self.employee2.id)
+        self.assertEqual((employee.name, employee.hourly_rate), ("Employee2", 14.5))
+
+
+class EmployeeBulkApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.url = reverse("employee-bulk-api")
+
+    def test_post_api(self):
+        employees = [
+            {"name": "Employee4", "hourly_rate": 15, "employee_id": "A123"},
+            {"name": "Employee2", "hourly_rate": 13, "employee_id": "B123"},
+            {"name": "Employee3", "hourly_rate": "a lot", "employee_id": "C123"},
+            {"name": "Employee5", "hourly_rate": 14, "employee_id": "B123"},
+        ]
+        response = self.client.post(self.url, employees, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [2, 3])
+        self.assertEqual(Employee.objects.all().count(), 2)
+        self.assertEqual(
+            Employee.objects.filter(id=self.employee1.id).first().hourly_rate, 15
+        )
+        self.assertEqual(Employee.objects.get(employee_id="B123").name, "Employee2")
+
+    def test_post_api_invalid(self):
+        response_object = self.client.post(
+            self.url, {"name": "Employee2"}, format="json"
+        )
+        response_rows = self.client.post(
+            self.url, [{"name": "Employee2"}], format="json"
+        )
+
+        self.assertEqual(response_object.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_rows.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Employee.objects.all().count(), 1)
+
+    def test_patch_api(self):
+        Employee.objects.create(name="Employee2", hourly_rate=13, employee_id="B123")
+        rows = [
+            {"employee_id": "A123", "hourly_rate": 16},
+            {"employee_id": "B123", "name": "Employee6"},
+            {"employee_id": "C123", "hourly_rate": 14},
+            {"employee_id": "A123", "hourly_rate": 17},
+            {"hourly_rate": 18},
+            {"employee_id": "B123", "hourly_rate": "a lot"},
+        ]
+        response = self.client.patch(self.url, rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [2, 3, 4, 5]
+        )
+        self.assertEqual(Employee.objects.get(employee_id="A123").hourly_rate, 16)
+        employee2 = Employee.objects.get(employee_id="B123")
+        self.assertEqual((employee2.name, employee2.hourly_rate), ("Employee6", 13))
+        self.assertFalse(Employee.objects.filter(employee_id="C123").exists())
+
+    def test_patch_api_nothing_updated(self):
+        response = self.client.patch(
+            self.url, [{"employee_id": "C123", "hourly_rate": 14}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["updated"], 0)
+
+
+class EmployeeRatesApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=13, employee_id="B123"
+        )
+        cls.employee3 = Employee.objects.create(
+            name="Employee3", hourly_rate=14, employee_id="C123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=24
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team2, work_arr=16
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee2, team=cls.team1, work_arr=16
+        )
+        cls.url = reverse("employee-rates-api")
+
+    def setUp(self):
+        cache.clear()
+
+    def rates(self):
+        return list(
+            Employee.objects.order_by("employee_id").values_list(
+                "hourly_rate", flat=True
+            )
+        )
+
+    def test_post_api_percent(self):
+        response = self.client.post(self.url, {"percent": 10}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        for rate, expected in zip(self.rates(), [13.2, 14.3, 15.4]):
+            self.assertAlmostEqual(rate, expected)
+        # 24 * 12 * 1.1 + 16 * 12 + 16 * 13
+        self.assertAlmostEqual(response.data["weekly_cost_before"], 716.8)
+        self.assertAlmostEqual(response.data["weekly_cost_delta"], 71.68)
+        financials = self.client.get(reverse("financials-api"), format="json")
+        self.assertAlmostEqual(
+            financials.data["total compensation"],
+            response.data["weekly_cost_after"],
+        )
+
+    def test_post_api_team_leaders(self):
+        response_team = self.client.post(
+            self.url, {"amount": 1, "team": "Team1"}, format="json"
+        )
+        response_leaders = self.client.post(
+            self.url, {"amount": 2, "team": "Team1", "leaders": True}, format="json"
+        )
+
+        self.assertEqual(response_team.data["updated"], 2)
+        self.assertEqual(response_leaders.data["updated"], 1)
+        self.assertEqual(self.rates(), [15, 14, 14])
+        # the leader's other team changes too
+        self.assertAlmostEqual(
+            response_leaders.data["weekly_cost_delta"], 24 * 2 * 1.1 + 16 * 2
+        )
+        team2 = self.client.get(reverse("financials-api"), {"team": "Team2"})
+        self.assertAlmostEqual(team2.data["compensation"], 16 * 15)
+
+    def test_post_api_invalid(self):
+        for data in [
+            {},
+            {"percent": 5, "amount": 1},
+            {"percent": -101},
+            {"amount": -13},
+            {"amount": 1, "team": "Team3"},
+        ]:
+            response = self.client.post(self.url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.rates(), [12, 13, 14])
+
+    def test_post_api_cache_invalidation(self):
+        url = reverse("financials-api")
+        self.client.get(url, {"employee_id": "B123"}, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"leaders": True, "amount": 1}, format="json")
+        response = self.client.get(url, {"employee_id": "B123"}, format="json")
+        # everyone's financials are invalidated at once, not only of the employees adjusted
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+
 
 class TeamApiTest(APITestCase):
     @classmethod
@@ -120,8 +327,10 @@ class TeamApiTest(APITestCase):
         response_name = self.client.get(self.url, {"name": "Team1"}, format="json")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data, [{"name": "Team1"}, {"name": "Team2"}])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(
+            response.data["results"], [{"name": "Team1"}, {"name": "Team2"}]
+        )
         self.assertEqual(response_name.status_code, status.HTTP_200_OK)
         self.assertEqual(len([response_name.data]), 1)
         self.assertEqual(response_name.data, {"name": "Team1"})
@@ -186,10 +395,10 @@ class PartialTeamEmployeeApiTest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(response.data["results"]), 4)
 
         self.assertEqual(
-            response.data,
+            response.data["results"],
             [
                 {
                     "employee_type": "LEADER",
@@ -218,9 +427,9 @@ class PartialTeamEmployeeApiTest(APITestCase):
             ],
         )
         self.assertEqual(response_name.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response_name.data), 2)
+        self.assertEqual(len(response_name.data["results"]), 2)
         self.assertEqual(
-            response_name.data,
+            response_name.data["results"],
             [
                 {
                     "employee_type": "LEADER",
@@ -237,6 +446,25 @@ class PartialTeamEmployeeApiTest(APITestCase):
             ],
         )
 
+    def test_get_api_single_query(self):
+        # employee and team are joined in, instead of being looked up for every relation
+        with self.assertNumQueries(1):
+            self.client.get(self.url, format="json")
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"employee_id": "A123"}, format="json")
+
+    def test_get_api_errors(self):
+        Employee.objects.create(name="Employee", hourly_rate=14, employee_id="C123")
+        response_missing = self.client.get(
+            self.url, {"employee_id": "Z123"}, format="json"
+        )
+        response_unassigned = self.client.get(
+            self.url, {"employee_id": "C123"}, format="json"
+        )
+
+        self.assertEqual(response_missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_unassigned.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_post_api(self):
         employee = Employee.objects.create(
             name="Employee", hourly_rate=14, employee_id="C123"
@@ -396,6 +624,75 @@ class PartialTeamEmployeeApiTest(APITestCase):
         )
 
 
+class PartialTeamEmployeeBulkApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=13, employee_id="B123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=30
+        )
+        cls.url = reverse("team-employee-bulk-api")
+
+    def test_post_api(self):
+        relations = [
+            {"employee": "A123", "team": "Team2", "work_arr": 10},
+            # over the 48 hours, with the row above
+            {"employee": "A123", "team": "Team2", "work_arr": 10},
+            {"employee": "B123", "team": "Team1", "employee_type": "LEADER"},
+            {"employee": "B123", "team": "Team2", "employee_type": "LEADER"},
+            {"employee": "C123", "team": "Team2"},
+            {"employee": "B123", "team": "Team3"},
+            {"employee": "B123", "team": "Team1", "work_arr": -1},
+        ]
+        response = self.client.post(self.url, relations, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [1, 2, 4, 5, 6]
+        )
+        self.assertEqual(PartialTeamEmployeeRelation.objects.all().count(), 3)
+        self.assertEqual(
+            PartialTeamEmployeeRelation.objects.get(
+                employee=self.employee2, team=self.team2
+            ).employee_type,
+            "LEADER",
+        )
+
+    def test_post_api_hours(self):
+        response = self.client.post(
+            self.url,
+            [
+                {"employee": "A123", "team": "Team2", "work_arr": 19},
+                {"employee": "B123", "team": "Team2", "work_arr": 48},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["index"], 0)
+
+    def test_post_api_queries(self):
+        # the lookups are per list, not per row
+        relations = [
+            {"employee": f"E{i}", "team": "Team2", "work_arr": 8} for i in range(20)
+        ]
+        Employee.objects.bulk_create(
+            Employee(name=f"Employee{i}", hourly_rate=10, employee_id=f"E{i}")
+            for i in range(20)
+        )
+        # the lookups and the insert, followed by the refresh of the payroll summaries
+        with self.assertNumQueries(14):
+            response = self.client.post(self.url, relations, format="json")
+        self.assertEqual(response.data["created"], 20)
+
+
 class FinancialsApiTest(APITestCase):
     @classmethod
     def setUpTestData(cls):
@@ -428,6 +725,11 @@ class FinancialsApiTest(APITestCase):
         )
         cls.url = reverse("financials-api")
 
+    def setUp(self):
+        # the versions in the cache outlive the rolled back test data
+        cache.clear()
+        registry.reset()
+
     def test_get_api(self):
         # for the values, I ran the test and saw the results, or just calculate them by hand,
         # keeping in mind they're floats
@@ -442,15 +744,368 @@ class FinancialsApiTest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data, {"total compensation": 1246.0800000000002})
+        # 24 * 12 * 1.1 + 16 * 12 + 16 * 13 + 32 * 13 * 1.1
+        self.assertAlmostEqual(response.data["total compensation"], 1174.4)
 
         self.assertEqual(response_employee.status_code, status.HTTP_200_OK)
-        self.assertEqual(
-            response_employee.data,
-            "Employee Employee1 A123 pay is 192.0 as employee, 316.8 as leader, total 508.8",
-        )
+        self.assertEqual(response_employee.data["employee"], "A123")
+        self.assertAlmostEqual(response_employee.data["employee_pay"], 192.0)
+        self.assertAlmostEqual(response_employee.data["leader_pay"], 316.8)
+        self.assertAlmostEqual(response_employee.data["total"], 508.8)
 
         self.assertEqual(response_team.status_code, status.HTTP_200_OK)
-        self.assertEqual(response_team.data, {"compensation": 524.8})
+        self.assertEqual(response_team.data["team"], "Team1")
+        self.assertAlmostEqual(response_team.data["compensation"], 524.8)
 
         self.assertEqual(response_employee_team.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(response_employee_team.data["pay"], 316.8)
+
+    def test_get_api_single_query(self):
+        # every mode has to be answered by one aggregate query, no matter the number of relations
+        for params in [
+            {},
+            {"employee_id": "A123"},
+            {"team": "Team1"},
+            {"employee_id": "A123", "team": "Team1"},
+        ]:
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, params, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_api_errors(self):
+        response_employee = self.client.get(
+            self.url, {"employee_id": "Z123"}, format="json"
+        )
+        response_team = self.client.get(self.url, {"team": "Team3"}, format="json")
+        Team.objects.create(name="Team3")
+        response_empty_team = self.client.get(
+            self.url, {"team": "Team3"}, format="json"
+        )
+
+        self.assertEqual(response_employee.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_team.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_empty_team.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_api_cache(self):
+        response = self.client.get(self.url, {"team": "Team1"}, format="json")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"team": "Team1"}, format="json")
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertEqual(
+            [
+                registry.counters[(name, ("financials",))]
+                for name in ("edi_cache_hits_total", "edi_cache_misses_total")
+            ],
+            [1, 1],
+        )
+
+    def test_get_api_cache_invalidation(self):
+        params = [{}, {"team": "Team1"}, {"team": "Team2"}, {"employee_id": "B123"}]
+        for param in params:
+            self.client.get(self.url, param, format="json")
+
+        # Employee1 is only in Team1 and Team2, so Employee2 has to still be cached
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put("/api/employee/A123", {"hourly_rate": 20.0}, format="json")
+        responses = [
+            self.client.get(self.url, param, format="json") for param in params
+        ]
+
+        self.assertEqual(
+            [response.headers["X-Cache"] for response in responses],
+            ["MISS", "MISS", "MISS", "HIT"],
+        )
+        self.assertAlmostEqual(
+            responses[1].data["compensation"], 24 * 20 * 1.1 + 16 * 13
+        )
+
+        # a rename only changes how the team is looked up
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put("/api/team/Team2", {"name": "Team3"}, format="json")
+        responses = [
+            self.client.get(self.url, param, format="json") for param in params
+        ]
+
+        # Team2 doesn't exist anymore, errors aren't cached
+        self.assertEqual(
+            [response.headers.get("X-Cache") for response in responses],
+            ["HIT", "HIT", None, "HIT"],
+        )
+        self.assertEqual(responses[2].status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_api_cache_model_writes(self):
+        # writes through the models, e.g. from the admin, invalidate the cache as the endpoints do
+        response = self.client.get(self.url, {"team": "Team1"}, format="json")
+        etag = response.headers["ETag"]
+
+        self.employee1.hourly_rate = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee1.save()
+        response = self.client.get(
+            self.url, {"team": "Team1"}, HTTP_IF_NONE_MATCH=etag, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertAlmostEqual(response.data["compensation"], 24 * 20 * 1.1 + 16 * 13)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.e2t1.delete()
+        response = self.client.get(self.url, {"team": "Team1"}, format="json")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        self.assertAlmostEqual(response.data["compensation"], 24 * 20 * 1.1)
+
+        self.team1.name = "Team3"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team1.save()
+        response = self.client.get(self.url, {"team": "Team1"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, work_arr=24
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_not_modified(self):
+        for url in [
+            reverse("employee-api"),
+            reverse("team-api"),
+            reverse("financials-api"),
+        ]:
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn("ETag", response.headers)
+            self.assertFalse(response.headers["ETag"].startswith("W/"))
+
+            # answered from the versions in the cache alone
+            with self.assertNumQueries(0):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response.headers["ETag"], format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_modified(self):
+        url = reverse("employee-api")
+        etag = self.client.get(url, format="json").headers["ETag"]
+        # other query params are a different response
+        response = self.client.get(
+            url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                url,
+                {"name": "Employee2", "hourly_rate": 13, "employee_id": "B123"},
+                format="json",
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # the teams didn't change
+        etag = self.client.get(reverse("team-api"), format="json").headers["ETag"]
+        response = self.client.get(reverse("team-api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_unshared_cache(self):
+        # the versions in a cache of this process alone don't change with the writes of the other ones
+        for url in [reverse("employee-api"), reverse("financials-api")]:
+            response = self.client.get(url, format="json")
+            self.assertNotIn("ETag", response.headers)
+        response = self.client.get(reverse("financials-api"), format="json")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+
+
+class PayrollApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=13, employee_id="B123"
+        )
+        cls.employee3 = Employee.objects.create(
+            name="Employee3", hourly_rate=14, employee_id="C123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=24
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1,
+            team=cls.team2,
+            employee_type="EMPLOYEE",
+            work_arr=16,
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee2,
+            team=cls.team1,
+            employee_type="EMPLOYEE",
+            work_arr=40,
+        )
+
+    def get_payroll(self, period):
+        response = self.client.get(f"/api/payroll/{period}/")
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_get_api(self):
+        # October 2022 has 21 working days, i.e. 4.2 working weeks
+        response, data = self.get_payroll("2022-10")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(data["working_days"], 21)
+        self.assertEqual(len(data["employees"]), 3)
+
+        employee1, employee2, employee3 = data["employees"]
+        self.assertEqual(employee1["employee_id"], "A123")
+        self.assertEqual(employee1["weekly_hours"], 40)
+        self.assertEqual(employee1["leader_hours"], 24)
+        self.assertAlmostEqual(employee1["leader_premium"], 24 * 12 * 0.1 * 4.2)
+        self.assertAlmostEqual(
+            employee1["monthly_pay"], (24 * 12 * 1.1 + 16 * 12) * 4.2
+        )
+        self.assertAlmostEqual(employee2["monthly_pay"], 40 * 13 * 4.2)
+        # employees without a team are still on the list, with nothing to be paid
+        self.assertEqual(employee3["weekly_hours"], 0)
+        self.assertEqual(employee3["monthly_pay"], 0)
+
+    def test_get_api_queries(self):
+        # the calendar lookup and the pay list itself, regardless of the number of employees
+        with self.assertNumQueries(2):
+            self.get_payroll("2022-10")
+
+    def test_get_api_month_outside_calendar(self):
+        response, data = self.get_payroll("2150-02")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(data["working_days"], 20)
+        self.assertTrue(WorkingMonth.objects.filter(year=2150, month=2).exists())
+
+    def test_get_api_invalid_month(self):
+        response = self.client.get("/api/payroll/2022-13/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PayrollRunApiTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee1 = Employee.objects.create(
+            name="Employee1", hourly_rate=12, employee_id="A123"
+        )
+        cls.employee2 = Employee.objects.create(
+            name="Employee2", hourly_rate=13, employee_id="B123"
+        )
+        cls.team1 = Team.objects.create(name="Team1")
+        cls.team2 = Team.objects.create(name="Team2")
+
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team1, employee_type="LEADER", work_arr=24
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee1, team=cls.team2, work_arr=16
+        )
+        PartialTeamEmployeeRelation.objects.create(
+            employee=cls.employee2, team=cls.team1, work_arr=40
+        )
+        cls.url = reverse("payroll-runs-api", kwargs={"year": 2022, "month": 10})
+
+    def get_run(self, number, **headers):
+        response = self.client.get(f"/api/payroll/2022-10/runs/{number}/", **headers)
+        if not response.streaming:
+            return response, None
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_post_api(self):
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["number"], 1)
+        self.assertEqual(response.data["working_days"], 21)
+        self.assertEqual(response.data["line_count"], 3)
+        self.assertAlmostEqual(
+            response.data["total_pay"], (24 * 12 * 1.1 + 16 * 12 + 40 * 13) * 4.2
+        )
+        self.assertEqual(len(response.data["content_hash"]), 64)
+
+    def test_get_api(self):
+        self.client.post(self.url)
+        response, data = self.get_run(1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(line["employee_id"], line["team"]) for line in data["lines"]],
+            [("A123", "Team1"), ("A123", "Team2"), ("B123", "Team1")],
+        )
+        leader = data["lines"][0]
+        self.assertEqual(leader["name"], "Employee1")
+        self.assertEqual(leader["employee_type"], "LEADER")
+        self.assertEqual(leader["work_arr"], 24)
+        self.assertAlmostEqual(leader["weekly_pay"], 24 * 12 * 1.1)
+        self.assertAlmostEqual(leader["monthly_pay"], 24 * 12 * 1.1 * 4.2)
+
+        missing, _ = self.get_run(2)
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_api_frozen(self):
+        first = self.client.post(self.url).data
+        self.client.put("/api/employee/A123", {"hourly_rate": 20}, format="json")
+        self.client.put("/api/team/Team2", {"name": "Team3"}, format="json")
+        second = self.client.post(self.url).data
+        third = self.client.post(self.url).data
+
+        # the first run still has the rates and names it was run with
+        _, data = self.get_run(1)
+        self.assertEqual(data["content_hash"], first["content_hash"])
+        self.assertEqual(data["lines"][0]["hourly_rate"], 12)
+        self.assertEqual(data["lines"][1]["team"], "Team2")
+        self.assertNotEqual(second["content_hash"], first["content_hash"])
+        self.assertEqual(third["content_hash"], second["content_hash"])
+
+        response = self.client.get(self.url)
+        self.assertEqual([run["number"] for run in response.data], [1, 2, 3])
+
+    def test_get_api_etag(self):
+        self.client.post(self.url)
+        response, _ = self.get_run(1)
+        # the run never changes, so its hash is the ETag
+        self.assertEqual(
+            response.headers["ETag"], f'"{PayrollRun.objects.get().content_hash}"'
+        )
+        with self.assertNumQueries(1):
+            response, _ = self.get_run(1, HTTP_IF_NONE_MATCH=response.headers["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_append_only(self):
+        self.client.post(self.url)
+        run = PayrollRun.objects.get()
+        with self.assertRaises(ValidationError):
+            run.save()
+        with self.assertRaises(ValidationError):
+            run.delete()
+        with self.assertRaises(ValidationError):
+            run.lines.first().save()
+        with self.assertRaises(ValidationError):
+            run.lines.first().delete()
+
+        # the lines don't depend on the employees and teams
+        Employee.objects.get(employee_id="A123").delete()
+        self.assertEqual(run.lines.count(), 3)
+
+    def test_post_api_invalid_month(self):
+        response = self.client.post("/api/payroll/2022-13/runs/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PayrollRun.objects.exists())
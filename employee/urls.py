@@ -1,18 +1,55 @@
 from django.urls import path
+
+from . import async_views
 from .views import (
     employee_api,
     employee_api_pk,
+    employee_bulk_api,
+    employee_rates_api,
     team_api,
     team_api_pk,
     team_employee_api,
+    team_employee_bulk_api,
     financials_api,
+    payroll_api,
+    payroll_runs_api,
+    payroll_run_api,
+    simulation_api,
 )
 
 urlpatterns = [
     path("employee/", employee_api, name="employee-api"),
+    path("employee/bulk/", employee_bulk_api, name="employee-bulk-api"),
+    path("employee/rates/", employee_rates_api, name="employee-rates-api"),
     path("employee/<str:pk>", employee_api_pk, name="employee-api-pk"),
     path("team/", team_api, name="team-api"),
     path("team/<str:pk>", team_api_pk, name="team-api-pk"),
     path("team-employee-relation/", team_employee_api, name="team-employee-api"),
+    path(
+        "team-employee-relation/bulk/",
+        team_employee_bulk_api,
+        name="team-employee-bulk-api",
+    ),
     path("financials/", financials_api, name="financials-api"),
+    path("payroll/<int:year>-<int:month>/", payroll_api, name="payroll-api"),
+    path(
+        "payroll/<int:year>-<int:month>/runs/",
+        payroll_runs_api,
+        name="payroll-runs-api",
+    ),
+    path(
+        "payroll/<int:year>-<int:month>/runs/<int:number>/",
+        payroll_run_api,
+        name="payroll-run-api",
+    ),
+    path("simulation/", simulation_api, name="simulation-api"),
+    # the async versions of the reads, for ASGI
+    path("async/employee/", async_views.employee_api, name="employee-async-api"),
+    path("async/team/", async_views.team_api, name="team-async-api"),
+    path(
+        "async/team-employee-relation/",
+        async_views.team_employee_api,
+        name="team-employee-async-api",
+    ),
+    path("async/financials/", async_views.financials_api, name="financials-async-api"),
 ]
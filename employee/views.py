@@ -1,42 +1,176 @@
+import itertools
+import json
+import sys
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
 from rest_framework import status, serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from .models import (
     Employee,
     Team,
     PartialTeamEmployeeRelation as TERelation,
+    WorkingMonth,
+    PayrollRun,
+    PayrollRunLine,
     total_work_arr,
+    leader_bonus,
+    relation_pay,
+    refresh_payroll_summaries,
+    EmployeePayrollSummary,
+    TeamPayrollSummary,
+    CompanyPayrollSummary,
 )
 from .serializers import (
     EmployeeSerializer,
+    EmployeeRateAdjustmentSerializer,
+    EmployeeUpsertSerializer,
+    EmployeeValuesSerializer,
+    PartialTeamEmployeeBulkSerializer,
     TeamSerializer,
+    TeamValuesSerializer,
     PartialTeamEmployeeSerializer,
+    PartialTeamEmployeeValuesSerializer,
+    PayrollRunSerializer,
+    SimulationSerializer,
+)
+from .pagination import KeysetPagination
+from .metrics import render_metrics
+from .routers import read_from_replicas, replica_etag
+from .simulation import simulate
+from .cache import (
+    cached_financials,
+    invalidate_financials,
+    invalidate_rates,
+    invalidate_tables,
+    versions_etag,
+    company_scope,
+    employee_scope,
+    team_scope,
+    rates_scope,
+    table_scope,
 )
-from .exceptions import EmployeeFloatError, EmployeeStrError
 
 # Create your views here.
 
+# rows per statement for the bulk endpoints, keeping well under the database's limit of query parameters
+bulk_batch_size = 500
+
+
+def _batches(values):
+    for i in range(0, len(values), bulk_batch_size):
+        yield values[i : i + bulk_batch_size]
+
+
 # region Employee
 
 
+def _list_etag(table, unversioned=()):
+    """
+    etag_func for the list GETs, from the version of the table and the query params. The query params in
+    unversioned make the list depend on tables without a version, so there's no ETag when they're given.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if any(param in request.GET for param in unversioned):
+            return None
+        return replica_etag(
+            request, versions_etag([table_scope(table)], sorted(request.GET.lists()))
+        )
+
+    return etag_func
+
+
+def _number_param(params, name, kind=float):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return kind(value)
+    except ValueError:
+        raise serializers.ValidationError(
+            {name: [f"A valid {'integer' if kind is int else 'number'} is required."]}
+        )
+
+
+def _prefix_range(prefix):
+    """
+    The [start, end) range of the strings starting with prefix, for a filter the index on the column can serve,
+    unlike a LIKE which sqlite can't use it for, as it's case insensitive.
+    """
+    last = ord(prefix[-1])
+    if last == sys.maxunicode:
+        return prefix, None
+    return prefix, prefix[:-1] + chr(last + 1)
+
+
+def _filter_employees(qs, params):
+    """
+    The filters of the employee list: team [str] for the members of the team with that name, hourly_rate_min and
+    hourly_rate_max [float] for a range of pay rates, and employee_id_prefix [str].
+    """
+    team = params.get("team")
+    if team is not None:
+        qs = qs.filter(partialteamemployeerelation__team__name=team)
+
+    rate_min = _number_param(params, "hourly_rate_min")
+    if rate_min is not None:
+        qs = qs.filter(hourly_rate__gte=rate_min)
+    rate_max = _number_param(params, "hourly_rate_max")
+    if rate_max is not None:
+        qs = qs.filter(hourly_rate__lte=rate_max)
+
+    prefix = params.get("employee_id_prefix")
+    if prefix:
+        start, end = _prefix_range(prefix)
+        qs = qs.filter(employee_id__gte=start)
+        if end is not None:
+            qs = qs.filter(employee_id__lt=end)
+    return qs
+
+
 @api_view(["GET", "POST"])
+@read_from_replicas
+# the team filter reads the relations
+@condition(etag_func=_list_etag("employee", unversioned=["team"]))
 def employee_api(request):
     qs = Employee.objects.all()
 
     if request.method == "GET":
         """
         If there's a query param employee_id [str] corresponding to Employee.employee_id
-        then return only that employee, o.w. return all employees
+        then return only that employee, o.w. return all employees, filtered as in _filter_employees. The query
+        param fields [str], e.g. fields=employee_id,hourly_rate, narrows them down to those fields.
         """
+        fields = EmployeeValuesSerializer.get_fields(request)
         query_id = request.query_params.get("employee_id", None)
         if query_id is not None:
-            employee = get_object_or_404(qs.filter(employee_id=query_id))
-            serializer = EmployeeSerializer(instance=employee)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-        serializer = EmployeeSerializer(instance=qs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            employee = get_object_or_404(
+                EmployeeValuesSerializer.read(
+                    qs.filter(employee_id=query_id), fields=fields
+                )
+            )
+            serializer = EmployeeValuesSerializer(instance=[employee], fields=fields)
+            return Response(serializer.data[0], status=status.HTTP_200_OK)
+
+        paginator = KeysetPagination(ordering=["employee_id"])
+        page = paginator.paginate_queryset(
+            EmployeeValuesSerializer.read(
+                _filter_employees(qs, request.query_params), paginator.ordering, fields
+            ),
+            request,
+        )
+        serializer = EmployeeValuesSerializer(instance=page, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     if request.method == "POST":
         """
@@ -44,50 +178,58 @@ def employee_api(request):
         """
         serializer = EmployeeSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # the cached lists are invalidated by Employee.save
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     return Response({"message": "invalid request"}, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(["PUT", "DELETE"])
+@api_view(["PUT", "PATCH", "DELETE"])
 def employee_api_pk(request, pk):
     qs = Employee.objects.all()
 
-    if request.method == "PUT":
+    if request.method in ("PUT", "PATCH"):
         """
-        Needs employee_id [str] to be passed as url param. In the body it needs to receive
-        {'name': [str], 'hourly_rate': [float], 'employee_id': [str]}, with any of them can be missing
-        and it'll update them in the employee with employee_id.
+        Needs employee_id [str] to be passed as url param. In the body it takes any of
+        {'name': [str], 'hourly_rate': [float], 'employee_id': [str]}, and updates them in the employee with
+        employee_id in a single UPDATE. PUT takes partial bodies as well, as it always has.
         """
-        query_employee = qs.filter(employee_id=pk)
-
-        if "name" in request.data:
-            if isinstance(
-                request.data["name"], str
-            ):  # ensuring that the user enters a str for name
-                query_employee.update(name=request.data["name"])
-            else:
-                raise EmployeeStrError(request.data["name"])
-
-        if "hourly_rate" in request.data:
-            if isinstance(
-                request.data["hourly_rate"], float
-            ):  # ensuring that the user enters a float for hourly_rate
-                query_employee.update(hourly_rate=request.data["hourly_rate"])
-            else:
-                raise EmployeeFloatError(request.data["hourly_rate"])
-
-        if "employee_id" in request.data:
-            if isinstance(request.data["employee_id"], str):
-                query_employee.update(employee_id=request.data["employee_id"])
-            else:
-                # going to be using serializers.ValidationError since they appear nicer on screen
-                # and are somewhat appropriate
-                # also got tired of creating a custom error for everything
-                raise serializers.ValidationError(
-                    f'employee_id {request.data["employee_id"]} needs to be a string'
+        serializer = EmployeeUpsertSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+        employee_id = changes.get("employee_id", pk)
+
+        try:
+            # the update and the payroll summaries are saved in one transaction
+            with transaction.atomic():
+                if changes:
+                    updated = qs.filter(employee_id=pk).update(**changes)
+                else:
+                    updated = qs.filter(employee_id=pk).exists()
+                if not updated:
+                    raise NotFound(f"Employee {pk} does not exist.")
+
+                # only the hourly_rate is in the payroll, so only it changes the summaries, the employee's teams
+                # and the company total
+                rate_changed = "hourly_rate" in changes
+                teams = ()
+                if rate_changed:
+                    employees = Employee.objects.filter(employee_id=employee_id)
+                    teams = Team.objects.filter(
+                        partialteamemployeerelation__employee__in=employees
+                    )
+                    refresh_payroll_summaries(employees=employees, teams=teams)
+                    teams = teams.values_list("name", flat=True)
+                invalidate_tables("employee")
+                invalidate_financials(
+                    employees=[pk, employee_id], teams=teams, company=rate_changed
                 )
+        except IntegrityError:
+            # the unique employee_id isn't checked upfront, which would be a query more for every update
+            raise serializers.ValidationError(
+                {"employee_id": [f"Employee {employee_id} already exists."]}
+            )
 
         return Response(request.data, status=status.HTTP_204_NO_CONTENT)
 
@@ -95,13 +237,15 @@ def employee_api_pk(request, pk):
         """
         Needs to be passed the employee_id [str] as url param.
         """
-        query_employee = qs.filter(employee_id=pk)
-        if not query_employee.exists():
+        employee = qs.filter(employee_id=pk).first()
+        if employee is None:
             return Response(
                 {"message": f"Employee {pk} does not exist."},
                 status=status.HTTP_204_NO_CONTENT,
             )
-        query_employee.delete()
+        # deleting the instance, so the payroll summaries of the employee's teams get updated and the cached
+        # financials invalidated
+        employee.delete()
         return Response(
             {"message": f"Employee {pk} deleted."}, status=status.HTTP_204_NO_CONTENT
         )
@@ -109,6 +253,227 @@ def employee_api_pk(request, pk):
     return Response({"message": "invalid request"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST", "PATCH"])
+def employee_bulk_api(request):
+    """
+    POST expects a json list [{'name': [str], 'hourly_rate': [float], 'employee_id': [str]}, ...].
+    Employees are upserted on employee_id, i.e. existing ones get their name and hourly_rate updated.
+    Invalid rows are reported by their index in the list and don't stop the valid ones from being saved.
+    PATCH only updates existing employees, see _employee_bulk_patch.
+    """
+    if request.method == "PATCH":
+        return _employee_bulk_patch(request)
+
+    if not isinstance(request.data, list):
+        raise serializers.ValidationError("Please provide a list of employees.")
+
+    employees = {}
+    errors = []
+    for index, row in enumerate(request.data):
+        serializer = EmployeeUpsertSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+
+        employee_id = serializer.validated_data["employee_id"]
+        if employee_id in employees:
+            errors.append(
+                {
+                    "index": index,
+                    "errors": {
+                        "employee_id": [f"{employee_id} is repeated in the list."]
+                    },
+                }
+            )
+            continue
+        employees[employee_id] = Employee(**serializer.validated_data)
+
+    if not employees:
+        return Response(
+            {"created": 0, "updated": 0, "errors": errors},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    employee_ids = list(employees)
+    with transaction.atomic():
+        existing = 0
+        for batch in _batches(employee_ids):
+            existing += (
+                Employee.objects.filter(employee_id__in=batch).order_by().count()
+            )
+        Employee.objects.bulk_create(
+            employees.values(),
+            batch_size=bulk_batch_size,
+            update_conflicts=True,
+            unique_fields=["employee_id"],
+            update_fields=["name", "hourly_rate"],
+        )
+        for batch in _batches(employee_ids):
+            upserted = Employee.objects.filter(employee_id__in=batch)
+            teams = Team.objects.filter(
+                partialteamemployeerelation__employee__in=upserted
+            )
+            refresh_payroll_summaries(employees=upserted, teams=teams)
+            invalidate_tables("employee")
+            invalidate_financials(
+                employees=batch,
+                teams=teams.values_list("name", flat=True),
+                company=True,
+            )
+
+    return Response(
+        {
+            "created": len(employees) - existing,
+            "updated": existing,
+            "errors": errors,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+def _employee_bulk_patch(request):
+    """
+    Expects a json list [{'employee_id': [str], 'name': [str], 'hourly_rate': [float]}, ...], with name and
+    hourly_rate left out when they don't change. The employees are updated by employee_id with bulk_update in
+    batches, all in one transaction. Invalid rows and unknown employees are reported by their index in the list
+    and don't stop the valid ones from being saved.
+    """
+    if not isinstance(request.data, list):
+        raise serializers.ValidationError("Please provide a list of employees.")
+
+    changes = {}
+    errors = []
+    for index, row in enumerate(request.data):
+        serializer = EmployeeUpsertSerializer(data=row, partial=True)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+
+        data = dict(serializer.validated_data)
+        employee_id = data.pop("employee_id", None)
+        if employee_id is None:
+            error = "This field is required."
+        elif employee_id in changes:
+            error = f"{employee_id} is repeated in the list."
+        else:
+            changes[employee_id] = (index, data)
+            continue
+        errors.append({"index": index, "errors": {"employee_id": [error]}})
+
+    updated = 0
+    with transaction.atomic():
+        for batch in _batches(list(changes)):
+            employees = list(Employee.objects.filter(employee_id__in=batch).order_by())
+            found = {employee.employee_id for employee in employees}
+            errors += [
+                {
+                    "index": changes[employee_id][0],
+                    "errors": {"employee_id": ["No employee with such id."]},
+                }
+                for employee_id in batch
+                if employee_id not in found
+            ]
+
+            fields = set()
+            rated = []
+            for employee in employees:
+                _, data = changes[employee.employee_id]
+                for field, value in data.items():
+                    setattr(employee, field, value)
+                fields.update(data)
+                if "hourly_rate" in data:
+                    rated.append(employee.employee_id)
+            if fields:
+                # a CASE per field in a single UPDATE, the employees that don't change a field keep its value
+                Employee.objects.bulk_update(employees, sorted(fields))
+            updated += len(employees)
+
+            if rated:
+                refreshed = Employee.objects.filter(employee_id__in=rated)
+                teams = Team.objects.filter(
+                    partialteamemployeerelation__employee__in=refreshed
+                )
+                refresh_payroll_summaries(employees=refreshed, teams=teams)
+                invalidate_financials(
+                    employees=rated,
+                    teams=teams.values_list("name", flat=True),
+                    company=True,
+                )
+        if updated:
+            invalidate_tables("employee")
+
+    errors.sort(key=lambda error: error["index"])
+    return Response(
+        {"updated": updated, "errors": errors},
+        status=status.HTTP_200_OK if updated else status.HTTP_400_BAD_REQUEST,
+    )
+
+
+@api_view(["POST"])
+def employee_rates_api(request):
+    """
+    Expects {'percent': [float]} or {'amount': [float]}, and optionally {'team': [str], 'leaders': [bool]}.
+    Adjusts the hourly_rate of all the employees, of the members of the team, or only of the leaders (of the
+    team) with a single UPDATE, e.g. hourly_rate = hourly_rate * 1.05 for 5 percent. Returns how many employees
+    were adjusted and the change of the company's weekly cost, both read in the same transaction.
+    """
+    serializer = EmployeeRateAdjustmentSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    adjustment = serializer.validated_data
+    query_team = adjustment.get("team", None)
+
+    employees = Employee.objects.all()
+    teams = Team.objects.all()
+    if query_team is not None or adjustment["leaders"]:
+        relations = TERelation.objects.all()
+        if query_team is not None:
+            relations = relations.filter(team__name=query_team)
+        if adjustment["leaders"]:
+            relations = relations.filter(employee_type=TERelation.Type.LEADER)
+        employees = employees.filter(pk__in=relations.values("employee"))
+        # the employees can be in other teams too, those have to be refreshed as well
+        teams = teams.filter(partialteamemployeerelation__employee__in=employees)
+
+    if "percent" in adjustment:
+        hourly_rate = F("hourly_rate") * (1 + adjustment["percent"] / 100)
+    else:
+        hourly_rate = F("hourly_rate") + adjustment["amount"]
+
+    with transaction.atomic():
+        if query_team is not None and not Team.objects.filter(name=query_team).exists():
+            raise serializers.ValidationError("No team with such name.")
+        amount = adjustment.get("amount", 0)
+        if amount < 0 and employees.filter(hourly_rate__lt=-amount).exists():
+            raise serializers.ValidationError(
+                {
+                    "amount": [
+                        "The hourly_rate of some of the employees would be negative."
+                    ]
+                }
+            )
+
+        before = CompanyPayrollSummary.get().weekly_cost
+        updated = employees.update(hourly_rate=hourly_rate)
+        if updated:
+            # only the rates changed, so the employees' summaries are repriced with an UPDATE as well
+            EmployeePayrollSummary.reprice(employees)
+            refresh_payroll_summaries(teams=teams)
+            invalidate_tables("employee")
+            # a bump for everyone, not one for every employee and team adjusted
+            invalidate_rates()
+        after = CompanyPayrollSummary.get().weekly_cost
+
+    return Response(
+        {
+            "updated": updated,
+            "weekly_cost_before": before,
+            "weekly_cost_after": after,
+            "weekly_cost_delta": after - before,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
 # endregion
 
 
@@ -116,21 +481,31 @@ def employee_api_pk(request, pk):
 
 
 @api_view(["GET", "POST"])
+@read_from_replicas
+@condition(etag_func=_list_etag("team"))
 def team_api(request):
     qs = Team.objects.all()
 
     if request.method == "GET":
         """
         Will return either all teams, or if given a query param name [str] will return that specific team.
+        Takes the query param fields [str] as employee_api does.
         """
+        fields = TeamValuesSerializer.get_fields(request)
         query_name = request.query_params.get("name", None)
         if query_name is not None:
-            team = get_object_or_404(qs.filter(name=query_name))
-            serializer = TeamSerializer(instance=team)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            team = get_object_or_404(
+                TeamValuesSerializer.read(qs.filter(name=query_name), fields=fields)
+            )
+            serializer = TeamValuesSerializer(instance=[team], fields=fields)
+            return Response(serializer.data[0], status=status.HTTP_200_OK)
 
-        serializer = TeamSerializer(instance=qs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination(ordering=["name"])
+        page = paginator.paginate_queryset(
+            TeamValuesSerializer.read(qs, paginator.ordering, fields), request
+        )
+        serializer = TeamValuesSerializer(instance=page, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     if request.method == "POST":
         """
@@ -138,6 +513,7 @@ def team_api(request):
         """
         serializer = TeamSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # the cached lists are invalidated by Team.save
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -156,16 +532,21 @@ def team_api_pk(request, pk):
         serializer = TeamSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         query_team.update(name=request.data["name"])
+        # the team is looked up by name, the compensation itself didn't change
+        invalidate_financials(teams=[pk, request.data["name"]])
+        invalidate_tables("team")
         return Response(request.data, status=status.HTTP_204_NO_CONTENT)
 
     if request.method == "DELETE":
-        query_team = qs.filter(name=pk)
-        if not query_team.exists():
+        team = qs.filter(name=pk).first()
+        if team is None:
             return Response(
                 {"message": f"Team {pk} does not exist."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        query_team.delete()
+        # deleting the instance, so the payroll summaries of the team's employees get updated and the cached
+        # financials invalidated
+        team.delete()
         return Response(
             {"message": f"Team {pk} deleted."}, status=status.HTTP_204_NO_CONTENT
         )
@@ -179,7 +560,34 @@ def team_api_pk(request, pk):
 # region PartialTeamEmployeeRelation
 
 
+def _filter_relations(qs, params):
+    """
+    The filters of the relation list: team [str] for the relations of the team with that name, employee_type
+    [str] for the leaders or the employees, and work_arr_min and work_arr_max [int] for a range of hours.
+    """
+    team = params.get("team")
+    if team is not None:
+        qs = qs.filter(team__name=team)
+
+    employee_type = params.get("employee_type")
+    if employee_type is not None:
+        if employee_type not in TERelation.Type.values:
+            raise serializers.ValidationError(
+                {"employee_type": [f'"{employee_type}" is not a valid choice.']}
+            )
+        qs = qs.filter(employee_type=employee_type)
+
+    hours_min = _number_param(params, "work_arr_min", int)
+    if hours_min is not None:
+        qs = qs.filter(work_arr__gte=hours_min)
+    hours_max = _number_param(params, "work_arr_max", int)
+    if hours_max is not None:
+        qs = qs.filter(work_arr__lte=hours_max)
+    return qs
+
+
 @api_view(["GET", "POST", "PUT", "DELETE"])
+@read_from_replicas
 def team_employee_api(request):
     qs = TERelation.objects.all()
     """
@@ -188,43 +596,35 @@ def team_employee_api(request):
     if request.method == "GET":
         """
         If query_param: employee_id [str] given, it'll return that employee's assignments,
-        o.w. will return all employees' assignments.
+        o.w. will return all employees' assignments, filtered as in _filter_relations. Takes the query param
+        fields [str] as employee_api does.
         """
+        fields = PartialTeamEmployeeValuesSerializer.get_fields(request)
         query_id = request.query_params.get("employee_id", None)
+        # the relation is identified by the (employee, team) pair, i.e. the unique_together
+        paginator = KeysetPagination(ordering=["employee_id", "team_id"])
+        # joining the employee and team, since the serializer outputs their employee_id and name
+        qs = PartialTeamEmployeeValuesSerializer.read(
+            _filter_relations(qs, request.query_params), paginator.ordering, fields
+        )
 
         if query_id is not None:
-
-            employee = Employee.objects.filter(employee_id=query_id).first()
-            if employee is None:
-                raise serializers.ValidationError("No employee with such id.")
-
-            team_employees = qs.filter(employee=employee)
-            if not team_employees.exists():
+            team_employees = qs.filter(employee__employee_id=query_id)
+            page = paginator.paginate_queryset(team_employees, request)
+            if not page and paginator.decode_cursor(request) is None:
+                if not Employee.objects.filter(employee_id=query_id).exists():
+                    raise serializers.ValidationError("No employee with such id.")
                 raise serializers.ValidationError(
                     "This employee is not assigned to any team."
                 )
-
-            serializer = PartialTeamEmployeeSerializer(
-                instance=team_employees, many=True
+            serializer = PartialTeamEmployeeValuesSerializer(
+                instance=page, fields=fields
             )
-            # PartialTeamEmployeeRelation is saved with internal values for the foreign keys, not the user defined
-            # unfortuantely this returns objects in the form of
-            # {'employee': 'employee.id', 'team': 'team.id'} - internal keys
-            # which aren't really readable for the user, so we're converting them to the user inputted
-            for val in serializer.data:
-                val["employee"] = (
-                    Employee.objects.filter(id=val["employee"]).first().employee_id
-                )
-                val["team"] = Team.objects.filter(id=val["team"]).first().name
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return paginator.get_paginated_response(serializer.data)
 
-        serializer = PartialTeamEmployeeSerializer(instance=qs, many=True)
-        for val in serializer.data:
-            val["employee"] = (
-                Employee.objects.filter(id=val["employee"]).first().employee_id
-            )
-            val["team"] = Team.objects.filter(id=val["team"]).first().name
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        page = paginator.paginate_queryset(qs, request)
+        serializer = PartialTeamEmployeeValuesSerializer(instance=page, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     if request.method == "POST":
         """
@@ -241,11 +641,8 @@ def team_employee_api(request):
                 "Please enter a valid employee id, a string."
             )
 
-        employee = Employee.objects.filter(employee_id=request.data["employee"]).first()
-        if employee is None:
+        if not Employee.objects.filter(employee_id=request.data["employee"]).exists():
             raise serializers.ValidationError("No employee with this id.")
-        # finally replacing the input employee_id [char] with the internal id
-        input_data["employee"] = employee.id
 
         if "team" not in request.data:
             raise serializers.ValidationError("Please enter a team.")
@@ -255,32 +652,18 @@ def team_employee_api(request):
                 "Please enter a valid team name, a string."
             )
 
-        team = Team.objects.filter(name=request.data["team"]).first()
-        if team is None:
+        if not Team.objects.filter(name=request.data["team"]).exists():
             raise serializers.ValidationError("No team with this name.")
 
-        input_data["team"] = team.id
-
         serializer = PartialTeamEmployeeSerializer(data=input_data)
         # to validate the remaining of the request.data fields
         serializer.is_valid(raise_exception=True)
-        # validating that the input hours aren't going to take the employee over the maximum allowed
-        employee_relations = TERelation.objects.filter(employee=employee.id)
-        total_hours = 0
-        hours_prior_to_update = serializer.validated_data["work_arr"]
-        for relation in employee_relations:
-            total_hours += relation.work_arr
-
-        if (
-            total_hours + request.data["work_arr"] - hours_prior_to_update
-            > total_work_arr
-        ):
-            raise serializers.ValidationError(
-                f"Employee {employee.name} cannot work more than {total_work_arr} hours/week, "
-                f'exceeding by {total_hours + request.data["work_arr"] - hours_prior_to_update - total_work_arr}'
-            )
-
-        serializer.save()
+        # the work hours cap and the one leader per team rule are checked when the relation is saved, which
+        # invalidates the cached financials too
+        try:
+            serializer.save()
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.messages)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -318,57 +701,89 @@ def team_employee_api(request):
             team=Team.objects.get(name=team_pk),
         )
         # if the user enters valid employee_pk and team_pk, yet they don't exist in the table
-        if query_relation.first() is None:
+        relation = query_relation.first()
+        if relation is None:
             raise serializers.ValidationError("This relation does not exist.")
-
-        # checking for the query params, to see what to update
-        if "work_arr" in request.data:
-            if not isinstance(request.data["work_arr"], int):
-                raise serializers.ValidationError(
-                    "Please enter a valid work arrangement, an int."
-                )
-            query_relation.update(work_arr=request.data["work_arr"])
-
-        if "employee_type" in request.data:
-            if not isinstance(request.data["employee_type"], str):
-                raise serializers.ValidationError(
-                    "Please enter a valid employee type, a float"
-                )
-
-            if request.data["employee_type"] not in ["EMPLOYEE", "LEADER"]:
-                raise serializers.ValidationError("please enter a valid employee type")
-
-            query_relation.update(employee_type=request.data["employee_type"])
-
-        # employee_update and team_update have to be last, since they're used as identifiers  for the relation
-        # if they're higher, a user can change the employee_id and previously mentioned params,
-        # and might cause an error
-        if "employee_update" in request.data:
-            if not isinstance(request.data["employee_update"], str):
-                raise serializers.ValidationError(
-                    "Please enter a valid employee id, a string"
-                )
-            # that the employee we're changing it with exists
-            employee = Employee.objects.filter(
-                employee_id=request.data["employee_update"]
-            ).first()
-            if employee is None:
-                raise serializers.ValidationError(
-                    "You are trying to replace the employee with non existing employee."
-                )
-            query_relation.update(employee=employee)
-
-        if "team_update" in request.data:
-            if not isinstance(request.data["team_update"], str):
-                raise serializers.ValidationError(
-                    "Please enter a valid team name, a string"
-                )
-            team = Team.objects.filter(name=request.data["team_update"]).first()
-            if team is None:
-                raise serializers.ValidationError(
-                    "You are trying to replace team with non existing team."
-                )
-            query_relation.update(team=team)
+        # the employees and teams the relation is moved from/to, for the payroll summaries
+        employees = [relation.employee_id]
+        teams = [relation.team_id]
+
+        # the updates and the payroll summaries are saved in one transaction
+        with transaction.atomic():
+            # checking for the query params, to see what to update
+            if "work_arr" in request.data:
+                if not isinstance(request.data["work_arr"], int):
+                    raise serializers.ValidationError(
+                        "Please enter a valid work arrangement, an int."
+                    )
+                query_relation.update(work_arr=request.data["work_arr"])
+
+            if "employee_type" in request.data:
+                if not isinstance(request.data["employee_type"], str):
+                    raise serializers.ValidationError(
+                        "Please enter a valid employee type, a float"
+                    )
+
+                if request.data["employee_type"] not in ["EMPLOYEE", "LEADER"]:
+                    raise serializers.ValidationError(
+                        "please enter a valid employee type"
+                    )
+
+                # the database only allows one leader per team
+                try:
+                    with transaction.atomic():
+                        query_relation.update(
+                            employee_type=request.data["employee_type"]
+                        )
+                except IntegrityError:
+                    raise serializers.ValidationError(
+                        f"Team {team_pk} already has a leader."
+                    )
+
+            # employee_update and team_update have to be last, since they're used as identifiers  for the relation
+            # if they're higher, a user can change the employee_id and previously mentioned params,
+            # and might cause an error
+            if "employee_update" in request.data:
+                if not isinstance(request.data["employee_update"], str):
+                    raise serializers.ValidationError(
+                        "Please enter a valid employee id, a string"
+                    )
+                # that the employee we're changing it with exists
+                employee = Employee.objects.filter(
+                    employee_id=request.data["employee_update"]
+                ).first()
+                if employee is None:
+                    raise serializers.ValidationError(
+                        "You are trying to replace the employee with non existing employee."
+                    )
+                query_relation.update(employee=employee)
+                employees.append(employee.id)
+
+            if "team_update" in request.data:
+                if not isinstance(request.data["team_update"], str):
+                    raise serializers.ValidationError(
+                        "Please enter a valid team name, a string"
+                    )
+                team = Team.objects.filter(name=request.data["team_update"]).first()
+                if team is None:
+                    raise serializers.ValidationError(
+                        "You are trying to replace team with non existing team."
+                    )
+                query_relation.update(team=team)
+                teams.append(team.id)
+
+            refresh_payroll_summaries(
+                employees=Employee.objects.filter(pk__in=employees),
+                teams=Team.objects.filter(pk__in=teams),
+            )
+            invalidate_financials(
+                employees=[
+                    employee_pk,
+                    request.data.get("employee_update", employee_pk),
+                ],
+                teams=[team_pk, request.data.get("team_update", team_pk)],
+                company=True,
+            )
 
         return Response(request.data, status=status.HTTP_204_NO_CONTENT)
 
@@ -399,15 +814,21 @@ def team_employee_api(request):
         if not Team.objects.filter(name=team_pk).exists():
             raise serializers.ValidationError(f"Team {team_pk} does not exist.")
 
-        query_relation = qs.filter(
-            employee=Employee.objects.get(employee_id=employee_pk),
-            team=Team.objects.get(name=team_pk),
+        # with the employee and team, for the cached financials delete() invalidates
+        relation = (
+            qs.filter(
+                employee=Employee.objects.get(employee_id=employee_pk),
+                team=Team.objects.get(name=team_pk),
+            )
+            .select_related("employee", "team")
+            .first()
         )
 
-        if query_relation.first() is None:
+        if relation is None:
             raise serializers.ValidationError("This relation does not exist.")
 
-        query_relation.delete()
+        # deleting the instance, so the payroll summaries get updated and the cached financials invalidated
+        relation.delete()
         return Response(
             {"message": f"Employee {employee_pk} in team {team_pk} deleted"},
             status=status.HTTP_204_NO_CONTENT,
@@ -416,119 +837,435 @@ def team_employee_api(request):
     return Response({"message": "invalid request"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+def team_employee_bulk_api(request):
+    """
+    Expects a json list [{'employee': 'employee_id', 'team': 'name', 'employee_type': 'LEADER/EMPLOYEE',
+    'work_arr': hour [int]}, ...]. The employees and teams are resolved, and the work hours cap and the one
+    leader per team rule are checked, for the whole list at once. Invalid rows are reported by their index
+    in the list and the valid ones are saved.
+    """
+    if not isinstance(request.data, list):
+        raise serializers.ValidationError("Please provide a list of relations.")
+
+    rows = []
+    errors = []
+    for index, row in enumerate(request.data):
+        serializer = PartialTeamEmployeeBulkSerializer(data=row)
+        if serializer.is_valid():
+            rows.append((index, serializer.validated_data))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+
+    employee_ids = list({row["employee"] for _, row in rows})
+    team_names = list({row["team"] for _, row in rows})
+
+    with transaction.atomic():
+        employees = {}
+        for batch in _batches(employee_ids):
+            employees.update(
+                Employee.objects.filter(employee_id__in=batch)
+                .order_by()
+                .values_list("employee_id", "id")
+            )
+        teams = {}
+        for batch in _batches(team_names):
+            teams.update(Team.objects.filter(name__in=batch).values_list("name", "id"))
+
+        # what is already saved for the employees and teams in the list
+        hours = {}
+        pairs = set()
+        for batch in _batches(list(employees.values())):
+            hours.update(
+                TERelation.objects.filter(employee__in=batch)
+                .values("employee")
+                .annotate(total=Sum("work_arr"))
+                .values_list("employee", "total")
+            )
+            pairs.update(
+                TERelation.objects.filter(employee__in=batch).values_list(
+                    "employee", "team"
+                )
+            )
+        leaders = set()
+        for batch in _batches(list(teams.values())):
+            leaders.update(
+                TERelation.objects.filter(
+                    team__in=batch, employee_type=TERelation.Type.LEADER
+                ).values_list("team", flat=True)
+            )
+
+        relations = []
+        for index, row in rows:
+            employee = employees.get(row["employee"])
+            team = teams.get(row["team"])
+            if employee is None:
+                error = {"employee": ["No employee with this id."]}
+            elif team is None:
+                error = {"team": ["No team with this name."]}
+            elif (employee, team) in pairs:
+                error = {"non_field_errors": ["This relation already exists."]}
+            elif hours.get(employee, 0) + row["work_arr"] > total_work_arr:
+                error = {
+                    "work_arr": [
+                        f"Employee {row['employee']} cannot work more than {total_work_arr} hours/week, "
+                        f"exceeding by {hours.get(employee, 0) + row['work_arr'] - total_work_arr}"
+                    ]
+                }
+            elif row["employee_type"] == TERelation.Type.LEADER and team in leaders:
+                error = {"employee_type": [f"Team {row['team']} already has a leader."]}
+            else:
+                error = None
+
+            if error is not None:
+                errors.append({"index": index, "errors": error})
+                continue
+
+            # the rows saved so far count for the ones after them
+            pairs.add((employee, team))
+            hours[employee] = hours.get(employee, 0) + row["work_arr"]
+            if row["employee_type"] == TERelation.Type.LEADER:
+                leaders.add(team)
+            relations.append(
+                TERelation(
+                    employee_id=employee,
+                    team_id=team,
+                    employee_type=row["employee_type"],
+                    work_arr=row["work_arr"],
+                )
+            )
+
+        TERelation.objects.bulk_create(relations, batch_size=bulk_batch_size)
+        for batch in _batches(relations):
+            refresh_payroll_summaries(
+                employees=Employee.objects.filter(
+                    pk__in=[relation.employee_id for relation in batch]
+                ),
+                teams=Team.objects.filter(
+                    pk__in=[relation.team_id for relation in batch]
+                ),
+            )
+        invalidate_financials(
+            employees=[row["employee"] for _, row in rows],
+            teams=[row["team"] for _, row in rows],
+            company=bool(relations),
+        )
+
+    errors.sort(key=lambda error: error["index"])
+    return Response(
+        {"created": len(relations), "errors": errors},
+        status=status.HTTP_200_OK if relations else status.HTTP_400_BAD_REQUEST,
+    )
+
+
 # endregion
 
 
 # region financials
 
 
+def _financials(query_employee, query_team):
+    """
+    The totals are read from the payroll summaries, a single relation is summed up in the database.
+    """
+    if query_employee is not None and query_team is not None:
+        totals = TERelation.objects.filter(
+            employee__employee_id=query_employee, team__name=query_team
+        ).aggregate(relations=Count("id"), pay=Coalesce(Sum(relation_pay()), 0.0))
+
+        # the lookups for the error messages are only needed when nothing matched
+        if totals["relations"] == 0:
+            if not Employee.objects.filter(employee_id=query_employee).exists():
+                raise serializers.ValidationError("No employee with such id.")
+            if not Team.objects.filter(name=query_team).exists():
+                raise serializers.ValidationError("No team with such name.")
+            raise serializers.ValidationError(
+                "This employee is not assigned to this team."
+            )
+
+        return {"employee": query_employee, "team": query_team, "pay": totals["pay"]}
+
+    if query_employee is not None:
+        summary = (
+            EmployeePayrollSummary.objects.filter(employee__employee_id=query_employee)
+            .select_related("employee")
+            .first()
+        )
+        if summary is None:
+            raise serializers.ValidationError("No employee with such id.")
+        if summary.team_count == 0:
+            raise serializers.ValidationError(
+                "This employee is not assigned to any team."
+            )
+
+        hourly_rate = summary.employee.hourly_rate
+        return {
+            "employee": query_employee,
+            "employee_pay": (summary.total_hours - summary.leader_hours) * hourly_rate,
+            "leader_pay": summary.leader_hours * hourly_rate * leader_bonus,
+            "total": summary.weekly_cost,
+        }
+
+    if query_team is not None:
+        summary = TeamPayrollSummary.objects.filter(team__name=query_team).first()
+        if summary is None:
+            raise serializers.ValidationError("No team with such name.")
+        if summary.headcount == 0:
+            raise serializers.ValidationError("No employee is assigned to this team.")
+
+        return {"team": query_team, "compensation": summary.weekly_cost}
+
+    return {"total compensation": CompanyPayrollSummary.get().weekly_cost}
+
+
+def _financials_scopes(query_employee, query_team):
+    # what the result for the given params is computed from
+    scopes = []
+    if query_employee is not None:
+        scopes.append(employee_scope(query_employee))
+    if query_team is not None:
+        scopes.append(team_scope(query_team))
+    if not scopes:
+        scopes.append(company_scope())
+    # all of them depend on the pay rates, which can change for everyone at once
+    return [rates_scope(), *scopes]
+
+
+def _financials_etag(request):
+    query_employee = request.GET.get("employee_id", None)
+    query_team = request.GET.get("team", None)
+    return versions_etag(
+        _financials_scopes(query_employee, query_team), [query_employee, query_team]
+    )
+
+
 @api_view(["GET"])
+@read_from_replicas
+@condition(etag_func=_financials_etag)
 def financials_api(request):
     """
     Given an employee_id and team (name) it'll return the employee's pay for their work in said team.
     If one of those params is given it'll give the total compensation for it, through all teams/employee.
     If none is given then it'll return the overall compensation for the whole company.
+    Results are cached until a write changes the employee, team or company they were computed from.
     """
 
     query_employee = request.query_params.get("employee_id", None)
     query_team = request.query_params.get("team", None)
-    qs = TERelation.objects.all()
 
-    if query_employee is not None and query_team is not None:
-        employee = Employee.objects.filter(employee_id=query_employee).first()
-        team = Team.objects.filter(name=query_team).first()
+    data, hit = cached_financials(
+        [query_employee, query_team],
+        _financials_scopes(query_employee, query_team),
+        lambda: _financials(query_employee, query_team),
+    )
+    return Response(
+        data, status=status.HTTP_200_OK, headers={"X-Cache": "HIT" if hit else "MISS"}
+    )
 
-        if employee is None:
-            raise serializers.ValidationError("No employee with such id.")
 
-        if team is None:
-            raise serializers.ValidationError("No team with such name.")
+# endregion
 
-        team_employee = qs.filter(employee=employee, team=team)
-        if team_employee.first() is None:
-            raise serializers.ValidationError(
-                "This employee is not assigned to this team."
-            )
 
-        serializer = PartialTeamEmployeeSerializer(instance=team_employee.first())
-        pay = serializer.data["work_arr"] * employee.hourly_rate
+# region payroll
 
-        if serializer.data["employee_type"] == "LEADER":
-            pay *= 1.1
 
-        return Response(
-            {"message": f"{employee} paid {pay} for his work in team {team}"}
+def _payroll_rows(header, rows, working_weeks):
+    """
+    Streams the payroll as a json document, one employee at a time, so the whole month is never held in memory.
+    """
+    yield json.dumps(header)[:-1] + ', "employees": ['
+    for i, (
+        employee_id,
+        name,
+        hourly_rate,
+        weekly_hours,
+        leader_hours,
+        weekly_pay,
+    ) in enumerate(rows):
+        row = {
+            "employee_id": employee_id,
+            "name": name,
+            "hourly_rate": hourly_rate,
+            "weekly_hours": weekly_hours,
+            "leader_hours": leader_hours,
+            "leader_premium": leader_hours
+            * hourly_rate
+            * (leader_bonus - 1)
+            * working_weeks,
+            "monthly_pay": weekly_pay * working_weeks,
+        }
+        yield ("," if i else "") + json.dumps(row)
+    yield "]}"
+
+
+# lines of a payroll run read and encoded at once
+payroll_chunk_size = 2000
+
+
+def _check_month(year, month):
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise serializers.ValidationError(f"{year}-{month} is not a valid month.")
+
+
+@api_view(["GET"])
+def payroll_api(request, year, month):
+    """
+    Returns the monthly pay list of every employee for the given month, with their weekly hours,
+    leader premium and monthly pay. The working weeks come from the WorkingMonth calendar.
+    """
+    _check_month(year, month)
+    working_month = WorkingMonth.for_month(year, month)
+    working_weeks = working_month.working_weeks
+
+    rows = (
+        Employee.objects.annotate(
+            weekly_hours=Coalesce(Sum("partialteamemployeerelation__work_arr"), 0),
+            leader_hours=Coalesce(
+                Sum(
+                    "partialteamemployeerelation__work_arr",
+                    filter=Q(
+                        partialteamemployeerelation__employee_type=TERelation.Type.LEADER
+                    ),
+                ),
+                0,
+            ),
+            weekly_pay=Coalesce(
+                Sum(relation_pay("partialteamemployeerelation__", "hourly_rate")), 0.0
+            ),
+        )
+        .values_list(
+            "employee_id",
+            "name",
+            "hourly_rate",
+            "weekly_hours",
+            "leader_hours",
+            "weekly_pay",
         )
+        .order_by("employee_id")
+        .iterator(chunk_size=2000)
+    )
+
+    header = {
+        "year": year,
+        "month": month,
+        "working_days": working_month.working_days,
+    }
+    return StreamingHttpResponse(
+        _payroll_rows(header, rows, working_weeks),
+        content_type="application/json",
+        status=status.HTTP_200_OK,
+    )
 
-    if query_employee is not None:
-        employee = Employee.objects.filter(employee_id=query_employee).first()
 
-        if employee is None:
-            raise serializers.ValidationError("No employee with such id.")
+@api_view(["GET", "POST"])
+@read_from_replicas
+def payroll_runs_api(request, year, month):
+    if request.method == "GET":
+        """
+        Lists the runs of the month, without their lines.
+        """
+        _check_month(year, month)
+        runs = PayrollRun.objects.filter(year=year, month=month)
+        return Response(
+            PayrollRunSerializer(runs, many=True).data, status=status.HTTP_200_OK
+        )
 
-        team_employees = qs.filter(employee=employee)
-        if team_employees.first() is None:
-            raise serializers.ValidationError(
-                "This employee is not assigned to any team."
-            )
+    if request.method == "POST":
+        """
+        Freezes the payroll of the month as it is now into its next run, see PayrollRun.
+        """
+        _check_month(year, month)
+        run = PayrollRun.run(year, month)
+        return Response(PayrollRunSerializer(run).data, status=status.HTTP_201_CREATED)
 
-        serializer = PartialTeamEmployeeSerializer(instance=team_employees, many=True)
+    return Response({"message": "invalid request"}, status=status.HTTP_400_BAD_REQUEST)
 
-        hours_employee = 0
-        hours_leader = 0
-        for val in serializer.data:
-            if val["employee_type"] == "EMPLOYEE":
-                hours_employee += val["work_arr"]
 
-            if val["employee_type"] == "LEADER":
-                hours_leader += val["work_arr"]
+def _payroll_run_lines(header, lines):
+    """
+    Streams a run as a json document, see _payroll_rows. The lines are encoded a chunk at a time, which takes
+    a quarter less than one at a time.
+    """
+    yield json.dumps(header)[:-1] + ', "lines": ['
+    fields = PayrollRunLine.line_fields
+    separator = ""
+    while True:
+        chunk = list(itertools.islice(lines, payroll_chunk_size))
+        if not chunk:
+            break
+        # without the brackets of the list, the chunks are parts of the same one
+        yield separator + json.dumps([dict(zip(fields, line)) for line in chunk])[1:-1]
+        separator = ","
+    yield "]}"
+
+
+def _payroll_run_etag(request, year, month, number):
+    # a run never changes, so its hash is all there is to its version
+    return (
+        PayrollRun.objects.filter(year=year, month=month, number=number)
+        .values_list("content_hash", flat=True)
+        .first()
+    )
 
-        pay_employee = hours_employee * employee.hourly_rate
-        pay_leader = hours_leader * employee.hourly_rate * 1.1
 
-        return Response(
-            f"Employee {employee} pay is {pay_employee} as employee, {pay_leader} as leader,"
-            f" total {pay_employee + pay_leader}",
-            status=status.HTTP_200_OK,
-        )
+@api_view(["GET"])
+@read_from_replicas
+@condition(etag_func=_payroll_run_etag)
+def payroll_run_api(request, year, month, number):
+    """
+    Returns a run with all of its lines, in their (employee_id, team) order, read from the run's snapshot only.
+    """
+    run = get_object_or_404(PayrollRun, year=year, month=month, number=number)
+    return StreamingHttpResponse(
+        _payroll_run_lines(
+            PayrollRunSerializer(run).data,
+            PayrollRunLine.read(run).iterator(chunk_size=payroll_chunk_size),
+        ),
+        content_type="application/json",
+        status=status.HTTP_200_OK,
+    )
 
-    if query_team is not None:
-        team = Team.objects.filter(name=query_team).first()
 
-        if team is None:
-            raise serializers.ValidationError("No team with such name.")
+# endregion
 
-        team_employees = qs.filter(team=team)
-        if team_employees.first() is None:
-            raise serializers.ValidationError("No employee is assigned to this team.")
 
-        serializer = PartialTeamEmployeeSerializer(instance=team_employees, many=True)
+# region simulation
 
-        total_compensation = 0
-        for val in serializer.data:
-            # in the data the employee will be given through their internal id
-            employee = Employee.objects.filter(id=val["employee"]).first()
 
-            if val["employee_type"] == "EMPLOYEE":
-                total_compensation += employee.hourly_rate * val["work_arr"]
+@api_view(["POST"])
+def simulation_api(request):
+    """
+    Expects {'operations': [{'op': [str], 'where': {...}, ...}, ...]}, applied in order to the organisation as
+    it is now, e.g. [{'op': 'adjust_rates', 'percent': 5, 'where': {'employee_type': 'LEADER'}},
+    {'op': 'cap_hours', 'hours': 30, 'where': {'part_time': true}}]. The ops are adjust_rates (percent or
+    amount), cap_hours (hours), scale_hours (percent), remove and set_leader_bonus (value), where narrows them
+    down by team, employee_id, employee_type and part_time. Returns the weekly cost of the company and of every
+    team whose cost changed, before and after. Nothing is written.
+    """
+    serializer = SimulationSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    # the organisation is read from the primary, as it's kept for the simulations after it, see get_organisation
+    try:
+        result = simulate(serializer.validated_data["operations"])
+    except DjangoValidationError as error:
+        raise serializers.ValidationError(error.messages)
+    return Response(result, status=status.HTTP_200_OK)
 
-            if val["employee_type"] == "LEADER":
-                total_compensation += employee.hourly_rate * val["work_arr"] * 1.1
 
-        return Response({"compensation": total_compensation})
+# endregion
 
-    serializer = PartialTeamEmployeeSerializer(instance=qs, many=True)
-    compensation = 0
-    for val in serializer.data:
-        compensation += (
-            Employee.objects.filter(id=val["employee"]).first().hourly_rate
-            * val["work_arr"]
-        )
 
-        if val["employee_type"] == "LEADER":
-            compensation *= 1.1
+# region metrics
 
-    return Response({"total compensation": compensation}, status=status.HTTP_200_OK)
+
+@require_GET
+def metrics_api(request):
+    """
+    The request metrics of all the worker processes, in the Prometheus text format, for it to scrape.
+    """
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 # endregion